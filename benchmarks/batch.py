@@ -0,0 +1,40 @@
+"""
+compares the throughput of `generate_many()` with a loop over `generate()`
+
+    python benchmarks/batch.py --count 200 --node-limit 400 --depth-limit 5
+"""
+
+import argparse
+import time
+
+from pysource_codegen import generate
+from pysource_codegen import generate_many
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200, help="number of programs")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--node-limit", type=int, default=400)
+    parser.add_argument("--depth-limit", type=int, default=5)
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.count)
+    options = dict(node_limit=args.node_limit, depth_limit=args.depth_limit)
+
+    start = time.perf_counter()
+    single = [generate(seed, **options) for seed in seeds]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = generate_many(seeds, **options)
+    batch_time = time.perf_counter() - start
+
+    assert single == batch
+
+    print(f"generate() loop: {args.count / loop_time:10.1f} programs/s")
+    print(f"generate_many(): {args.count / batch_time:10.1f} programs/s")
+
+
+if __name__ == "__main__":
+    main()
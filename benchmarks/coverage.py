@@ -0,0 +1,46 @@
+"""
+compares the grammar edge coverage of the uniform and the adaptive generation
+
+    python benchmarks/coverage.py --seeds 10000 --interval 1000
+
+Both modes generate the same seeds, the report shows how many edges are covered
+after every `--interval` programs and how long the generation took.
+"""
+
+import argparse
+import time
+
+from pysource_codegen import Coverage
+from pysource_codegen._codegen import iter_generate_ast
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seeds", type=int, default=10000, help="number of seeds")
+    parser.add_argument("--interval", type=int, default=1000)
+    parser.add_argument("--node-limit", type=int, default=400)
+    parser.add_argument("--depth-limit", type=int, default=5)
+    args = parser.parse_args()
+
+    for adaptive in (False, True):
+        coverage = Coverage(adaptive=adaptive, interval=args.interval)
+        start = time.perf_counter()
+        for _ in iter_generate_ast(
+            range(args.seeds),
+            node_limit=args.node_limit,
+            depth_limit=args.depth_limit,
+            locations=False,
+            coverage=coverage,
+        ):
+            pass
+        duration = time.perf_counter() - start
+
+        print(f"{'adaptive' if adaptive else 'uniform'}: {duration:.1f}s")
+        print(coverage.report())
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+measures time and peak memory of generate_ast() and is_valid_ast() for deep trees
+
+    python benchmarks/deep.py --depth-limits 5 10 20 40 --nested 100 400 1600
+
+The generated trees are not much deeper than the depth limit,
+`--nested` measures is_valid_ast() for expressions like `x + 1 + 1 + ...`
+with the given number of nested BinOps.
+"""
+
+import argparse
+import ast
+import sys
+import time
+import tracemalloc
+
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._codegen import is_valid_ast
+
+
+def measure(function, *args, **kwargs):
+    # tracing slows the function down, the time is measured separately
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    duration = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def nested_tree(depth: int) -> ast.Module:
+    expr: ast.expr = ast.Name(id="x", ctx=ast.Load())
+    for _ in range(depth):
+        expr = ast.BinOp(left=expr, op=ast.Add(), right=ast.Constant(value=1))
+    return ast.fix_missing_locations(
+        ast.Module(body=[ast.Expr(value=expr)], type_ignores=[])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth-limits", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--node-limit", type=int, default=2000)
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds")
+    parser.add_argument("--nested", type=int, nargs="*", default=[100, 400, 1600])
+    args = parser.parse_args()
+
+    print(
+        f"{'depth':>5} {'generate [s]':>13} {'peak [KiB]':>11} {'is_valid [s]':>13} {'peak [KiB]':>11}"
+    )
+    for depth_limit in args.depth_limits:
+        generate_time = validate_time = 0.0
+        generate_peak = validate_peak = 0
+        for seed in range(args.seeds):
+            tree, duration, peak = measure(
+                generate_ast, seed, node_limit=args.node_limit, depth_limit=depth_limit
+            )
+            generate_time += duration
+            generate_peak = max(generate_peak, peak)
+
+            valid, duration, peak = measure(is_valid_ast, tree)
+            assert valid
+            validate_time += duration
+            validate_peak = max(validate_peak, peak)
+
+        print(
+            f"{depth_limit:5} {generate_time:13.3f} {generate_peak/1024:11.1f}"
+            f" {validate_time:13.3f} {validate_peak/1024:11.1f}"
+        )
+
+    if args.nested:
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(args.nested)))
+        print()
+        print(f"{'nested':>6} {'is_valid [s]':>13} {'peak [KiB]':>11}")
+    for depth in args.nested:
+        valid, duration, peak = measure(is_valid_ast, nested_tree(depth))
+        assert valid
+        print(f"{depth:6} {duration:13.3f} {peak/1024:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+compares the source output of `emit()` with `ast.unparse()`
+
+    python benchmarks/emit.py --seeds 200 --node-limits 100 1000 10000
+
+Both functions get the same trees, which are generated before the measurement.
+The emitted source is checked to parse to the same tree as the unparsed source.
+"""
+
+import argparse
+import ast
+import time
+
+from pysource_codegen._codegen import equal_ast
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._emit import emit
+from pysource_codegen._utils import unparse
+
+
+def measure(function, trees, repeat):
+    duration = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tree in trees:
+            function(tree)
+        duration = min(duration, time.perf_counter() - start)
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--node-limits", type=int, nargs="+", default=[100, 1000, 10000]
+    )
+    parser.add_argument("--depth-limit", type=int, default=8)
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="the best time of all runs is used"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'node limit':>10} {'nodes':>10} {'unparse [s]':>12} {'emit [s]':>12} {'speedup':>8}"
+    )
+    for node_limit in args.node_limits:
+        trees = []
+        for seed in range(args.seeds):
+            tree = generate_ast(
+                seed, node_limit=node_limit, depth_limit=args.depth_limit
+            )
+            try:
+                expected = ast.parse(unparse(tree))
+            except (ValueError, SyntaxError):
+                # some f-strings can not be unparsed by older python versions
+                continue
+            assert equal_ast(ast.parse(emit(tree)), expected), seed
+            trees.append(tree)
+
+        nodes = sum(1 for tree in trees for _ in ast.walk(tree))
+        unparse_time = measure(unparse, trees, args.repeat)
+        emit_time = measure(emit, trees, args.repeat)
+        print(
+            f"{node_limit:>10} {nodes:>10} {unparse_time:12.3f} {emit_time:12.3f}"
+            f" {unparse_time / emit_time:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+compares the random sources of the rng versions
+
+    python benchmarks/entropy.py --seeds 300 --node-limit 1000
+
+The first table shows how many decisions per second every source makes
+for the kinds of decisions which the generator uses.
+The second table shows the decisions of a whole generation run
+and how many nodes are generated per second with every rng version.
+Every version generates different trees for the same seeds.
+"""
+
+import argparse
+import ast
+import time
+from collections import Counter
+
+from pysource_codegen._codegen import AstGenerator
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._entropy import entropy_sources
+
+decisions = {
+    "bit()": lambda source: source.bit,
+    "below(6)": lambda source: lambda: source.below(6),
+    "below(21)": lambda source: lambda: source.below(21),
+    "random()": lambda source: lambda: source.random(),
+}
+
+
+def decisions_per_second(decision, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        decision()
+    return count / (time.perf_counter() - start)
+
+
+class CountingSource:
+    """
+    counts the calls to the methods of a random source
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        method = getattr(self.source, name)
+
+        def call(*args):
+            self.calls[name] += 1
+            return method(*args)
+
+        return call
+
+
+def count_decisions(seeds, node_limit, depth_limit, rng_version):
+    generator = AstGenerator(0, node_limit, depth_limit, rng_version=rng_version)
+    counting = generator.rand = CountingSource(generator.rand)
+    for seed in seeds:
+        generator.reset(seed)
+        generator.generate("Module")
+    return sum(counting.calls.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seeds", type=int, default=300, help="number of seeds")
+    parser.add_argument("--node-limit", type=int, default=1000)
+    parser.add_argument("--depth-limit", type=int, default=8)
+    parser.add_argument(
+        "--decisions", type=int, default=1_000_000, help="calls per decision kind"
+    )
+    args = parser.parse_args()
+
+    print(f"{'rng version':>11}", *(f"{name + ' [M/s]':>15}" for name in decisions))
+    for version, source_type in sorted(entropy_sources.items()):
+        source = source_type(0)
+        rates = [
+            decisions_per_second(decision(source), args.decisions) / 1e6
+            for decision in decisions.values()
+        ]
+        print(f"{version:>11}", *(f"{rate:15.2f}" for rate in rates))
+
+    print()
+    print(
+        f"{'rng version':>11} {'decisions':>10} {'nodes':>10} {'generate [s]':>13} {'nodes/s':>10}"
+    )
+    seeds = range(args.seeds)
+    for version in sorted(entropy_sources):
+        count = count_decisions(seeds, args.node_limit, args.depth_limit, version)
+        nodes = 0
+        duration = 0.0
+        for seed in seeds:
+            start = time.perf_counter()
+            tree = generate_ast(
+                seed,
+                node_limit=args.node_limit,
+                depth_limit=args.depth_limit,
+                locations=False,
+                rng_version=version,
+            )
+            duration += time.perf_counter() - start
+            nodes += sum(1 for _ in ast.walk(tree))
+        print(
+            f"{version:>11} {count:>10} {nodes:>10} {duration:13.3f} {nodes / duration:10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+measures how the generation time grows with the size of the generated trees
+
+    python benchmarks/scaling.py --node-limits 1000 2000 4000 8000 16000
+
+The time per node should stay constant and the fitted exponent should be close to 1,
+if every node is visited a bounded number of times.
+"""
+
+import argparse
+import ast
+import math
+import time
+
+from pysource_codegen._codegen import generate_ast
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--node-limits", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000]
+    )
+    parser.add_argument("--depth-limit", type=int, default=20)
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds")
+    args = parser.parse_args()
+
+    # fill the caches of the contexts
+    generate_ast(0, node_limit=args.node_limits[0], depth_limit=args.depth_limit)
+
+    print(f"{'node limit':>10} {'nodes':>10} {'time [s]':>10} {'µs/node':>10}")
+    points = []
+    for node_limit in args.node_limits:
+        nodes = 0
+        duration = 0.0
+        for seed in range(args.seeds):
+            start = time.perf_counter()
+            tree = generate_ast(
+                seed, node_limit=node_limit, depth_limit=args.depth_limit
+            )
+            duration += time.perf_counter() - start
+            nodes += sum(1 for _ in ast.walk(tree))
+
+        points.append((nodes, duration))
+        print(
+            f"{node_limit:>10} {nodes:>10} {duration:10.3f} {duration / nodes * 1e6:10.1f}"
+        )
+
+    (first_nodes, first_time), (last_nodes, last_time) = points[0], points[-1]
+    if len(points) > 1 and last_nodes != first_nodes:
+        exponent = math.log(last_time / first_time) / math.log(last_nodes / first_nodes)
+        print(f"time ~ nodes ^ {exponent:.2f}")
+
+
+if __name__ == "__main__":
+    main()
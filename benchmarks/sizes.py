@@ -0,0 +1,73 @@
+"""
+reports the distribution of the size of the generated code for a range of seeds
+
+    python benchmarks/sizes.py --seeds 100
+    python benchmarks/sizes.py --seeds 100 --target-bytes 10000
+
+The size targets should produce a narrow distribution around the target.
+"""
+
+import argparse
+import ast
+import statistics
+import warnings
+
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._utils import unparse
+
+
+def distribution(values):
+    values = sorted(values)
+    deciles = statistics.quantiles(values, n=10) if len(values) > 1 else values * 9
+    return {
+        "min": values[0],
+        "p10": deciles[0],
+        "median": statistics.median(values),
+        "p90": deciles[-1],
+        "max": values[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--node-limit", type=int, default=10000000)
+    parser.add_argument("--depth-limit", type=int, default=8)
+    parser.add_argument("--target-nodes", type=int)
+    parser.add_argument("--target-bytes", type=int)
+    args = parser.parse_args()
+
+    nodes = []
+    sizes = []
+    failed = 0
+    for seed in range(args.first_seed, args.first_seed + args.seeds):
+        tree = generate_ast(
+            seed,
+            node_limit=args.node_limit,
+            depth_limit=args.depth_limit,
+            target_nodes=args.target_nodes,
+            target_bytes=args.target_bytes,
+        )
+        nodes.append(sum(1 for _ in ast.walk(tree)))
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", SyntaxWarning)
+                sizes.append(len(unparse(tree).encode()))
+        except ValueError:
+            # some f-strings can not be unparsed by older python versions
+            failed += 1
+
+    print(f"{'':>8} {'min':>10} {'p10':>10} {'median':>10} {'p90':>10} {'max':>10}")
+    for name, values in (("nodes", nodes), ("bytes", sizes)):
+        if values:
+            d = distribution(values)
+            print(f"{name:>8} " + " ".join(f"{v:10.0f}" for v in d.values()))
+    if failed:
+        print(f"{failed} programs could not be unparsed")
+
+
+if __name__ == "__main__":
+    main()
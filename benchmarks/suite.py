@@ -0,0 +1,173 @@
+"""
+measures throughput and peak memory of the generator pipeline
+for a grid of generation parameters and fixed seeds
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --compare baseline.json
+
+The comparison exits with 1 if a benchmark is slower or uses more memory
+than the baseline by more than --threshold.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from pysource_codegen._codegen import fix_nonlocal
+from pysource_codegen._codegen import generate
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._codegen import is_valid_ast
+from pysource_codegen._utils import unparse
+
+
+def benchmarks(seeds, params):
+    """
+    returns `name -> function` where `function()` processes one item per seed
+    """
+    trees = [generate_ast(seed, **params) for seed in seeds]
+
+    return {
+        "generate_ast": lambda: [generate_ast(seed, **params) for seed in seeds],
+        "generate": lambda: [generate(seed, **params) for seed in seeds],
+        "is_valid_ast": lambda: [is_valid_ast(tree) for tree in trees],
+        "fix_nonlocal": lambda: [fix_nonlocal(tree) for tree in trees],
+        "unparse": lambda: [unparse(tree) for tree in trees],
+    }
+
+
+def measure(function, repeat):
+    # tracing slows the function down, the time is measured separately
+    duration = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        duration = min(duration, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def run(args):
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    results = []
+
+    for node_limit, depth_limit, root_node in itertools.product(
+        args.node_limits, args.depth_limits, args.root_nodes
+    ):
+        params = dict(
+            node_limit=node_limit, depth_limit=depth_limit, root_node=root_node
+        )
+        for name, function in benchmarks(seeds, params).items():
+            if args.filter and args.filter not in name:
+                continue
+            duration, peak = measure(function, args.repeat)
+            result = dict(
+                benchmark=name,
+                **params,
+                items_per_second=len(seeds) / duration,
+                peak_kib=peak / 1024,
+            )
+            print(
+                f"{name:>14} {node_limit:>10} {depth_limit:>5} {root_node:>10}"
+                f" {result['items_per_second']:12.1f} {result['peak_kib']:12.1f}",
+                file=sys.stderr,
+            )
+            results.append(result)
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "seeds": [seeds.start, seeds.stop],
+        "results": results,
+    }
+
+
+def result_key(result):
+    return (
+        result["benchmark"],
+        result["node_limit"],
+        result["depth_limit"],
+        result["root_node"],
+    )
+
+
+def compare(baseline, current, threshold):
+    """
+    prints the changes against the baseline and returns the number of regressions
+    """
+    old_results = {result_key(r): r for r in baseline["results"]}
+    regressions = 0
+
+    print(
+        f"{'benchmark':>14} {'nodes':>10} {'depth':>5} {'root':>10}"
+        f" {'items/s':>12} {'change':>8} {'peak [KiB]':>12} {'change':>8}"
+    )
+    for result in current["results"]:
+        key = result_key(result)
+        old = old_results.get(key)
+        if old is None:
+            continue
+
+        speed = result["items_per_second"] / old["items_per_second"] - 1
+        memory = result["peak_kib"] / old["peak_kib"] - 1 if old["peak_kib"] else 0
+        regression = speed < -threshold or memory > threshold
+        regressions += regression
+
+        print(
+            f"{key[0]:>14} {key[1]:>10} {key[2]:>5} {key[3]:>10}"
+            f" {result['items_per_second']:12.1f} {speed:+8.1%}"
+            f" {result['peak_kib']:12.1f} {memory:+8.1%}"
+            + ("  REGRESSION" if regression else "")
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--node-limits", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--depth-limits", type=int, nargs="+", default=[5, 10])
+    parser.add_argument(
+        "--root-nodes", nargs="+", default=["Module", "Expression", "Interactive"]
+    )
+    parser.add_argument("--seeds", type=int, default=20, help="number of seeds")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="the best time of all runs is used"
+    )
+    parser.add_argument("--filter", help="run only benchmarks containing this text")
+    parser.add_argument("--output", help="write the results as json to this file")
+    parser.add_argument("--compare", help="baseline json file of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change which is reported as regression",
+    )
+    args = parser.parse_args()
+
+    current = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
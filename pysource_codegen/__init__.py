@@ -1,5 +1,45 @@
+from typing import TYPE_CHECKING
+
 from ._codegen import generate
+from ._codegen import generate_many
+from ._codegen import iter_generate
+from ._codegen import write_module
+from ._coverage import Coverage
+from ._coverage import directory_coverage
+from ._stats import Stats
+
+if TYPE_CHECKING:
+    from ._parallel import generate_parallel
+    from ._validate import validate_directory
 
-__all__ = ("generate",)
+__all__ = (
+    "Coverage",
+    "directory_coverage",
+    "generate",
+    "generate_many",
+    "generate_parallel",
+    "iter_generate",
+    "Stats",
+    "validate_directory",
+    "write_module",
+)
 
 __version__ = "0.7.1"
+
+# the modules which use a process pool are imported on first use
+_lazy_modules = {
+    "generate_parallel": "._parallel",
+    "validate_directory": "._validate",
+}
+
+
+def __getattr__(name):
+    try:
+        module = _lazy_modules[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    import importlib
+
+    value = globals()[name] = getattr(importlib.import_module(module, __name__), name)
+    return value
@@ -1,6 +1,54 @@
+from __future__ import annotations
+
 import argparse
+import sys
 
 from ._codegen import generate
+from ._codegen import write_module
+from ._coverage import Coverage
+from ._coverage import directory_coverage
+from ._entropy import DEFAULT_RNG_VERSION
+from ._entropy import entropy_sources
+from ._parallel import generate_parallel
+from ._sinks import open_sink
+from ._sinks import stream_formats
+from ._stats import Stats
+from ._validate import top_rules
+from ._validate import validate_directory
+
+
+def seed_range(text: str) -> range:
+    start, separator, stop = text.partition(":")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected START:STOP, got {text!r}")
+    return range(int(start), int(stop))
+
+
+def validate(directory: str, jobs: int, cache: str | None):
+    results = []
+    for result in validate_directory(directory, jobs=jobs, cache=cache):
+        if result.rejection is not None:
+            print(f"{result.path}: {result.rejection}")
+        elif result.error is not None:
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+        results.append(result)
+
+    print()
+    print("rejected files per rule:")
+    for rule, count in top_rules(results):
+        print(f"{count:>8} {rule}")
+
+
+def edge_coverage(directory: str, jobs: int, output):
+    coverage = directory_coverage(directory, jobs=jobs)
+    print(coverage.report())
+    print()
+    print("uncovered grammar edges:")
+    for parent, name, child in coverage.uncovered():
+        print(f"    {parent}.{name}: {child}")
+
+    if output is not None:
+        coverage.dump(output)
 
 
 def run():
@@ -13,16 +61,187 @@ def run():
         "--depth-limit", type=int, default=5, help="limit for the depth of the ast"
     )
     parser.add_argument("--root-node", type=str, default="Module", help="root ast type")
+    parser.add_argument(
+        "--target-nodes",
+        type=int,
+        help="generate the module statement by statement until it has this many nodes",
+    )
+    parser.add_argument(
+        "--target-bytes",
+        type=int,
+        help="generate the module statement by statement until the source has this size",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="number of programs, generated for the seeds starting at --seed",
+    )
+    parser.add_argument(
+        "--seeds",
+        type=seed_range,
+        metavar="START:STOP",
+        help="generate the programs for the seeds START to STOP-1 (instead of --seed and --count)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="print the programs as soon as they are generated",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="write the programs to this directory or archive (.zip, .tar, .tar.gz, .tar.bz2, .tar.xz)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=stream_formats,
+        default="text",
+        help="format of the programs on stdout: separated by `# seed: ...` comments, "
+        "as json lines or terminated by NUL characters (can not be used with --output)",
+    )
+    parser.add_argument(
+        "--emit-source",
+        action="store_true",
+        help="write the source directly instead of using ast.unparse() (faster, different formatting)",
+    )
+    parser.add_argument(
+        "--rng-version",
+        type=int,
+        choices=sorted(entropy_sources),
+        default=DEFAULT_RNG_VERSION,
+        help="the code for a seed is only the same for the same rng version, "
+        "version 1 makes the same kind of random.Random calls as pysource-codegen 0.7",
+    )
+    parser.add_argument(
+        "--stats",
+        type=argparse.FileType("w"),
+        help="write statistics about the generation as json to this file",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="prefer the grammar edges which were generated less often in the previous programs "
+        "(the code for a seed depends then on the previous seeds)",
+    )
+    parser.add_argument(
+        "--coverage",
+        type=argparse.FileType("w"),
+        help="write the covered grammar edges as json to this file",
+    )
+    parser.add_argument(
+        "--edge-coverage",
+        metavar="DIR",
+        help="print which grammar edges are covered by the code in DIR",
+    )
+    parser.add_argument(
+        "--validate",
+        metavar="DIR",
+        help="print which files in DIR contain code that can not be generated, "
+        "and the rules which rejected them",
+    )
+    parser.add_argument(
+        "--validate-cache",
+        metavar="FILE",
+        help="json file to cache the results of --validate",
+    )
     args = parser.parse_args()
 
-    print(
-        generate(
-            args.seed,
+    if args.output is not None and args.format != "text":
+        parser.error("--format can not be used with --output")
+
+    if args.validate is not None:
+        validate(args.validate, args.jobs, args.validate_cache)
+        return
+
+    if args.edge_coverage is not None:
+        edge_coverage(args.edge_coverage, args.jobs, args.coverage)
+        return
+
+    stats = None if args.stats is None else Stats()
+    coverage = (
+        Coverage(adaptive=args.adaptive)
+        if args.adaptive or args.coverage is not None
+        else None
+    )
+
+    if args.seeds is None:
+        first_seed = args.seed or 0
+        seeds = range(first_seed, first_seed + args.count)
+        seed = args.seed
+    else:
+        seeds = args.seeds
+        seed = seeds.start
+
+    single_program = (
+        len(seeds) == 1
+        and args.jobs == 1
+        and args.output is None
+        and args.format == "text"
+    )
+
+    if (
+        single_program
+        and args.root_node == "Module"
+        and (args.target_nodes is not None or args.target_bytes is not None)
+    ):
+        # large modules are written statement by statement
+        write_module(
+            seed,
+            sys.stdout,
             node_limit=args.node_limit,
             depth_limit=args.depth_limit,
-            root_node=args.root_node,
+            target_nodes=args.target_nodes,
+            target_bytes=args.target_bytes,
+            emit_source=args.emit_source,
+            rng_version=args.rng_version,
+            stats=stats,
+            coverage=coverage,
         )
-    )
+    elif single_program:
+        print(
+            generate(
+                seed,
+                node_limit=args.node_limit,
+                depth_limit=args.depth_limit,
+                root_node=args.root_node,
+                target_nodes=args.target_nodes,
+                target_bytes=args.target_bytes,
+                emit_source=args.emit_source,
+                rng_version=args.rng_version,
+                stats=stats,
+                coverage=coverage,
+            )
+        )
+    else:
+        errors: list[tuple[int | bytes, str]] = []
+        with open_sink(args.output, args.format, sys.stdout) as sink:
+            for seed, source in generate_parallel(
+                seeds,
+                jobs=args.jobs,
+                ordered=not args.unordered,
+                node_limit=args.node_limit,
+                depth_limit=args.depth_limit,
+                root_node=args.root_node,
+                target_nodes=args.target_nodes,
+                target_bytes=args.target_bytes,
+                emit_source=args.emit_source,
+                rng_version=args.rng_version,
+                stats=stats,
+                coverage=coverage,
+                errors=errors,
+            ):
+                sink.write(seed, source)
+        for seed, error in errors:
+            print(f"seed {seed} skipped: {error}", file=sys.stderr)
+
+    if stats is not None:
+        stats.dump(args.stats)
+    if coverage is not None and args.coverage is not None:
+        coverage.dump(args.coverage)
 
 
 if __name__ == "__main__":
@@ -3,14 +3,36 @@ from __future__ import annotations
 import ast
 import itertools
 import sys
-import traceback
-from copy import deepcopy
+import time
+from bisect import bisect
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import replace
 from typing import Any
-
-from ._limits import f_string_expr_limit
-from ._limits import f_string_format_limit
+from typing import Callable
+from typing import IO
+from typing import Iterable
+from typing import Iterator
+
+from ._context import comprehensions
+from ._context import Context
+from ._context import DECORATOR_ATTRIBUTE
+from ._context import DECORATOR_CALL
+from ._context import DECORATOR_START
+from ._context import Parents
+from ._coverage import Coverage
+from ._emit import emit
+from ._emit import emit_statement
+from ._entropy import DEFAULT_RNG_VERSION
+from ._entropy import entropy_source
+from ._limits import f_string_limits
+from ._stats import field_values
+from ._stats import Stats
+from ._stats import timed
 from ._utils import ast_dump
+from ._utils import fix_statement_locations
 from ._utils import unparse
+from ._utils import unparse_statement
 from .ast_info import get_info
 from .types import BuiltinNodeType
 from .types import NodeType
@@ -22,8 +44,6 @@ py310plus = (3, 10) <= sys.version_info
 py311plus = (3, 11) <= sys.version_info
 py312plus = (3, 12) <= sys.version_info
 
-comprehensions = ("GeneratorExp", "ListComp", "SetComp", "DictComp")
-
 InterpolationOrFormattedValue = (ast.FormattedValue,)
 if sys.version_info >= (3, 14):
     InterpolationOrFormattedValue += (ast.Interpolation,)
@@ -54,32 +74,6 @@ def walk_childs_first(node):
         yield e
 
 
-def walk_function_nodes(node):
-    if isinstance(node, (ast.AsyncFunctionDef, ast.FunctionDef, ast.Lambda)):
-        for argument in arguments(node):
-            if argument.annotation:
-                yield from walk_function_nodes(argument.annotation)
-        for default in [*node.args.kw_defaults, *node.args.defaults]:
-            if default is not None:
-                yield from walk_function_nodes(default)
-
-        if isinstance(node, (ast.AsyncFunctionDef, ast.FunctionDef)):
-            for decorator in node.decorator_list:
-                yield from walk_function_nodes(decorator)
-
-            if node.returns is not None:
-                yield from walk_function_nodes(node.returns)
-
-        return
-    yield node
-    if isinstance(node, list):
-        for e in node:
-            yield from walk_function_nodes(e)
-        return
-    for child in ast.iter_child_nodes(node):
-        yield from walk_function_nodes(child)
-
-
 def use():
     """
     this function is mocked in test_valid_source to ignore some decisions
@@ -116,9 +110,6 @@ def equal_ast(lhs, rhs, print=lambda *l: None, t="root"):
         return lhs == rhs
 
 
-import random
-
-
 def only_firstone(l, condition):
     found = False
     for i, e in reversed(list(enumerate(l))):
@@ -133,141 +124,132 @@ def unique_by(l, key):
 
 
 class Invalid(Exception):
-    pass
+    """
+    raised by `probability_try()` for a node type which is not allowed in the context
+    """
 
+    def __init__(self, rule: str):
+        super().__init__(rule)
+        # id of the rule which rejected the node type
+        self.rule = rule
 
-def probability(parents, child_name):
-    try:
-        return probability_try(parents, child_name)
-    except Invalid:
-        return 0
 
+def probability(context: Context, child_name):
+    try:
+        return context.probabilities[child_name]
+    except KeyError:
+        pass
 
-def probability_try(parents, child_name):
-    parent_types = [p[0] for p in parents]
+    try:
+        result = probability_try(context, child_name)
+    except Invalid as e:
+        result = 0
+        context.rejections[child_name] = e.rule
 
-    def inside(types, not_types=()):
-        if not isinstance(types, tuple):
-            types = (types,)
+    context.probabilities[child_name] = result
+    return result
 
-        for parent, arg in reversed(parents):
-            qual_parent = f"{parent}.{arg}"
-            if any(qual_parent == t if "." in t else parent == t for t in types):
-                return True
-            if any(qual_parent == t if "." in t else parent == t for t in not_types):
-                return False
-        return False
 
+def probability_try(context: Context, child_name):
     if child_name in ("Store", "Del", "Load"):
         return 1
 
     if child_name == "Slice" and not (
-        parents[-1] == ("Subscript", "slice")
-        or parents[-2:]
-        == [
+        context.last == ("Subscript", "slice")
+        or (context.prev, context.last)
+        == (
             ("Subscript", "slice"),
             ("Tuple", "elts"),
-        ]
+        )
     ):
-        raise Invalid
+        raise Invalid("slice-outside-subscript")
 
-    if child_name == "ExtSlice" and parents[-1] == ("ExtSlice", "dims"):
+    if child_name == "ExtSlice" and context.last == ("ExtSlice", "dims"):
         # SystemError('extended slice invalid in nested slice')
-        raise Invalid
+        raise Invalid("nested-ext-slice")
 
     # f-string
-    if parents[-1] == ("JoinedStr", "values") and child_name not in (
+    if context.last == ("JoinedStr", "values") and child_name not in (
         "Constant",
         "FormattedValue",
     ):
-        raise Invalid
+        raise Invalid("joined-str-value")
 
     if 0:
         if (
             not py312plus
-            and parents[-1] == ("FormattedValue", "value")
+            and context.last == ("FormattedValue", "value")
             and child_name != "Constant"
         ):
             # TODO: WHY?
-            raise Invalid
+            raise Invalid("formatted-value-value")
 
-    if parents[-1] == ("FormattedValue", "format_spec") and child_name != "JoinedStr":
-        raise Invalid
+    if context.last == ("FormattedValue", "format_spec") and child_name != "JoinedStr":
+        raise Invalid("format-spec-not-joined-str")
 
     if (
         child_name == "JoinedStr"
-        and parents.count(("FormattedValue", "format_spec")) > f_string_format_limit
+        and context.format_spec_depth > f_string_limits().format_limit
     ):
-        raise Invalid
+        raise Invalid("format-spec-depth")
 
     if (
         child_name == "JoinedStr"
-        and parents.count(("FormattedValue", "value")) > f_string_expr_limit
+        and context.formatted_value_depth > f_string_limits().expr_limit
     ):
-        raise Invalid
+        raise Invalid("formatted-value-depth")
 
-    if child_name == "FormattedValue" and parents[-1][0] != "JoinedStr":
+    if child_name == "FormattedValue" and context.parent_type != "JoinedStr":
         # TODO: doc says this should be valid, maybe a bug in the python doc
         # see https://github.com/python/cpython/issues/111257
-        raise Invalid
+        raise Invalid("formatted-value-outside-joined-str")
 
-    if inside(
-        ("Delete.targets"), ("Subscript.value", "Subscript.slice", "Attribute.value")
-    ) and child_name not in (
+    if context.in_delete_target and child_name not in (
         "Name",
         "Attribute",
         "Subscript",
         "List",
         "Tuple",
     ):
-        raise Invalid
+        raise Invalid("delete-target")
 
     # function statements
-    if child_name in (
-        "Return",
-        "Yield",
-        "YieldFrom",
-    ) and not inside(
-        ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body"), ("ClassDef.body",)
-    ):
-        raise Invalid
-    # function statements
-    if child_name in ("Nonlocal",) and not inside(
-        ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body", "ClassDef.body")
-    ):
-        raise Invalid
-
     if (
-        not py38plus
-        and child_name == "Continue"
-        and inside(
-            ("Try.finalbody", "TryStar.finalbody"),
-            ("FunctionDef.body", "AsyncFunctionDef.body"),
+        child_name
+        in (
+            "Return",
+            "Yield",
+            "YieldFrom",
         )
+        and not context.in_function
     ):
-        raise Invalid
+        raise Invalid("function-statement-outside-function")
+    # function statements
+    if child_name in ("Nonlocal",) and not context.in_scope:
+        raise Invalid("nonlocal-outside-scope")
+
+    if not py38plus and child_name == "Continue" and context.in_finally:
+        raise Invalid("continue-in-finally")
 
-    if parents[-1] == ("MatchMapping", "keys") and child_name != "Constant":
+    if context.last == ("MatchMapping", "keys") and child_name != "Constant":
         # TODO: find all allowed key types
-        raise Invalid
+        raise Invalid("match-mapping-key")
 
-    if child_name == "MatchStar" and parent_types[-1] != "MatchSequence":
-        raise Invalid
+    if child_name == "MatchStar" and context.parent_type != "MatchSequence":
+        raise Invalid("match-star-outside-sequence")
 
-    if child_name == "Starred" and parents[-1] not in (
+    if child_name == "Starred" and context.last not in (
         ("Tuple", "elts"),
         ("Call", "args"),
         ("List", "elts"),
         ("Set", "elts"),
         ("ClassDef", "bases"),
     ):
-        raise Invalid
+        raise Invalid("starred-context")
 
     assign_target = ("Subscript", "Attribute", "Name", "Starred", "List", "Tuple")
 
-    assign_context = [p for p in parents if p[0] not in ("Tuple", "List", "Starred")]
-
-    if assign_context and assign_context[-1] in [
+    if context.assign_parent in [
         ("For", "target"),
         ("AsyncFor", "target"),
         ("AnnAssign", "target"),
@@ -277,207 +259,366 @@ def probability_try(parents, child_name):
         ("comprehension", "target"),
     ]:
         if child_name not in assign_target:
-            raise Invalid
+            raise Invalid("assign-target")
 
-    if parents[-1] in [("AugAssign", "target"), ("AnnAssign", "target")]:
+    if context.last in [("AugAssign", "target"), ("AnnAssign", "target")]:
         if child_name in ("Starred", "List", "Tuple"):
-            raise Invalid
+            raise Invalid("aug-assign-target-unpacking")
 
-    if inside(("AnnAssign.target",)) and child_name == "Starred":
+    if context.in_annassign_target and child_name == "Starred":
         # TODO this might be a cpython bug
-        raise Invalid
+        raise Invalid("starred-in-ann-assign-target")
 
-    if parents[-1] in [("AnnAssign", "target")]:
+    if context.last in [("AnnAssign", "target")]:
         if child_name not in ("Name", "Attribute", "Subscript"):
-            raise Invalid
+            raise Invalid("ann-assign-target")
 
-    if parents[-1] in [("NamedExpr", "target")] and child_name != "Name":
-        raise Invalid
+    if context.last in [("NamedExpr", "target")] and child_name != "Name":
+        raise Invalid("named-expr-target")
 
-    in_async_code = inside(
-        ("AsyncFunctionDef.body", "GeneratorExp.elt"),
-        ("FunctionDef.body", "Lambda.body", "ClassDef.body"),
-    )
+    if child_name in ("AsyncFor", "Await", "AsyncWith") and not context.in_async:
+        raise Invalid("async-outside-async-function")
 
-    if child_name in ("AsyncFor", "Await", "AsyncWith") and not in_async_code:
-        raise Invalid
+    if child_name in ("YieldFrom",) and context.in_async:
+        raise Invalid("yield-from-in-async-function")
 
-    if child_name in ("YieldFrom",) and in_async_code:
-        raise Invalid
+    if child_name in ("Break", "Continue") and not context.in_loop:
+        raise Invalid("break-outside-loop")
 
-    in_loop = inside(
-        ("For.body", "While.body", "AsyncFor.body"),
-        ("FunctionDef.body", "Lambda.body", "AsyncFunctionDef.body", "ClassDef.body"),
-    )
-
-    if child_name in ("Break", "Continue") and not in_loop:
-        raise Invalid
-
-    if inside("TryStar.handlers") and child_name in ("Break", "Continue", "Return"):
+    if context.in_trystar_handler and child_name in ("Break", "Continue", "Return"):
         # SyntaxError: 'break', 'continue' and 'return' cannot appear in an except* block
-        raise Invalid
+        raise Invalid("control-flow-in-except-star")
 
-    if inside(("MatchValue",)) and child_name not in (
+    if context.in_match_value and child_name not in (
         "Attribute",
         "Name",
         "Constant",
         "UnaryOp",
         "USub",
     ):
-        raise Invalid
+        raise Invalid("match-value")
 
     if (
-        inside("MatchValue.value")
-        and inside("Attribute.value")
+        context.in_match_value_value
+        and context.in_attribute_value
         and child_name not in ("Attribute", "Name")
     ):
-        raise Invalid
+        raise Invalid("match-value-attribute")
 
     if (
-        inside(("MatchValue",))
-        and inside(("UnaryOp",))
+        context.in_match_value
+        and context.in_unaryop
         and child_name in ("Name", "UnaryOp", "Attribute")
     ):
-        raise Invalid
+        raise Invalid("match-value-unary-op")
 
-    if parents[-1] == ("MatchValue", "value") and child_name == "Name":
-        raise Invalid
+    if context.last == ("MatchValue", "value") and child_name == "Name":
+        raise Invalid("match-value-name")
 
-    if inside("MatchClass.cls"):
+    if context.in_match_class_cls:
         if child_name not in ("Name", "Attribute"):
-            raise Invalid
+            raise Invalid("match-class-cls")
 
-    if parents[-1] == ("comprehension", "iter") and child_name == "NamedExpr":
-        raise Invalid
+    if context.last == ("comprehension", "iter") and child_name == "NamedExpr":
+        raise Invalid("named-expr-in-comprehension-iter")
 
-    if inside(comprehensions) and child_name in ("Yield", "YieldFrom"):
+    if context.in_comprehension and child_name in ("Yield", "YieldFrom"):
         # SyntaxError: 'yield' inside list comprehension
-        raise Invalid
+        raise Invalid("yield-in-comprehension")
 
     if (
-        inside(comprehensions)
+        context.in_comprehension
         # TODO restrict to comprehension inside ClassDef
-        and inside(
-            "ClassDef.body",
-            ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body"),
-        )
+        and context.in_class_body
         and child_name == "NamedExpr"
     ):
         # SyntaxError: assignment expression within a comprehension cannot be used in a class body
-        raise Invalid
+        raise Invalid("named-expr-in-class-comprehension")
 
-    if not py39plus and any(p[1] == "decorator_list" for p in parents):
-        # restricted decorators
+    if context.decorator in (DECORATOR_START, DECORATOR_CALL, DECORATOR_ATTRIBUTE):
+        # restricted decorators (python < 3.9)
         # see https://peps.python.org/pep-0614/
-
-        deco_parents = list(
-            itertools.takewhile(lambda a: a[1] != "decorator_list", reversed(parents))
-        )[::-1]
-
-        def valid_deco_parents(parents):
-            # Call?,Attribute*
-            parents = list(parents)
-            if parents and parents[0] == ("Call", "func"):
-                parents.pop()
-            return all(p == ("Attribute", "value") for p in parents)
-
-        if valid_deco_parents(deco_parents) and child_name != "Name":
-            raise Invalid
+        if child_name != "Name":
+            raise Invalid("restricted-decorator")
 
     # type alias
     if py312plus:
-        if parents[-1] == ("TypeAlias", "name") and child_name != "Name":
-            raise Invalid
+        if context.last == ("TypeAlias", "name") and child_name != "Name":
+            raise Invalid("type-alias-name")
 
         if (
             child_name == "Lambda"
-            and inside("TypeAlias.value")
-            and inside("ClassDef.body")
+            and context.in_type_alias_value
+            and context.in_class
             and sys.version_info < (3, 13)
         ):
             # SyntaxError('Cannot use lambda in annotation scope within class scope')
-            raise Invalid
+            raise Invalid("lambda-in-class-annotation-scope")
 
-        if child_name in (
-            # "NamedExpr",
-            "Yield",
-            "YieldFrom",
-            "Await",
-            # "DictComp",
-            # "ListComp",
-            # "SetComp",
-        ) and inside(
-            (
-                "ClassDef.bases",
-                "ClassDef.keywords",
-                "FunctionDef.returns",
-                "AsyncFunctionDef.returns",
-                "arg.annotation",
-                "TypeAlias.value",
-                "TypeVar.bound",
+        if (
+            child_name
+            in (
+                # "NamedExpr",
+                "Yield",
+                "YieldFrom",
+                "Await",
+                # "DictComp",
+                # "ListComp",
+                # "SetComp",
             )
+            and context.in_annotation_scope
         ):
             # todo this should only be invalid in type scopes (when the class/def has type parameters)
             # and only for async comprehensions
-            raise Invalid
+            raise Invalid("yield-in-annotation-scope")
 
-        if child_name in ("NamedExpr",) and inside(
-            ("TypeAlias.value", "TypeVar.bound")
-        ):
+        if child_name in ("NamedExpr",) and context.in_type_value:
             # todo this should only be invalid in type scopes (when the class/def has type parameters)
             # and only for async comprehensions
-            raise Invalid
-
-        if child_name == "Await" and inside("AnnAssign.annotation"):
-            raise Invalid
+            raise Invalid("named-expr-in-type-value")
 
-        if sys.version_info < (3, 13):
-            type_alias_context = ("AsyncFunctionDef", "ClassDef")
-        else:
-            type_alias_context = ("AsyncFunctionDef",)
+        if child_name == "Await" and context.in_annassign_annotation:
+            raise Invalid("await-in-annotation")
 
         if (
-            inside(("TypeAlias", "AnnAssign.annotation"))
-            and inside(type_alias_context)
+            context.in_type_alias_or_annotation
+            and context.in_type_alias_context
             and child_name in comprehensions
         ):
-            raise Invalid
+            raise Invalid("comprehension-in-type-alias")
 
     if sys.version_info >= (3, 14):
-        if child_name == "NamedExpr" and inside(
-            (
-                "arg.annotation",
-                "FunctionDef.returns",
-                "AsyncFunctionDef.returns",
-            )
-        ):
-            raise Invalid
+        if child_name == "NamedExpr" and context.in_annotation:
+            raise Invalid("named-expr-in-annotation")
 
-        if not parent_types[-1] == "TemplateStr" and child_name == "Interpolation":
-            raise Invalid
+        if not context.parent_type == "TemplateStr" and child_name == "Interpolation":
+            raise Invalid("interpolation-outside-template-str")
 
-        if parents[-1] == ("TemplateStr", "values") and child_name not in (
+        if context.last == ("TemplateStr", "values") and child_name not in (
             "Interpolation",
             "Constant",
         ):
-            raise Invalid
+            raise Invalid("template-str-value")
 
         if (
-            parents[-1] == ("Interpolation", "format_spec")
+            context.last == ("Interpolation", "format_spec")
             and child_name != "JoinedStr"
         ):
-            raise Invalid
+            raise Invalid("interpolation-format-spec")
 
     if child_name == "Expr":
         return 30
 
-    if child_name == "NonLocal" and parents[-1] == ("Module", "body"):
-        raise Invalid
+    if child_name == "NonLocal" and context.last == ("Module", "body"):
+        raise Invalid("nonlocal-in-module")
 
     return 1
 
 
-def fix(node: ast.AST, parents: list[tuple[str, str]]):
+# the options which end the generation of a tree
+final_options = ("Name", "MatchValue", "Pass")
+
+
+def union_options(context: Context, union_name: str):
+    """
+    returns the decision table entry for the options of `union_name` in this context:
+
+    * the options with a probability > 0, their weights and cumulative weights
+    * the invalid options
+    * the option which should be used when the generation has to stop
+    """
+    try:
+        return context.unions[union_name]
+    except KeyError:
+        pass
+
+    info = get_info(union_name)
+    assert isinstance(info, UnionNodeType)
+
+    options_list = [(option, probability(context, option)) for option in info.options]
+
+    valid = [(option, prop) for option, prop in options_list if prop != 0]
+    options = tuple(option for option, _ in valid)
+    weights = tuple(prop for _, prop in valid)
+    cum_weights = tuple(itertools.accumulate(weights))
+    invalid = tuple(option for option, prop in options_list if prop == 0)
+    final = next((f for f in final_options if f in options), None)
+
+    result = context.unions[union_name] = (
+        options,
+        weights,
+        cum_weights,
+        invalid,
+        final,
+    )
+    return result
+
+
+# pattern matching
+
+
+def match_wildcard(node):
+    if isinstance(node, ast.MatchAs):
+        return node.pattern is None or match_wildcard(node.pattern) or node.name is None
+    if isinstance(node, ast.MatchOr):
+        return any(match_wildcard(p) for p in node.patterns)
+
+
+def ends_match(case_):
+    """
+    returns True if fix() removes all cases after `case_`
+    """
+    pattern = case_.pattern
+    return (
+        match_wildcard(pattern)
+        and case_.guard is None
+        or isinstance(pattern, ast.MatchAs)
+        and pattern.name is None
+    )
+
+
+def can_literal_eval(node):
+    try:
+        hash(ast.literal_eval(node))
+    except ValueError:
+        return False
+    return True
+
+
+def unique_keys(keys):
+    return unique_by([k for k in keys if can_literal_eval(k)], ast.literal_eval)
+
+
+# @lambda f:lambda pattern:set(f(pattern))
+def all_names(node):
+    if isinstance(node, ast.MatchAs) and node.name:
+        yield node.name
+    elif isinstance(node, ast.MatchStar) and node.name:
+        yield node.name
+    elif isinstance(node, ast.MatchMapping) and node.rest:
+        yield node.rest
+    elif isinstance(node, ast.MatchOr):
+        yield from set.intersection(
+            *[set(all_names(pattern)) for pattern in node.patterns]
+        )
+    else:
+        for child in ast.iter_child_nodes(node):
+            yield from all_names(child)
+
+
+class RemoveName(ast.NodeVisitor):
+    def __init__(self, condition):
+        self.condition = condition
+
+    def visit_MatchAs(self, node):
+        if self.condition(node.name):
+            node.name = None
+
+    def visit_MatchMapping(self, node):
+        if self.condition(node.rest):
+            node.rest = None
+
+
+class RemoveNameCleanup(ast.NodeTransformer):
+    def visit_MatchAs(self, node):
+        if node.name is None and node.pattern is not None:
+            return self.visit(node.pattern)
+        return self.generic_visit(node)
+
+
+class FixPatternNames(ast.NodeTransformer):
+    def __init__(self, used=None, allowed=None):
+        # variables which are already used
+        self.used = set() if used is None else used
+        # variables which are allowed in a MatchOr
+        self.allowed = allowed
+
+    def is_allowed(self, name):
+        return (
+            name is None
+            or name not in self.used
+            and (name in self.allowed if self.allowed is not None else True)
+        )
+
+    def visit_MatchAs(self, node):
+        if not self.is_allowed(node.name):
+            return ast.MatchSingleton(value=None)
+        elif node.name is not None:
+            self.used.add(node.name)
+        return self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if not self.is_allowed(node.name):
+            return ast.MatchSingleton(value=None)
+        elif node.name is not None:
+            self.used.add(node.name)
+        return self.generic_visit(node)
+
+    def visit_MatchMapping(self, node):
+        if not self.is_allowed(node.rest):
+            return ast.MatchSingleton(value=None)
+        elif node.rest is not None:
+            self.used.add(node.rest)
+        return self.generic_visit(node)
+
+    def visit_MatchOr(self, node):
+        allowed = set.intersection(
+            *[set(all_names(pattern)) for pattern in node.patterns]
+        )
+        allowed -= self.used
+
+        node.patterns = [
+            FixPatternNames(set(self.used), allowed).visit(child)
+            for child in node.patterns
+        ]
+
+        self.used |= allowed
+
+        return node
+
+
+class CleanupAnnotation(ast.NodeTransformer):
+    def visit_NamedExpr(self, node: ast.NamedExpr):
+        if not use():
+            return self.generic_visit(node)
+        return self.visit(node.value)
+
+    def visit_Yield(self, node: ast.Yield) -> Any:
+        if not use():
+            return self.generic_visit(node)
+        if node.value is None:
+            return ast.Constant(value=None)
+        return self.visit(node.value)
+
+    def visit_YieldFrom(self, node: ast.YieldFrom) -> Any:
+        if not use():
+            return self.generic_visit(node)
+        return self.visit(node.value)
+
+    # def visit_Lambda(self, node: ast.Lambda) -> Any:
+    #     if not use():
+    #         return self.generic_visit(node)
+    #     return self.visit(node.body)
+
+
+def cleanup_annotation(annotation):
+    return CleanupAnnotation().visit(annotation)
+
+
+store_parents = (
+    ("Assign", "targets"),
+    ("AnnAssign", "target"),
+    ("AugAssign", "target"),
+    ("NamedExpr", "target"),
+    ("TypeAlias", "name"),
+    ("For", "target"),
+    ("AsyncFor", "target"),
+    ("withitem", "optional_vars"),
+    ("comprehension", "target"),
+)
+
+
+def fix(node: ast.AST, context: Context):
     if isinstance(node, ast.ImportFrom):
         if use() and not py310plus and node.level is None:
             node.level = 0
@@ -492,7 +633,7 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
     if (
         sys.version_info < (3, 11)
         and isinstance(node, ast.Tuple)
-        and parents[-1] == ("Subscript", "slice")
+        and context.last == ("Subscript", "slice")
     ):
         # a[(a:b,*c)] <- not valid
         # TODO check this
@@ -526,11 +667,7 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
 
         if (
             use()
-            and parents
-            and (
-                parents[-1] == ("JoinedStr", "values")
-                or parents[-1] == ("TemplateStr", "values")
-            )
+            and context.last in (("JoinedStr", "values"), ("TemplateStr", "values"))
             and not isinstance(node.value, str)
         ):
             # TODO: better format string generation
@@ -543,27 +680,10 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
         if use() and node.conversion not in valid_conversion:
             node.conversion = valid_conversion[node.conversion % 4]
 
-    assign_context = [p for p in parents if p[0] not in ("Tuple", "List", "Starred")]
-
     if hasattr(node, "ctx"):
-        if use() and assign_context and assign_context[-1] == ("Delete", "targets"):
+        if use() and context.assign_parent == ("Delete", "targets"):
             node.ctx = ast.Del()
-        elif (
-            use()
-            and assign_context
-            and assign_context[-1]
-            in (
-                ("Assign", "targets"),
-                ("AnnAssign", "target"),
-                ("AugAssign", "target"),
-                ("NamedExpr", "target"),
-                ("TypeAlias", "name"),
-                ("For", "target"),
-                ("AsyncFor", "target"),
-                ("withitem", "optional_vars"),
-                ("comprehension", "target"),
-            )
-        ):
+        elif use() and context.assign_parent in store_parents:
             node.ctx = ast.Store()
         else:
             node.ctx = ast.Load()
@@ -598,15 +718,6 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
         arguments.kwonlyargs = arguments.kwonlyargs[:min_kw_size]
         arguments.kw_defaults = arguments.kw_defaults[:min_kw_size]
 
-    if use() and isinstance(node, ast.AsyncFunctionDef):
-        if any(
-            isinstance(n, (ast.Yield, ast.YieldFrom))
-            for n in walk_function_nodes(node.body)
-        ):
-            for n in walk_function_nodes(node.body):
-                if isinstance(n, ast.Return):
-                    n.value = None
-
     if use() and isinstance(node, (ast.ClassDef, ast.Call)):
         # unique argument names
         seen = set()
@@ -623,43 +734,8 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
         if use() and not node.handlers:
             node.orelse = []
 
-    if use() and isinstance(
-        node, (ast.GeneratorExp, ast.ListComp, ast.DictComp, ast.SetComp)
-    ):
-        # SyntaxError: assignment expression cannot rebind comprehension iteration variable 'name_3'
-        names = {
-            n.id
-            for c in node.generators
-            for n in ast.walk(c.target)
-            if isinstance(n, ast.Name)
-        } | {
-            n.id
-            for c in node.generators
-            for n in ast.walk(c.iter)
-            if isinstance(n, ast.Name)
-        }
-
-        class Transformer(ast.NodeTransformer):
-            def visit_NamedExpr(self, node: ast.NamedExpr):
-                if use() and node.target.id in names:
-                    return self.visit(node.value)
-                return self.generic_visit(node)
-
-        node = Transformer().visit(node)
-
     # pattern matching
     if sys.version_info >= (3, 10):
-
-        def match_wildcard(node):
-            if isinstance(node, ast.MatchAs):
-                return (
-                    node.pattern is None
-                    or match_wildcard(node.pattern)
-                    or node.name is None
-                )
-            if isinstance(node, ast.MatchOr):
-                return any(match_wildcard(p) for p in node.patterns)
-
         if isinstance(node, ast.Match):
             found = False
             new_last = None
@@ -694,105 +770,11 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
         ):
             return ast.MatchValue(value=ast.Constant(value=node.value))
 
-        # @lambda f:lambda pattern:set(f(pattern))
-        def all_names(node):
-            if isinstance(node, ast.MatchAs) and node.name:
-                yield node.name
-            elif isinstance(node, ast.MatchStar) and node.name:
-                yield node.name
-            elif isinstance(node, ast.MatchMapping) and node.rest:
-                yield node.rest
-            elif isinstance(node, ast.MatchOr):
-                yield from set.intersection(
-                    *[set(all_names(pattern)) for pattern in node.patterns]
-                )
-            else:
-                for child in ast.iter_child_nodes(node):
-                    yield from all_names(child)
-
-        class RemoveName(ast.NodeVisitor):
-            def __init__(self, condition):
-                self.condition = condition
-
-            def visit_MatchAs(self, node):
-                if self.condition(node.name):
-                    node.name = None
-
-            def visit_MatchMapping(self, node):
-                if self.condition(node.rest):
-                    node.rest = None
-
-        class RemoveNameCleanup(ast.NodeTransformer):
-            def visit_MatchAs(self, node):
-                if node.name is None and node.pattern is not None:
-                    return self.visit(node.pattern)
-                return self.generic_visit(node)
-
-        class FixPatternNames(ast.NodeTransformer):
-            def __init__(self, used=None, allowed=None):
-                # variables which are already used
-                self.used = set() if used is None else used
-                # variables which are allowed in a MatchOr
-                self.allowed = allowed
-
-            def is_allowed(self, name):
-                return (
-                    name is None
-                    or name not in self.used
-                    and (name in self.allowed if self.allowed is not None else True)
-                )
-
-            def visit_MatchAs(self, node):
-                if not self.is_allowed(node.name):
-                    return ast.MatchSingleton(value=None)
-                elif node.name is not None:
-                    self.used.add(node.name)
-                return self.generic_visit(node)
-
-            def visit_MatchStar(self, node):
-                if not self.is_allowed(node.name):
-                    return ast.MatchSingleton(value=None)
-                elif node.name is not None:
-                    self.used.add(node.name)
-                return self.generic_visit(node)
-
-            def visit_MatchMapping(self, node):
-                if not self.is_allowed(node.rest):
-                    return ast.MatchSingleton(value=None)
-                elif node.rest is not None:
-                    self.used.add(node.rest)
-                return self.generic_visit(node)
-
-            def visit_MatchOr(self, node: ast.MatchOr):
-                allowed = set.intersection(
-                    *[set(all_names(pattern)) for pattern in node.patterns]
-                )
-                allowed -= self.used
-
-                node.patterns = [
-                    FixPatternNames(set(self.used), allowed).visit(child)
-                    for child in node.patterns
-                ]
-
-                self.used |= allowed
-
-                return node
-
         if isinstance(node, ast.match_case):
             node.pattern = FixPatternNames().visit(node.pattern)
 
         if isinstance(node, ast.MatchMapping):
-
-            def can_literal_eval(node):
-                try:
-                    hash(ast.literal_eval(node))
-                except ValueError:
-                    return False
-                return True
-
-            node.keys = [k for k in node.keys if can_literal_eval(k)]
-
-            node.keys = unique_by(node.keys, ast.literal_eval)
+            node.keys = unique_keys(node.keys)
             del node.patterns[len(node.keys) :]
 
             seen = set()
@@ -847,41 +829,16 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
                 seen |= {*all_names(pattern)}
 
         if isinstance(node, ast.Match):
-            node = RemoveNameCleanup().visit(node)
+            for case in node.cases:
+                case.pattern = RemoveNameCleanup().visit(case.pattern)
 
     # async nodes
 
-    in_async_code = False
-    for parent, attr in reversed(parents):
-        if parent == "AsyncFunctionDef" and attr == "body":
-            in_async_code = True
-            break
-        if parent in ("FunctionDef", "Lambda", "ClassDef", "TypeAlias"):
-            break
-
-        if (parent, attr) in (
-            ("arg", "annotation"),
-            ("AsyncFunctionDef", "returns"),
-            ("TypeVar", "bound"),
-        ):
-            break
-
-        if not py311plus and parent in comprehensions:
-            break
-
     if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp)):
-        if use() and not in_async_code:
+        if use() and not context.in_async_function:
             for comp in node.generators:
                 comp.is_async = 0
 
-    in_excepthandler = False
-    for parent, _ in reversed(parents):
-        if parent == "ExceptHandler":
-            in_excepthandler = True
-            break
-        if parent in ("FunctionDef", "Lambda", "AsyncFunctionDef"):
-            break
-
     if isinstance(node, ast.Raise):
         if use() and not node.exc:
             node.cause = None
@@ -914,32 +871,6 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
         if use() and hasattr(node, "type_params"):
             node.type_params = unique_by(node.type_params, lambda p: p.name)
 
-        def cleanup_annotation(annotation):
-            class Transformer(ast.NodeTransformer):
-                def visit_NamedExpr(self, node: ast.NamedExpr):
-                    if not use():
-                        return self.generic_visit(node)
-                    return self.visit(node.value)
-
-                def visit_Yield(self, node: ast.Yield) -> Any:
-                    if not use():
-                        return self.generic_visit(node)
-                    if node.value is None:
-                        return ast.Constant(value=None)
-                    return self.visit(node.value)
-
-                def visit_YieldFrom(self, node: ast.YieldFrom) -> Any:
-                    if not use():
-                        return self.generic_visit(node)
-                    return self.visit(node.value)
-
-                # def visit_Lambda(self, node: ast.Lambda) -> Any:
-                #     if not use():
-                #         return self.generic_visit(node)
-                #     return self.visit(node.body)
-
-            return Transformer().visit(annotation)
-
         if (
             isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
             and node.type_params
@@ -963,14 +894,13 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
                 if use():
                     kw.value = cleanup_annotation(kw.value)
 
-            for n in ast.walk(node):
-                if use() and isinstance(n, ast.TypeAlias):
-                    n.value = cleanup_annotation(n.value)
-
-        if isinstance(node, ast.ClassDef):
-            for n in ast.walk(node):
-                if use() and isinstance(n, ast.TypeVar) and n.bound is not None:
-                    n.bound = cleanup_annotation(n.bound)
+        if (
+            use()
+            and isinstance(node, ast.TypeVar)
+            and node.bound is not None
+            and context.in_class_def
+        ):
+            node.bound = cleanup_annotation(node.bound)
 
         if use() and isinstance(node, ast.AnnAssign):
             node.annotation = cleanup_annotation(node.annotation)
@@ -996,7 +926,194 @@ def fix(node: ast.AST, parents: list[tuple[str, str]]):
     return node
 
 
-def fix_result(node):
+comprehension_types = (ast.GeneratorExp, ast.ListComp, ast.DictComp, ast.SetComp)
+
+
+def collect_comprehension_names(node, result):
+    """
+    stores the names which are used in the generators (target and iter)
+    of every comprehension inside `node` in `result[id(comprehension)]`.
+
+    Assignment expressions can not rebind these names and are removed by ScopeFixer.
+    The removal changes the names of the outer comprehensions,
+    which are therefore collected after the removal in the inner ones.
+
+    returns the counts of the names and of the targets of the assignment expressions
+    which are not removed by the comprehensions in `node`.
+    """
+    names: Counter[str] = Counter()
+    targets: Counter[str] = Counter()
+
+    def add(child):
+        child_names, child_targets = collect_comprehension_names(child, result)
+        names.update(child_names)
+        targets.update(child_targets)
+        return child_names
+
+    if isinstance(node, ast.Name):
+        names[node.id] += 1
+    elif isinstance(node, ast.NamedExpr):
+        targets[node.target.id] += 1
+
+    if isinstance(node, comprehension_types):
+        generator_names = set()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.comprehension):
+                for part in (child.target, child.iter):
+                    generator_names |= {n for n, c in add(part).items() if c}
+                for condition in child.ifs:
+                    add(condition)
+            else:
+                add(child)
+
+        if not use():
+            generator_names = set()
+
+        result[id(node)] = generator_names
+        for name in generator_names & targets.keys():
+            names[name] -= targets.pop(name)
+    else:
+        for child in ast.iter_child_nodes(node):
+            add(child)
+
+    return names, targets
+
+
+class AsyncFrame:
+    """
+    the nodes in the body of an async function which are not part of a nested function
+    """
+
+    def __init__(self):
+        self.has_yield = False
+        self.returns: list[ast.Return] = []
+
+
+class ScopeFixer(ast.NodeTransformer):
+    """
+    Rewrites which depend on the enclosing nodes and not only on the parents
+    of the node are done in one pass over the tree:
+
+    * `return` can not have a value in an async generator
+    * assignment expressions can not rebind the names of the comprehension generators
+    * type aliases in generic classes can not contain assignment expressions or yields
+    """
+
+    def __init__(self):
+        self.frame: AsyncFrame | None = None
+        self.generator_names: dict[int, set[str]] = {}
+        # names of the generators of all comprehensions around the node
+        self.rebind_names: set[str] = set()
+        self.in_generic_class = False
+        # the type aliases in a generic class inside the current function
+        # are cleaned up before the function is fixed
+        self.generic_class_in_frame = False
+        self.hidden_yields = False
+
+    def generic_visit(self, node):
+        for field in node._fields:
+            self.visit_field(node, field)
+        return node
+
+    def visit_field(self, node, field):
+        value = getattr(node, field, None)
+        if isinstance(value, list):
+            value[:] = [self.visit(v) if isinstance(v, ast.AST) else v for v in value]
+        elif isinstance(value, ast.AST):
+            setattr(node, field, self.visit(value))
+
+    def visit_function(self, node):
+        frame = self.frame
+        generic_class_in_frame = self.generic_class_in_frame
+
+        body_frame = AsyncFrame() if isinstance(node, ast.AsyncFunctionDef) else None
+        for field in node._fields:
+            if field == "body":
+                self.frame = body_frame
+                self.generic_class_in_frame = False
+            elif field == "type_params":
+                self.frame = None
+            else:
+                self.frame = frame
+                self.generic_class_in_frame = generic_class_in_frame
+            self.visit_field(node, field)
+
+        self.frame = frame
+        self.generic_class_in_frame = generic_class_in_frame
+
+        if use() and body_frame is not None and body_frame.has_yield:
+            for return_ in body_frame.returns:
+                return_.value = None
+
+        return node
+
+    visit_FunctionDef = visit_function
+    visit_AsyncFunctionDef = visit_function
+    visit_Lambda = visit_function
+
+    def visit_Return(self, node: ast.Return):
+        if self.frame is not None:
+            self.frame.returns.append(node)
+        return self.generic_visit(node)
+
+    def visit_yield(self, node):
+        if self.frame is not None and not self.hidden_yields:
+            self.frame.has_yield = True
+        return self.generic_visit(node)
+
+    visit_Yield = visit_yield
+    visit_YieldFrom = visit_yield
+
+    def visit_comprehension_type(self, node):
+        if id(node) not in self.generator_names:
+            collect_comprehension_names(node, self.generator_names)
+
+        rebind_names = self.rebind_names
+        self.rebind_names = rebind_names | self.generator_names[id(node)]
+        self.generic_visit(node)
+        self.rebind_names = rebind_names
+        return node
+
+    visit_GeneratorExp = visit_comprehension_type
+    visit_ListComp = visit_comprehension_type
+    visit_DictComp = visit_comprehension_type
+    visit_SetComp = visit_comprehension_type
+
+    def visit_NamedExpr(self, node: ast.NamedExpr):
+        # SyntaxError: assignment expression cannot rebind comprehension iteration variable 'name_3'
+        if use() and node.target.id in self.rebind_names:
+            return self.visit(node.value)
+        return self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if not getattr(node, "type_params", ()):
+            return self.generic_visit(node)
+
+        in_generic_class = self.in_generic_class
+        generic_class_in_frame = self.generic_class_in_frame
+        self.in_generic_class = self.generic_class_in_frame = True
+        self.generic_visit(node)
+        self.in_generic_class = in_generic_class
+        self.generic_class_in_frame = generic_class_in_frame
+        return node
+
+    def visit_TypeAlias(self, node):
+        if not self.in_generic_class:
+            return self.generic_visit(node)
+
+        hidden_yields = self.hidden_yields
+        self.hidden_yields = hidden_yields or self.generic_class_in_frame
+        self.generic_visit(node)
+        self.hidden_yields = hidden_yields
+
+        if use():
+            node.value = cleanup_annotation(node.value)
+        return node
+
+
+def fix_scopes(node):
+    node = ScopeFixer().visit(node)
+
     if sys.version_info >= (3, 14):
         for n in walk_childs_first(node):
             if use() and isinstance(n, ast.Interpolation):
@@ -1009,40 +1126,179 @@ def fix_result(node):
                 else:
                     n.str = ast.unparse(f_str)[3:-2]  # strip f"{...}"
 
-    return fix_nonlocal(node)
+    return node
+
+
+def fix_result(node):
+    return fix_nonlocal(fix_scopes(node))
+
+
+class Snapshot:
+    """
+    the field values of all nodes of a tree.
+
+    `is_valid_ast()` fixes the tree in place and restores it with the snapshot afterwards,
+    which is cheaper than fixing a deep copy of the tree.
+    """
+
+    def __init__(self, tree: ast.AST):
+        self.tree = tree
+        # id(node) -> (node, [(field, value, copy of the list items or None)])
+        self.fields: dict[int, tuple[ast.AST, list[tuple[str, Any, list | None]]]] = {}
+        for node in ast.walk(tree):
+            self.fields[id(node)] = (
+                node,
+                [
+                    (field, value, list(value) if isinstance(value, list) else None)
+                    for field, value in ast.iter_fields(node)
+                ],
+            )
+
+    def unchanged(self, tree: ast.AST) -> bool:
+        """
+        returns True if all nodes of `tree` still have the same children.
+        Nodes which were replaced with equal nodes are not detected, see `equal()`.
+        """
+        if tree is not self.tree:
+            return False
+        for node, values in self.fields.values():
+            for field, value, items in values:
+                current = getattr(node, field)
+                if items is None:
+                    # fix() creates a new ctx for every node
+                    if current is not value and (
+                        type(current) is not type(value)
+                        or not (
+                            current == value or isinstance(current, ast.expr_context)
+                        )
+                    ):
+                        return False
+                elif (
+                    type(current) is not list
+                    or len(current) != len(items)
+                    or any(a is not b for a, b in zip(current, items))
+                ):
+                    return False
+        return True
+
+    def equal(self, node, original, print=lambda *l: None, t="root") -> bool:
+        """
+        compares `node` with the snapshot of `original` like `equal_ast()`
+        """
+        if type(node) != type(original):
+            print(t, node, "!=", original)
+            return False
+
+        elif isinstance(node, list):
+            if len(node) != len(original):
+                print(t, node, "!=", original)
+                return False
+
+            return all(
+                self.equal(n, o, print, t + f"[{i}]")
+                for i, (n, o) in enumerate(zip(node, original))
+            )
+
+        elif isinstance(node, ast.AST):
+            return all(
+                self.equal(
+                    getattr(node, field),
+                    value if items is None else items,
+                    print,
+                    t + f".{field}",
+                )
+                for field, value, items in self.fields[id(original)][1]
+            )
+        else:
+            if node != original:
+                print(t, node, "!=", original)
+            return node == original
+
+    def restore(self):
+        for node, values in self.fields.values():
+            for field, value, items in values:
+                if items is not None:
+                    value[:] = items
+                setattr(node, field, value)
+
+
+@dataclass(frozen=True)
+class Rejection:
+    """
+    the reason why `validate_ast()` rejected a tree
+    """
+
+    # id of the check which rejected the node,
+    # like the rule in `probability_try()` or `handlers-length`
+    rule: str
+    # type of the rejected node
+    node: str
+    # `(node type, attribute)` pairs from the root to the node
+    parents: tuple[tuple[str, str], ...] = ()
+    # the first value which was changed by `fix()`, like `root.body[0].ctx`
+    changed: str = ""
+    # the rejected node, like `root.body[0].value`
+    path: str = ""
+    lineno: int | None = None
+
+    def __str__(self):
+        if self.changed:
+            return f"{self.rule}: {self.changed}"
+        line = "" if self.lineno is None else f", line {self.lineno}"
+        return f"{self.rule}: {self.node} at {self.path}{line}"
+
+
+def no_print(*args):
+    pass
 
 
-def is_valid_ast(tree, print=lambda *l: None) -> bool:
-    def is_valid(node: ast.AST, parents):
+def is_valid_ast(tree, print=no_print) -> bool:
+    return validate_ast(tree, print) is None
+
+
+def validate_ast(tree, print=no_print) -> Rejection | None:
+    """
+    returns why the tree can not be generated, or None if it can.
+
+    The check stops at the first rejected node.
+    """
+    rejection = None
+    # the path to the rejected node is collected while is_valid() returns
+    path: list[str] = []
+
+    def reject(rule: str, node, parents: Parents) -> bool:
+        nonlocal rejection
+        rejection = Rejection(
+            rule,
+            type(node).__name__,
+            tuple(parents),
+            lineno=getattr(node, "lineno", None),
+        )
+        return False
+
+    def is_valid(node: ast.AST, parents: Parents):
         type_name = node.__class__.__name__
         if (
             isinstance(node, (ast.AST))
             and parents
             and probability(
-                parents,
+                parents.context,
                 type_name,
             )
             == 0
         ):
+            rule = parents.context.rejections.get(type_name, "probability")
             print("invalid node with:")
             print("parents:", parents)
             print("node:", node)
+            print("rule:", rule)
 
-            try:
-                probability_try(
-                    parents,
-                    node.__class__.__name__,
-                )
-            except Invalid:
-                frame = traceback.extract_tb(sys.exc_info()[2])[1]
-                print("file:", f"{frame.filename}:{frame.lineno}")
-
-            return False
+            return reject(rule, node, parents)
 
         if type_name in same_length:
             attrs = same_length[type_name]
             if len({len(v) for k, v in ast.iter_fields(node) if k in attrs}) != 1:
-                return False
+                return reject("same-length", node, parents)
 
         if isinstance(node, (ast.AST)):
             info = get_info(type_name)
@@ -1059,96 +1315,109 @@ def is_valid_ast(tree, print=lambda *l: None) -> bool:
                                 f"{type(node).__name__}.{attr_name} {value} is not one type of {value_info.options}"
                             )
                             print("parents are:", parents)
-                            return False
+                            return reject(f"{attr_name}-type", node, parents)
 
                 if isinstance(value, list) and len(value) < min_attr_length(
                     type_name, attr_name
                 ):
                     print("invalid arg length", type_name, attr_name)
-                    return False
+                    return reject(f"{attr_name}-length", node, parents)
 
                 if isinstance(value, list) != ("*" in info.fields[attr_name][1]):
                     print(f"no list (info {info.fields[attr_name]})")
-                    return False
+                    return reject(f"{attr_name}-list", node, parents)
                 if value is None:
                     if not (
                         (
                             info.fields[attr_name][1] == "?"
-                            and none_allowed(parents + [(type_name, attr_name)])
+                            and none_allowed(parents.context.push(type_name, attr_name))
                         )
                         or info.fields[attr_name][0] == "constant"
                     ):
                         print("none not allowed", parents, type_name, attr_name)
-                        return False
+                        return reject(f"{attr_name}-none", node, parents)
 
             for field in node._fields:
                 value = getattr(node, field)
                 if isinstance(value, list):
-                    if not all(
-                        is_valid(e, parents + [(type_name, field)]) for e in value
-                    ):
-                        return False
+                    field_parents = parents.push(type_name, field)
+                    for i, e in enumerate(value):
+                        if not is_valid(e, field_parents):
+                            path.append(f".{field}[{i}]")
+                            return False
                 else:
-                    if not is_valid(value, parents + [(type_name, field)]):
+                    if not is_valid(value, parents.push(type_name, field)):
+                        path.append(f".{field}")
                         return False
         return True
 
-    if not is_valid(tree, []):
-        return False
+    if not is_valid(tree, Parents.root()):
+        assert rejection is not None
+        return replace(rejection, path="root" + "".join(reversed(path)))
 
-    def fix_tree(node: ast.AST, parents):
+    def fix_tree(node: ast.AST, parents: Parents):
         for field in node._fields:
             value = getattr(node, field)
+            field_parents = parents.push(node.__class__.__name__, field)
             if isinstance(value, ast.AST):
-                setattr(
-                    node,
-                    field,
-                    fix_tree(value, parents + [(node.__class__.__name__, field)]),
-                )
+                setattr(node, field, fix_tree(value, field_parents))
             if isinstance(value, list):
                 setattr(
                     node,
                     field,
                     [
-                        (
-                            fix_tree(v, parents + [(node.__class__.__name__, field)])
-                            if isinstance(v, ast.AST)
-                            else v
-                        )
+                        fix_tree(v, field_parents) if isinstance(v, ast.AST) else v
                         for v in value
                     ],
                 )
 
-        return fix(node, parents)
+        return fix(node, parents.context)
 
-    def check_if_changed(tree, tree_copy, operation):
-        result = equal_ast(tree_copy, tree, print)
+    def check_if_changed(fixed_tree, operation):
+        if snapshot.unchanged(fixed_tree):
+            return True
 
-        if sys.version_info >= (3, 9) and not result:
+        changes = []
+        result = snapshot.equal(fixed_tree, tree, lambda *l: changes.append(l))
+        for change in changes:
+            print(*change)
+
+        if print is not no_print and sys.version_info >= (3, 9) and not result:
+            dump_fixed = ast_dump(fixed_tree).splitlines()
+            snapshot.restore()
             dump = ast_dump(tree).splitlines()
-            dump_copy = ast_dump(tree_copy).splitlines()
             import difflib
 
             print(f"ast was changed while running {operation}:")
 
             print(
                 "\n".join(
-                    difflib.unified_diff(dump, dump_copy, "original", "fixed", n=10)
+                    difflib.unified_diff(dump, dump_fixed, "original", "fixed", n=10)
                 )
             )
+        if not result:
+            nonlocal rejection
+            rejection = Rejection(
+                operation.replace("_", "-"),
+                type(tree).__name__,
+                changed=changes[0][0] if changes else "",
+            )
         return result
 
-    tree_copy = deepcopy(tree)
-
-    tree_copy = fix_tree(tree_copy, [])
-    if not check_if_changed(tree, tree_copy, "fix_tree"):
-        return False
+    # the tree is fixed in place and restored afterwards
+    snapshot = Snapshot(tree)
+    try:
+        fixed_tree = fix_tree(tree, Parents.root())
+        if not check_if_changed(fixed_tree, "fix_tree"):
+            return rejection
 
-    tree_copy = fix_result(tree_copy)
-    if not check_if_changed(tree, tree_copy, "fix_result"):
-        return False
+        fixed_tree = fix_result(fixed_tree)
+        if not check_if_changed(fixed_tree, "fix_result"):
+            return rejection
+    finally:
+        snapshot.restore()
 
-    return True
+    return None
 
 
 def arguments(
@@ -1167,290 +1436,304 @@ def arguments(
     return [arg for arg in l if arg is not None]
 
 
-def fix_nonlocal(node):
-    class NonLocalFixer(ast.NodeTransformer):
-        """
-        removes invalid Nonlocals from the class/function
-        """
+class NonLocalFixer(ast.NodeTransformer):
+    """
+    removes invalid Nonlocals from the class/function
+    """
 
-        def __init__(self, locals, nonlocals, globals, type_params, parent_globals):
-            self.locals = set(locals)
-            self.used_names = set(locals)
-            self.type_params = set(type_params)
+    def __init__(self, locals, nonlocals, globals, type_params, parent_globals):
+        self.locals = set(locals)
+        self.used_names = set(locals)
+        self.type_params = set(type_params)
 
-            # nonlocals from the parent scope
-            self.nonlocals = set(nonlocals)
-            self.used_nonlocals = set()
+        # nonlocals from the parent scope
+        self.nonlocals = set(nonlocals)
+        self.used_nonlocals = set()
 
-            # globals from the global scope
-            self.globals = set(globals)
-            self.used_globals = set()
-            self.parent_globals = parent_globals
+        # globals from the global scope
+        self.globals = set(globals)
+        self.used_globals = set()
+        self.parent_globals = parent_globals
 
-        def name_assigned(self, name):
-            self.locals.add(name)
-            self.used_names.add(name)
+    def name_assigned(self, name):
+        self.locals.add(name)
+        self.used_names.add(name)
 
-        def visit_Name(self, node: ast.Name) -> Any:
-            if isinstance(node.ctx, (ast.Store, ast.Del)):
-                self.name_assigned(node.id)
-            else:
-                self.used_names.add(node.id)
-            return node
+    def visit_Name(self, node: ast.Name) -> Any:
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.name_assigned(node.id)
+        else:
+            self.used_names.add(node.id)
+        return node
 
-        if sys.version_info >= (3, 10):
+    if sys.version_info >= (3, 10):
 
-            def visit_MatchAs(self, node: ast.MatchAs) -> Any:
-                if node.pattern:
-                    self.visit(node.pattern)
-                self.name_assigned(node.name)
-                return node
+        def visit_MatchAs(self, node: ast.MatchAs) -> Any:
+            if node.pattern:
+                self.visit(node.pattern)
+            self.name_assigned(node.name)
+            return node
 
-        def search_walrus(self, node):
-            for n in ast.walk(node):
-                if isinstance(n, ast.NamedExpr):
-                    self.visit(n.target)
+    def search_walrus(self, node):
+        for n in ast.walk(node):
+            if isinstance(n, ast.NamedExpr):
+                self.visit(n.target)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> Any:
+        self.visit(node.generators[0].iter)
+        self.search_walrus(node)
+        return node
+
+    def visit_ListComp(self, node: ast.ListComp) -> Any:
+        self.visit(node.generators[0].iter)
+        self.search_walrus(node)
+        return node
+
+    def visit_DictComp(self, node: ast.DictComp) -> Any:
+        self.visit(node.generators[0].iter)
+        self.search_walrus(node)
+        return node
+
+    def visit_SetComp(self, node: ast.SetComp) -> Any:
+        self.visit(node.generators[0].iter)
+        self.search_walrus(node)
+        return node
+
+    def visit_Nonlocal(self, node: ast.Nonlocal) -> Any:
+        # TODO: research __class__ seems to be defined in the class scope
+        # but it is also not
+        # class A:
+        #     print(locals()) # no __class__
+        #     def f():
+        #         nonlocal __class__ # is A
+        node.names = [
+            name
+            for name in node.names
+            if name not in self.locals
+            and name in self.nonlocals
+            and name not in self.used_names
+            and name not in self.type_params
+            and name not in self.parent_globals
+            and name not in self.used_globals
+            or name in ("__class__",)
+        ]
+        self.used_nonlocals |= set(node.names)
 
-        def visit_GeneratorExp(self, node: ast.GeneratorExp) -> Any:
-            self.visit(node.generators[0].iter)
-            self.search_walrus(node)
-            return node
+        if not node.names:
+            return ast.Pass()
 
-        def visit_ListComp(self, node: ast.ListComp) -> Any:
-            self.visit(node.generators[0].iter)
-            self.search_walrus(node)
-            return node
+        return node
 
-        def visit_DictComp(self, node: ast.DictComp) -> Any:
-            self.visit(node.generators[0].iter)
-            self.search_walrus(node)
-            return node
+    def visit_Global(self, node: ast.Global) -> Any:
+        node.names = [
+            name
+            for name in node.names
+            if name not in self.locals
+            and name not in self.used_names
+            and name not in self.used_nonlocals
+        ]
+        self.used_globals |= set(node.names)
 
-        def visit_SetComp(self, node: ast.SetComp) -> Any:
-            self.visit(node.generators[0].iter)
-            self.search_walrus(node)
-            return node
+        if not node.names:
+            return ast.Pass()
+
+        return node
 
-        def visit_Nonlocal(self, node: ast.Nonlocal) -> Any:
-            # TODO: research __class__ seems to be defined in the class scope
-            # but it is also not
-            # class A:
-            #     print(locals()) # no __class__
-            #     def f():
-            #         nonlocal __class__ # is A
-            node.names = [
-                name
-                for name in node.names
-                if name not in self.locals
-                and name in self.nonlocals
-                and name not in self.used_names
-                and name not in self.type_params
-                and name not in self.parent_globals
-                and name not in self.used_globals
-                or name in ("__class__",)
-            ]
-            self.used_nonlocals |= set(node.names)
-
-            if not node.names:
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> Any:
+        if isinstance(node.target, ast.Name) and (
+            node.target.id in self.used_globals or node.target.id in self.used_nonlocals
+        ):
+            if node.value:
+                return self.generic_visit(
+                    ast.Assign(
+                        targets=[node.target], value=node.value, type_comment=None
+                    )
+                )
+            else:
                 return ast.Pass()
+        return self.generic_visit(node)
 
-            return node
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+        self.name_assigned(node.name)
 
-        def visit_Global(self, node: ast.Global) -> Any:
-            node.names = [
-                name
-                for name in node.names
-                if name not in self.locals
-                and name not in self.used_names
-                and name not in self.used_nonlocals
-            ]
-            self.used_globals |= set(node.names)
-
-            if not node.names:
-                return ast.Pass()
+        all_nodes = [
+            *node.args.defaults,
+            *node.args.kw_defaults,
+            *node.decorator_list,
+            node.returns,
+        ]
 
-            return node
+        all_nodes += [arg.annotation for arg in arguments(node)]
 
-        def visit_AnnAssign(self, node: ast.AnnAssign) -> Any:
-            if isinstance(node.target, ast.Name) and (
-                node.target.id in self.used_globals
-                or node.target.id in self.used_nonlocals
-            ):
-                if node.value:
-                    return self.generic_visit(
-                        ast.Assign(
-                            targets=[node.target], value=node.value, type_comment=None
-                        )
-                    )
-                else:
-                    return ast.Pass()
-            return self.generic_visit(node)
+        for default in all_nodes:
+            if default is not None:
+                self.visit(default)
 
-        def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
-            self.name_assigned(node.name)
+        return node
 
-            all_nodes = [
-                *node.args.defaults,
-                *node.args.kw_defaults,
-                *node.decorator_list,
-                node.returns,
-            ]
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
+        self.name_assigned(node.name)
 
-            all_nodes += [arg.annotation for arg in arguments(node)]
+        all_nodes = [
+            *node.args.defaults,
+            *node.args.kw_defaults,
+            *node.decorator_list,
+            node.returns,
+        ]
 
-            for default in all_nodes:
-                if default is not None:
-                    self.visit(default)
+        all_nodes += [arg.annotation for arg in arguments(node)]
 
-            return node
+        for default in all_nodes:
+            if default is not None:
+                self.visit(default)
+        return node
 
-        def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
-            self.name_assigned(node.name)
+    def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+        for expr in [
+            *[k.value for k in node.keywords],
+            *node.bases,
+            *node.decorator_list,
+        ]:
+            if expr is not None:
+                self.visit(expr)
 
-            all_nodes = [
-                *node.args.defaults,
-                *node.args.kw_defaults,
-                *node.decorator_list,
-                node.returns,
-            ]
+        self.name_assigned(node.name)
 
-            all_nodes += [arg.annotation for arg in arguments(node)]
+        return node
 
-            for default in all_nodes:
-                if default is not None:
-                    self.visit(default)
-            return node
+    # pattern matching
+    if sys.version_info >= (3, 10):
 
-        def visit_ClassDef(self, node: ast.ClassDef) -> Any:
-            for expr in [
-                *[k.value for k in node.keywords],
-                *node.bases,
-                *node.decorator_list,
-            ]:
-                if expr is not None:
-                    self.visit(expr)
+        def visit_MatchMapping(self, node: ast.MatchMapping) -> Any:
+            if node.rest is not None:
+                self.name_assigned(node.rest)
+            return self.generic_visit(node)
 
-            self.name_assigned(node.name)
+    if sys.version_info >= (3, 13):
 
-            return node
+        def visit_MatchStar(self, node: ast.MatchStar) -> Any:
+            self.name_assigned(node.name)
+            return self.generic_visit(node)
 
-        # pattern matching
-        if sys.version_info >= (3, 10):
+    def visit_ExceptHandler(self, handler):
+        if handler.name:
+            self.name_assigned(handler.name)
+        return self.generic_visit(handler)
 
-            def visit_MatchMapping(self, node: ast.MatchMapping) -> Any:
-                if node.rest is not None:
-                    self.name_assigned(node.rest)
-                return self.generic_visit(node)
+    def visit_Lambda(self, node: ast.Lambda) -> Any:
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                self.visit(default)
+        return node
 
-        if sys.version_info >= (3, 13):
+    if sys.version_info < (3, 13):
 
-            def visit_MatchStar(self, node: ast.MatchStar) -> Any:
-                self.name_assigned(node.name)
-                return self.generic_visit(node)
+        try_attrs = ("body", "orelse", "handlers", "finalbody")
 
-        def visit_ExceptHandler(self, handler):
-            if handler.name:
-                self.name_assigned(handler.name)
-            return self.generic_visit(handler)
+        def visit_Try(self, node: ast.Try) -> Any:
+            # work around for https://github.com/python/cpython/issues/111123
+            args = {
+                k: [self.visit(x) for x in getattr(node, k)] for k in self.try_attrs
+            }
 
-        def visit_Lambda(self, node: ast.Lambda) -> Any:
-            for default in [*node.args.defaults, *node.args.kw_defaults]:
-                if default is not None:
-                    self.visit(default)
-            return node
+            assert set(self.try_attrs) == set(ast.Try._fields)
 
-        if sys.version_info < (3, 13):
+            return ast.Try(**args)  # type: ignore
 
-            try_attrs = ("body", "orelse", "handlers", "finalbody")
+        if sys.version_info >= (3, 11):
 
-            def visit_Try(self, node: ast.Try) -> Any:
+            def visit_TryStar(self, node: ast.TryStar) -> Any:
                 # work around for https://github.com/python/cpython/issues/111123
                 args = {
                     k: [self.visit(x) for x in getattr(node, k)] for k in self.try_attrs
                 }
 
-                assert set(self.try_attrs) == set(ast.Try._fields)
+                assert set(self.try_attrs) == set(ast.TryStar._fields)
 
-                return ast.Try(**args)  # type: ignore
+                return ast.TryStar(**args)  # type: ignore
 
-            if sys.version_info >= (3, 11):
 
-                def visit_TryStar(self, node: ast.TryStar) -> Any:
-                    # work around for https://github.com/python/cpython/issues/111123
-                    args = {
-                        k: [self.visit(x) for x in getattr(node, k)]
-                        for k in self.try_attrs
-                    }
+class FunctionTransformer(ast.NodeTransformer):
+    """
+    - transformes a class/function
+    """
 
-                    assert set(self.try_attrs) == set(ast.TryStar._fields)
+    def __init__(self, nonlocals, globals, type_params, parent_globals):
+        self.nonlocals = set(nonlocals)
+        self.globals = set(globals)
+        self.type_params = type_params
+        self.parent_globals = parent_globals
 
-                    return ast.TryStar(**args)  # type: ignore
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+        return self.handle_function(node)
 
-    class FunctionTransformer(ast.NodeTransformer):
-        """
-        - transformes a class/function
-        """
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
+        return self.handle_function(node)
 
-        def __init__(self, nonlocals, globals, type_params, parent_globals):
-            self.nonlocals = set(nonlocals)
-            self.globals = set(globals)
-            self.type_params = type_params
-            self.parent_globals = parent_globals
+    def visit_Lambda(self, node: ast.Lambda) -> Any:
+        # there are no globals/nonlocals/functiondefs in lambdas
+        return node
 
-        def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
-            return self.handle_function(node)
+    def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+        type_params = set(self.type_params)
+        if sys.version_info >= (3, 12):
+            type_params |= {typ.name for typ in node.type_params}  # type: ignore
 
-        def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
-            return self.handle_function(node)
+        fixer = NonLocalFixer(
+            [], self.nonlocals, self.globals, type_params, self.parent_globals
+        )
+        node.body = [fixer.visit(stmt) for stmt in node.body]
 
-        def visit_Lambda(self, node: ast.Lambda) -> Any:
-            # there are no globals/nonlocals/functiondefs in lambdas
-            return node
+        ft = FunctionTransformer(
+            self.nonlocals, self.globals, type_params, self.parent_globals
+        )
+        node.body = [ft.visit(stmt) for stmt in node.body]
 
-        def visit_ClassDef(self, node: ast.ClassDef) -> Any:
-            type_params = set(self.type_params)
-            if sys.version_info >= (3, 12):
-                type_params |= {typ.name for typ in node.type_params}  # type: ignore
+        return node
 
-            fixer = NonLocalFixer(
-                [], self.nonlocals, self.globals, type_params, self.parent_globals
-            )
-            node.body = [fixer.visit(stmt) for stmt in node.body]
+    def handle_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> Any:
+        names = {arg.arg for arg in arguments(node)}
 
-            ft = FunctionTransformer(
-                self.nonlocals, self.globals, type_params, self.parent_globals
-            )
-            node.body = [ft.visit(stmt) for stmt in node.body]
+        type_params = set(self.type_params)
+        if sys.version_info >= (3, 12):
+            type_params |= {typ.name for typ in node.type_params}  # type: ignore
 
-            return node
+        fixer = NonLocalFixer(
+            names, self.nonlocals, self.globals, type_params, self.parent_globals
+        )
+        node.body = [fixer.visit(stmt) for stmt in node.body]
 
-        def handle_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> Any:
-            names = {arg.arg for arg in arguments(node)}
+        ft = FunctionTransformer(
+            fixer.locals | self.nonlocals,
+            self.globals,
+            type_params,
+            fixer.used_globals,
+        )
+        node.body = [ft.visit(stmt) for stmt in node.body]
 
-            type_params = set(self.type_params)
-            if sys.version_info >= (3, 12):
-                type_params |= {typ.name for typ in node.type_params}  # type: ignore
+        return node
 
-            fixer = NonLocalFixer(
-                names, self.nonlocals, self.globals, type_params, self.parent_globals
-            )
-            node.body = [fixer.visit(stmt) for stmt in node.body]
 
-            ft = FunctionTransformer(
-                fixer.locals | self.nonlocals,
-                self.globals,
-                type_params,
-                fixer.used_globals,
-            )
-            node.body = [ft.visit(stmt) for stmt in node.body]
+def fix_nonlocal(node):
+    node = NonLocalFixer([], [], [], [], []).visit(node)
+    return FunctionTransformer([], [], [], []).visit(node)
 
-            return node
 
-    fixer = NonLocalFixer([], [], [], [], [])
-    node = fixer.visit(node)
+class StatementFixer:
+    """
+    applies `fix_result()` to the top level statements of a module one after the other.
 
-    node = FunctionTransformer([], [], [], []).visit(node)
-    return node
+    The result is the same as `fix_result()` for the whole module,
+    the names of the module scope are collected from the previous statements.
+    """
+
+    def __init__(self):
+        self.nonlocal_fixer = NonLocalFixer([], [], [], [], [])
+
+    def fix(self, statement: ast.stmt) -> ast.stmt:
+        statement = fix_scopes(statement)
+        statement = self.nonlocal_fixer.visit(statement)
+        return FunctionTransformer([], [], [], []).visit(statement)
 
 
 def min_attr_length(node_type, attr_name):
@@ -1492,8 +1775,11 @@ def min_attr_length(node_type, attr_name):
     return 0
 
 
-def none_allowed(parents):
-    if parents[-2:] == [("TryStar", "handlers"), ("ExceptHandler", "type")]:
+def none_allowed(context: Context):
+    if (context.prev, context.last) == (
+        ("TryStar", "handlers"),
+        ("ExceptHandler", "type"),
+    ):
         return False
     return True
 
@@ -1506,23 +1792,278 @@ same_length = {
     "Dict": ["keys", "values"],
 }
 
+# The following tables describe lists where fix() would remove some of the elements.
+# The generator makes the same decision while the list is generated,
+# which avoids generating subtrees which are removed later.
+
+# the list ends with the first element which matches
+last_element = {
+    ("Match", "cases"): ends_match,
+    ("MatchOr", "patterns"): match_wildcard,
+}
+
+# duplicates are removed and the lists in `same_length` are shortened
+unique_elements = {
+    ("MatchMapping", "keys"): unique_keys,
+    ("MatchClass", "kwd_attrs"): lambda attrs: unique_by(attrs, lambda e: e),
+}
+
+identifiers = tuple(f"name_{i}" for i in range(6))
+
+
+def single_elements(name: str, context: Context) -> tuple[str, ...]:
+    """
+    returns the node types which are allowed only once in the elements of `name`
+    """
+    if name in ("List", "Tuple") and context.assign_parent in store_parents and use():
+        return ("Starred",)
+    if (
+        sys.version_info < (3, 11)
+        and name == "Tuple"
+        and context.last == ("Subscript", "slice")
+    ):
+        return ("Starred", "Slice")
+    return ()
+
 
 class AstGenerator:
-    def __init__(self, seed, node_limit, depth_limit):
-        self.rand = random.Random(seed)
+    def __init__(
+        self,
+        seed,
+        node_limit,
+        depth_limit,
+        stats: Stats | None = None,
+        rng_version: int = DEFAULT_RNG_VERSION,
+        coverage: Coverage | None = None,
+    ):
+        self.rng_version = rng_version
+        self.rand = entropy_source(seed, rng_version)
         self.nodes = 0
         self.node_limit = node_limit
         self.depth_limit = depth_limit
+        self.stats = stats
+        # the union options are biased towards less covered edges
+        self.adaptive = coverage if coverage is not None and coverage.adaptive else None
+        # the argument names of the `arguments` which are currently generated,
+        # None if the names are not unique
+        self.arg_names: list[set[str] | None] = []
+        # all nodes of the current tree, if stats are collected
+        self.generated: list[ast.AST] = []
+
+    def reset(self, seed):
+        """
+        prepare the generator for the next tree.
+        The result is the same as creating a new AstGenerator with this seed.
+        """
+        self.rand = entropy_source(seed, self.rng_version)
+        self.nodes = 0
+        self.arg_names = []
 
     def cnd(self):
-        return self.rand.choice([True, False])
+        return self.rand.bit() == 0
+
+    def generate(
+        self,
+        name: str,
+        context: Context | None = None,
+        depth=0,
+        *,
+        target_nodes: int | None = None,
+        target_bytes: int | None = None,
+    ):
+        """
+        generates a tree of type `name`.
+
+        A Module is generated statement by statement until it has about `target_nodes` nodes
+        or its source code is about `target_bytes` bytes long, if one of them is given.
+        """
+        if target_nodes is None and target_bytes is None:
+            generate_tree = lambda: self.generate_impl(name, context, depth)
+        elif name == "Module":
+            generate_tree = lambda: self.generate_module(target_nodes, target_bytes)
+        else:
+            raise ValueError(f"size targets are not supported for {name}")
+
+        stats = self.stats
+        if stats is None:
+            return fix_result(generate_tree())
+
+        self.generated = []
+        result = self.timed_generate(generate_tree)
+        result = timed(stats, "fix_result", fix_result, result)
+        stats.trees += 1
+        stats.count_wasted(self.generated, result)
+        self.generated = []
+        return result
+
+    def timed_generate(self, generate_tree: Callable[[], Any]):
+        """
+        returns `generate_tree()` and adds the time without `probability` and `fix` to the stats
+        """
+        assert self.stats is not None
+        times = self.stats.times
+        nested = times["probability"] + times["fix"]
+        start = time.perf_counter()
+        result = generate_tree()
+        end = time.perf_counter()
+        nested = times["probability"] + times["fix"] - nested
+        times["generate"] += end - start - nested
+        return result
 
-    def generate(self, name: str, parents=(), depth=0):
-        result = self.generate_impl(name, parents, depth)
-        result = fix_result(result)
+    def iter_fixed_statements(
+        self, target_nodes: int | None = None, target_bytes: int | None = None
+    ) -> Iterator[ast.stmt]:
+        """
+        like `iter_statements()`, but every statement is fixed like `fix_result()` would fix the module.
+        """
+        fixer = StatementFixer()
+        statements = self.iter_statements(target_nodes, target_bytes)
+
+        stats = self.stats
+        if stats is None:
+            for statement in statements:
+                yield fixer.fix(statement)
+            return
+
+        stats.trees += 1
+        while True:
+            self.generated = []
+            statement = self.timed_generate(lambda: next(statements, None))
+            if statement is None:
+                break
+            statement = timed(stats, "fix_result", fixer.fix, statement)
+            stats.count_wasted(self.generated, statement)
+            yield statement
+        self.generated = []
+
+    def generate_module(
+        self, target_nodes: int | None, target_bytes: int | None
+    ) -> ast.Module:
+        body = list(self.iter_statements(target_nodes, target_bytes))
+        result = ast.Module(body=body, type_ignores=[])
+        if self.stats is not None:
+            self.stats.nodes["Module"] += 1
+            self.generated.append(result)
+        return result
+
+    def iter_statements(
+        self, target_nodes: int | None = None, target_bytes: int | None = None
+    ) -> Iterator[ast.stmt]:
+        """
+        generates top level statements until they have together `target_nodes` nodes
+        or `target_bytes` bytes of source code.
+
+        Every statement is limited to the remaining size (and `node_limit`),
+        only the last statement can exceed the target a bit.
+        The statements are not fixed by `fix_result()`.
+        """
+        context = Context.root().push("Module", "body")
+        node_limit = self.node_limit
+        nodes = 0
+        size = 0
+
+        try:
+            while True:
+                remaining = []
+                if target_nodes is not None:
+                    remaining.append(target_nodes - nodes)
+                if target_bytes is not None:
+                    # estimated with the bytes per node of the previous statements
+                    bytes_per_node = size / nodes if nodes else 4
+                    remaining.append(int((target_bytes - size) / bytes_per_node))
+
+                budget = min(remaining)
+                if budget <= 0:
+                    return
+
+                self.nodes = 0
+                self.node_limit = min(node_limit, budget)
+                statement = self.generate_impl("stmt", context, 1)
+
+                statement_nodes = sum(1 for _ in ast.walk(statement))
+                if target_bytes is not None:
+                    fix_statement_locations(statement)
+                    try:
+                        size += len(unparse(statement).strip()) + 1
+                    except ValueError:
+                        # some f-strings can not be unparsed by older python versions
+                        size += int(statement_nodes * bytes_per_node)
+                nodes += statement_nodes
+
+                yield statement
+        finally:
+            self.node_limit = node_limit
+
+    def fix_with_stats(self, name: str, node: ast.AST, context: Context):
+        assert self.stats is not None
+        before = field_values(node)
+        start = time.perf_counter()
+        result = fix(node, context)
+        self.stats.times["fix"] += time.perf_counter() - start
+        self.stats.record_fix(name, before, node, result)
+        return result
+
+    def union_options_with_stats(self, context: Context, name: str):
+        assert self.stats is not None
+        if name in context.unions:
+            result = context.unions[name]
+        else:
+            start = time.perf_counter()
+            result = union_options(context, name)
+            self.stats.times["probability"] += time.perf_counter() - start
+        self.stats.rejected[name] += len(result[3])
         return result
 
-    def generate_impl(self, name: str, parents=(), depth=0):
+    def choice(self, options: tuple[str, ...], cum_weights: tuple[int, ...]) -> str:
+        """
+        the same as `random.choices(options, cum_weights=cum_weights)[0]`
+        without the list of the result
+        """
+        return options[
+            bisect(
+                cum_weights, self.rand.random() * cum_weights[-1], 0, len(options) - 1
+            )
+        ]
+
+    def free_arg_names(self) -> int:
+        used = self.arg_names[-1]
+        return len(identifiers) if used is None else len(identifiers) - len(used)
+
+    def arg_name(self) -> str:
+        used = self.arg_names[-1]
+        if used is None:
+            return f"name_{self.rand.below(6)}"
+        free = [n for n in identifiers if n not in used]
+        name = free[self.rand.below(len(free))]
+        used.add(name)
+        return name
+
+    def generate_list(self, name, attr, t, context, depth, length, single):
+        """
+        generates the elements of `name.attr`
+        and stops where fix() would remove the following elements
+        """
+        is_last = last_element.get((name, attr)) if use() else None
+        excluded: tuple[str, ...] = ()
+        result = []
+        for _ in range(length):
+            child = self.generate_impl(t, context, depth, excluded)
+            result.append(child)
+            if type(child).__name__ in single:
+                excluded = single
+            if is_last is not None and is_last(child):
+                break
+        return result
+
+    def generate_impl(
+        self,
+        name: str,
+        context: Context | None = None,
+        depth=0,
+        excluded: tuple[str, ...] = (),
+    ):
+        if context is None:
+            context = Context.root()
         depth += 1
         self.nodes += 1
 
@@ -1535,6 +2076,9 @@ class AstGenerator:
 
         if isinstance(info, NodeType):
             ranges = {}
+            single = single_elements(name, context)
+            if name == "arguments":
+                self.arg_names.append(set() if use() else None)
 
             def attr_length(child, attr_name):
                 if name == "Module":
@@ -1548,108 +2092,152 @@ class AstGenerator:
                 if child == "arguments" and attr_name == "defaults":
                     min = 0
                     max = attr_length(child, "posonlyargs") + attr_length(child, "args")
-                    ranges[attr_name] = self.rand.randint(min, max)
+                    ranges[attr_name] = min + self.rand.below(max - min + 1)
 
                 elif attr_name not in ranges:
                     min = min_attr_length(child, attr_name)
 
                     max = min if stop else min + 1 if depth > 10 else min + 5
-                    ranges[attr_name] = self.rand.randint(min, max)
+                    ranges[attr_name] = min + self.rand.below(max - min + 1)
+
+                    if child == "arguments":
+                        # there are not enough names for more unique arguments
+                        free = self.free_arg_names()
+                        if ranges[attr_name] > free:
+                            ranges[attr_name] = free
 
                 return ranges[attr_name]
 
-            def child_node(n, t, q, parents):
+            def child_node(n, t, q, context):
+                if n == "ctx":
+                    # fix() sets the ctx of every node
+                    return None
                 if q == "":
-                    return self.generate_impl(t, parents, depth)
+                    return self.generate_impl(t, context, depth)
                 elif q == "*":
-                    return [
-                        self.generate_impl(t, parents, depth)
-                        for _ in range(attr_length(parents[-1][0], n))
+                    length = attr_length(name, n)
+                    if single or ((name, n) in last_element and use()):
+                        return self.generate_list(
+                            name, n, t, context, depth, length, single
+                        )
+
+                    result = [
+                        self.generate_impl(t, context, depth) for _ in range(length)
                     ]
+                    if (name, n) in unique_elements and use():
+                        result = unique_elements[name, n](result)
+                        ranges[same_length[name][0]] = len(result)
+                    return result
                 elif q == "?":
+                    if name == "arguments" and not self.free_arg_names():
+                        return None
+                    if (
+                        n == "annotation"
+                        and name == "arg"
+                        and context.in_lambda_args
+                        and use()
+                    ):
+                        # lambda arguments have no annotations
+                        return None
                     return (
-                        self.generate_impl(t, parents, depth)
-                        if not none_allowed(parents) or self.cnd()
+                        self.generate_impl(t, context, depth)
+                        if not none_allowed(context) or self.cnd()
                         else None
                     )
                 elif q == "?*":
                     return [
                         (
-                            self.generate_impl(t, parents, depth)
-                            if not none_allowed(parents) or self.cnd()
+                            self.generate_impl(t, context, depth)
+                            if not none_allowed(context) or self.cnd()
                             else None
                         )
-                        for _ in range(attr_length(parents[-1][0], n))
+                        for _ in range(attr_length(name, n))
                     ]
 
                 else:
                     assert False, q
 
             attributes = {
-                n: child_node(n, t, q, [*parents, (name, n)])
+                n: child_node(n, t, q, context.push(name, n))
                 for n, (t, q) in info.fields.items()
             }
 
+            if name == "arguments":
+                self.arg_names.pop()
+
             result = info.ast_type(**attributes)
-            result = fix(result, parents)
+            if self.stats is None:
+                result = fix(result, context)
+            else:
+                self.stats.nodes[name] += 1
+                self.generated.append(result)
+                result = self.fix_with_stats(name, result, context)
             return result
 
         if isinstance(info, UnionNodeType):
-            options_list = [
-                (option, probability(parents, option)) for option in info.options
-            ]
+            if self.stats is None:
+                options, weights, cum_weights, invalid, final = union_options(
+                    context, name
+                )
+            else:
+                options, weights, cum_weights, invalid, final = (
+                    self.union_options_with_stats(context, name)
+                )
 
-            invalid_option = [
-                option for (option, prop) in options_list if prop == 0 and not use()
-            ]
+            invalid_option = [option for option in invalid if not use()]
 
             assert len(invalid_option) in (0, 1), invalid_option
 
             if len(invalid_option) == 1:
                 return self.generate_impl(invalid_option[0])
 
-            options = dict(options_list)
-            if stop:
-                for final in ("Name", "MatchValue", "Pass"):
-                    if options.get(final, 0) != 0:
-                        options = {final: 1}
-                        break
+            if excluded:
+                weights = tuple(
+                    w for o, w in zip(options, weights) if o not in excluded
+                )
+                options = tuple(o for o in options if o not in excluded)
+                cum_weights = tuple(itertools.accumulate(weights))
+
+            if self.adaptive is not None and context.last is not None and options:
+                cum_weights = self.adaptive.cum_weights(context, options, weights)
 
-            if sum(options.values()) == 0:
+            if stop and final is not None:
+                options, cum_weights = (final,), (1,)
+
+            if not options:
                 # TODO: better handling of `type?`
                 return None
 
-            return self.generate_impl(
-                self.rand.choices(*zip(*options.items()))[0], parents, depth
-            )
+            return self.generate_impl(self.choice(options, cum_weights), context, depth)
         if isinstance(info, BuiltinNodeType):
             if info.kind == "identifier":
-                return f"name_{self.rand.randint(0,5)}"
+                if context.last == ("arg", "arg") and self.arg_names:
+                    return self.arg_name()
+                return f"name_{self.rand.below(6)}"
             elif info.kind == "int":
-                return self.rand.randint(0, 5)
+                return self.rand.below(6)
             elif info.kind == "string":
-                return self.rand.choice(["some text", ""])
+                return ("some text", "")[self.rand.below(2)]
             elif info.kind == "constant":
-                return self.rand.choice(
-                    [
-                        None,
-                        b"some bytes",
-                        "some const text",
-                        b"",
-                        "",
-                        "'\"'''\"\"\"{}\\",
-                        b"'\"'''\"\"\"{}\\",
-                        b"\xef\xbb\xbf",  # utf-8
-                        b"\xff\xfe\0\0",  # utf-32
-                        b"\0\0\xfe\xff",  # utf-32be
-                        b"\xff\xfe",  # utf-16
-                        b"\xfe\xff",  # utf-16be
-                        self.rand.randint(0, 20),
-                        self.rand.uniform(0, 20),
-                        True,
-                        False,
-                    ]
-                )
+                constants = [
+                    None,
+                    b"some bytes",
+                    "some const text",
+                    b"",
+                    "",
+                    "'\"'''\"\"\"{}\\",
+                    b"'\"'''\"\"\"{}\\",
+                    b"\xef\xbb\xbf",  # utf-8
+                    b"\xff\xfe\0\0",  # utf-32
+                    b"\0\0\xfe\xff",  # utf-32be
+                    b"\xff\xfe",  # utf-16
+                    b"\xfe\xff",  # utf-16be
+                    self.rand.below(21),
+                    20 * self.rand.random(),
+                    True,
+                    False,
+                ]
+                return constants[self.rand.below(len(constants))]
 
             else:
                 assert False, "unknown kind: " + info.kind
@@ -1670,34 +2258,279 @@ def check(tree):
 
 
 def generate_ast(
-    seed: int,
+    seed: int | bytes,
     *,
     node_limit: int = 10000000,
     depth_limit: int = 8,
     root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    locations: bool = True,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
 ) -> ast.AST:
-    generator = AstGenerator(seed, depth_limit=depth_limit, node_limit=node_limit)
+    """
+    returns a random tree.
+
+    The locations of the nodes, which `compile()` needs, are only set if `locations` is True.
+    The tree for an int seed is only the same for the same `rng_version`,
+    rng version 1 makes the same kind of `random.Random` calls as pysource-codegen 0.7.
+    A bytes seed contains the decisions of the generator (see `BytesEntropy`),
+    which allows coverage-guided fuzzers to mutate the generated code.
+    """
+    generator = AstGenerator(
+        seed,
+        depth_limit=depth_limit,
+        node_limit=node_limit,
+        stats=stats,
+        rng_version=rng_version,
+        coverage=coverage,
+    )
 
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", SyntaxWarning)
-        tree = generator.generate(root_node)
-        check(tree)
-
-    ast.fix_missing_locations(tree)
+        tree = generator.generate(
+            root_node, target_nodes=target_nodes, target_bytes=target_bytes
+        )
+        timed(stats, "check", check, tree)
+
+    if locations:
+        timed(stats, "locations", ast.fix_missing_locations, tree)
+    if stats is not None:
+        stats.count_tree(tree)
+    if coverage is not None:
+        coverage.add_tree(tree)
     return tree
 
 
+def tree_source(tree: ast.AST, emit_source: bool, stats: Stats | None) -> str:
+    """
+    returns the source of a tree without locations
+    """
+    if emit_source:
+        return timed(stats, "unparse", emit, tree)
+    timed(stats, "locations", fix_statement_locations, tree)
+    return timed(stats, "unparse", unparse, tree)
+
+
+def statement_source(
+    statement: ast.stmt, first: bool, emit_source: bool, stats: Stats | None
+) -> str:
+    """
+    returns the source of a top level statement without locations
+    """
+    if emit_source:
+        return timed(stats, "unparse", emit_statement, statement, first)
+    timed(stats, "locations", fix_statement_locations, statement)
+    return timed(stats, "unparse", unparse_statement, statement, first)
+
+
 def generate(
-    seed: int,
+    seed: int | bytes,
     *,
     node_limit: int = 10000000,
     depth_limit: int = 8,
     root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    emit_source: bool = False,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
 ) -> str:
+    """
+    returns the source of a random program.
+
+    The source is written by `ast.unparse()`,
+    or by the faster `emit()` if `emit_source` is True,
+    which writes different source for the same tree.
+    """
     tree = generate_ast(
-        seed, node_limit=node_limit, depth_limit=depth_limit, root_node=root_node
+        seed,
+        node_limit=node_limit,
+        depth_limit=depth_limit,
+        root_node=root_node,
+        target_nodes=target_nodes,
+        target_bytes=target_bytes,
+        locations=False,
+        rng_version=rng_version,
+        stats=stats,
+        coverage=coverage,
+    )
+    return tree_source(tree, emit_source, stats)
+
+
+def write_module(
+    seed: int | bytes,
+    file: IO[str],
+    *,
+    node_limit: int = 10000000,
+    depth_limit: int = 8,
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    emit_source: bool = False,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
+) -> None:
+    """
+    writes the source of a large module to `file`.
+
+    The top level statements are generated, fixed and written one after the other,
+    the memory does not grow with the size of the module.
+    The written source is the same as `generate(seed, ...)` with the same targets
+    and `emit_source`, which ends with a newline.
+    """
+    if target_nodes is None and target_bytes is None:
+        raise ValueError("write_module() needs target_nodes or target_bytes")
+
+    generator = AstGenerator(
+        seed,
+        depth_limit=depth_limit,
+        node_limit=node_limit,
+        stats=stats,
+        rng_version=rng_version,
+        coverage=coverage,
+    )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", SyntaxWarning)
+        statements = generator.iter_fixed_statements(target_nodes, target_bytes)
+        for i, statement in enumerate(statements):
+            timed(stats, "check", check, statement)
+            if stats is not None:
+                stats.count_tree(statement)
+            if coverage is not None:
+                coverage.count_edges(statement, ("Module", "body"))
+            file.write(statement_source(statement, i == 0, emit_source, stats))
+
+    if coverage is not None:
+        coverage.finish_tree()
+    file.write("\n")
+
+
+def iter_generate_ast(
+    seeds: Iterable[int | bytes],
+    *,
+    node_limit: int = 10000000,
+    depth_limit: int = 8,
+    root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    batch_size: int = 32,
+    locations: bool = True,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
+) -> Iterator[ast.AST]:
+    """
+    generates one tree for every seed.
+
+    The result for every seed is the same as `generate_ast(seed, locations=locations)`,
+    but the generator and the warning filter are shared between the seeds
+    and the trees are produced `batch_size` seeds at a time.
+    """
+    generator = AstGenerator(
+        0,
+        depth_limit=depth_limit,
+        node_limit=node_limit,
+        stats=stats,
+        rng_version=rng_version,
+        coverage=coverage,
+    )
+    seed_iter = iter(seeds)
+
+    while True:
+        batch = list(itertools.islice(seed_iter, batch_size))
+        if not batch:
+            return
+
+        trees = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", SyntaxWarning)
+            for seed in batch:
+                generator.reset(seed)
+                tree = generator.generate(
+                    root_node, target_nodes=target_nodes, target_bytes=target_bytes
+                )
+                timed(stats, "check", check, tree)
+                if coverage is not None:
+                    # the next tree of the batch is biased with the counts of this one
+                    coverage.add_tree(tree)
+                trees.append(tree)
+
+        for tree in trees:
+            if locations:
+                timed(stats, "locations", ast.fix_missing_locations, tree)
+            if stats is not None:
+                stats.count_tree(tree)
+            yield tree
+
+
+def iter_generate(
+    seeds: Iterable[int | bytes],
+    *,
+    node_limit: int = 10000000,
+    depth_limit: int = 8,
+    root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    batch_size: int = 32,
+    emit_source: bool = False,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
+) -> Iterator[str]:
+    """
+    lazy version of `generate()` for many seeds, see `iter_generate_ast()`
+    """
+    for tree in iter_generate_ast(
+        seeds,
+        node_limit=node_limit,
+        depth_limit=depth_limit,
+        root_node=root_node,
+        target_nodes=target_nodes,
+        target_bytes=target_bytes,
+        batch_size=batch_size,
+        locations=False,
+        rng_version=rng_version,
+        stats=stats,
+        coverage=coverage,
+    ):
+        yield tree_source(tree, emit_source, stats)
+
+
+def generate_many(
+    seeds: Iterable[int | bytes],
+    *,
+    node_limit: int = 10000000,
+    depth_limit: int = 8,
+    root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    emit_source: bool = False,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
+) -> list[str]:
+    """
+    returns `[generate(seed) for seed in seeds]`
+    """
+    return list(
+        iter_generate(
+            seeds,
+            node_limit=node_limit,
+            depth_limit=depth_limit,
+            root_node=root_node,
+            target_nodes=target_nodes,
+            target_bytes=target_bytes,
+            emit_source=emit_source,
+            rng_version=rng_version,
+            stats=stats,
+            coverage=coverage,
+        )
     )
-    return unparse(tree)
 
 
 # next algo
@@ -1714,8 +2547,6 @@ def generate(
 # * node-context: function-scope async-scope type-scope class-scope ...
 # * names: nonlocal global
 
-from dataclasses import dataclass
-
 
 @dataclass
 class ParentRef:
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import sys
+
+from ._limits import f_string_limits
+
+comprehensions = ("GeneratorExp", "ListComp", "SetComp", "DictComp")
+
+if sys.version_info < (3, 13):
+    type_alias_context = ("AsyncFunctionDef", "ClassDef")
+else:
+    type_alias_context = ("AsyncFunctionDef",)
+
+# Every flag answers the question "is the node inside one of `types`?".
+# The parents are searched from the innermost to the outermost one
+# and the search stops at the first parent which matches `types` (True) or `not_types` (False).
+# A type can be a node type ("ClassDef") or a node attribute ("ClassDef.body").
+scope_flags: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "in_delete_target": (
+        ("Delete.targets",),
+        ("Subscript.value", "Subscript.slice", "Attribute.value"),
+    ),
+    "in_function": (
+        ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body"),
+        ("ClassDef.body",),
+    ),
+    "in_scope": (
+        ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body", "ClassDef.body"),
+        (),
+    ),
+    "in_finally": (
+        ("Try.finalbody", "TryStar.finalbody"),
+        ("FunctionDef.body", "AsyncFunctionDef.body"),
+    ),
+    "in_async": (
+        ("AsyncFunctionDef.body", "GeneratorExp.elt"),
+        ("FunctionDef.body", "Lambda.body", "ClassDef.body"),
+    ),
+    "in_async_function": (
+        ("AsyncFunctionDef.body",),
+        (
+            "FunctionDef",
+            "Lambda",
+            "ClassDef",
+            "TypeAlias",
+            "arg.annotation",
+            "AsyncFunctionDef.returns",
+            "TypeVar.bound",
+            *(comprehensions if sys.version_info < (3, 11) else ()),
+        ),
+    ),
+    "in_loop": (
+        ("For.body", "While.body", "AsyncFor.body"),
+        ("FunctionDef.body", "Lambda.body", "AsyncFunctionDef.body", "ClassDef.body"),
+    ),
+    "in_class_body": (
+        ("ClassDef.body",),
+        ("FunctionDef.body", "AsyncFunctionDef.body", "Lambda.body"),
+    ),
+    "in_class": (("ClassDef.body",), ()),
+    "in_class_def": (("ClassDef",), ()),
+    "in_lambda_args": (("Lambda.args",), ()),
+    "in_comprehension": (comprehensions, ()),
+    "in_annassign_target": (("AnnAssign.target",), ()),
+    "in_annassign_annotation": (("AnnAssign.annotation",), ()),
+    "in_trystar_handler": (("TryStar.handlers",), ()),
+    "in_match_value": (("MatchValue",), ()),
+    "in_match_value_value": (("MatchValue.value",), ()),
+    "in_match_class_cls": (("MatchClass.cls",), ()),
+    "in_attribute_value": (("Attribute.value",), ()),
+    "in_unaryop": (("UnaryOp",), ()),
+    "in_type_alias_value": (("TypeAlias.value",), ()),
+    "in_type_alias_or_annotation": (("TypeAlias", "AnnAssign.annotation"), ()),
+    "in_type_alias_context": (type_alias_context, ()),
+    "in_type_value": (("TypeAlias.value", "TypeVar.bound"), ()),
+    "in_annotation_scope": (
+        (
+            "ClassDef.bases",
+            "ClassDef.keywords",
+            "FunctionDef.returns",
+            "AsyncFunctionDef.returns",
+            "arg.annotation",
+            "TypeAlias.value",
+            "TypeVar.bound",
+        ),
+        (),
+    ),
+    "in_annotation": (
+        ("arg.annotation", "FunctionDef.returns", "AsyncFunctionDef.returns"),
+        (),
+    ),
+}
+
+flag_bits = {name: 1 << i for i, name in enumerate(scope_flags)}
+
+# states of a decorator expression (python < 3.9 allows only `@a.b.c` or `@a.b.c(...)`)
+NO_DECORATOR = 0
+DECORATOR_START = 1
+DECORATOR_CALL = 2
+DECORATOR_ATTRIBUTE = 3
+DECORATOR_EXPRESSION = 4
+
+assign_transparent = ("Tuple", "List", "Starred")
+
+
+def flag_masks(parent: str, attr: str) -> tuple[int, int]:
+    qual_parent = f"{parent}.{attr}"
+
+    def matches(types):
+        return any(qual_parent == t if "." in t else parent == t for t in types)
+
+    set_mask = 0
+    clear_mask = 0
+    for name, (types, not_types) in scope_flags.items():
+        if matches(types):
+            set_mask |= flag_bits[name]
+        elif matches(not_types):
+            clear_mask |= flag_bits[name]
+    return set_mask, clear_mask
+
+
+class Context:
+    """
+    The information about the parents of a node which is needed
+    to decide which nodes are valid at this position.
+
+    Contexts are immutable and interned. Equal contexts are the same object,
+    which allows to store the results of the rules in the context.
+    """
+
+    __slots__ = (
+        "key",
+        "flags",
+        "last",
+        "prev",
+        "format_spec_depth",
+        "formatted_value_depth",
+        "assign_parent",
+        "decorator",
+        "children",
+        "probabilities",
+        "rejections",
+        "unions",
+    )
+
+    # one property for every scope flag
+    in_delete_target: bool
+    in_function: bool
+    in_scope: bool
+    in_finally: bool
+    in_async: bool
+    in_async_function: bool
+    in_loop: bool
+    in_class_body: bool
+    in_class: bool
+    in_class_def: bool
+    in_lambda_args: bool
+    in_comprehension: bool
+    in_annassign_target: bool
+    in_annassign_annotation: bool
+    in_trystar_handler: bool
+    in_match_value: bool
+    in_match_value_value: bool
+    in_match_class_cls: bool
+    in_attribute_value: bool
+    in_unaryop: bool
+    in_type_alias_value: bool
+    in_type_alias_or_annotation: bool
+    in_type_alias_context: bool
+    in_type_value: bool
+    in_annotation_scope: bool
+    in_annotation: bool
+
+    _interned: dict[tuple, Context] = {}
+    _masks: dict[tuple[str, str], tuple[int, int]] = {}
+
+    def __init__(self, key):
+        self.key = key
+        (
+            self.flags,
+            self.last,
+            self.prev,
+            self.format_spec_depth,
+            self.formatted_value_depth,
+            self.assign_parent,
+            self.decorator,
+        ) = key
+
+        # cache for push()
+        self.children: dict[tuple[str, str], Context] = {}
+        # cache for the results of the rules, filled by _codegen
+        self.probabilities: dict[str, int] = {}
+        # the rule which rejected a node type
+        self.rejections: dict[str, str] = {}
+        self.unions: dict[str, tuple] = {}
+
+    @classmethod
+    def get(cls, key) -> Context:
+        try:
+            return cls._interned[key]
+        except KeyError:
+            context = cls._interned[key] = cls(key)
+            return context
+
+    @classmethod
+    def root(cls) -> Context:
+        return cls.get((0, None, None, 0, 0, None, NO_DECORATOR))
+
+    @classmethod
+    def from_parents(cls, parents) -> Context:
+        context = cls.root()
+        for parent, attr in parents:
+            context = context.push(parent, attr)
+        return context
+
+    @property
+    def parent_type(self) -> str | None:
+        return None if self.last is None else self.last[0]
+
+    def push(self, parent: str, attr: str) -> Context:
+        """
+        returns the context for the children in `parent.attr`
+        """
+        pair = (parent, attr)
+        try:
+            return self.children[pair]
+        except KeyError:
+            pass
+
+        try:
+            set_mask, clear_mask = self._masks[pair]
+        except KeyError:
+            set_mask, clear_mask = self._masks[pair] = flag_masks(parent, attr)
+
+        format_spec_depth = self.format_spec_depth
+        formatted_value_depth = self.formatted_value_depth
+        if pair == ("FormattedValue", "format_spec"):
+            format_spec_depth = min(
+                format_spec_depth + 1, f_string_limits().format_limit + 1
+            )
+        if pair == ("FormattedValue", "value"):
+            formatted_value_depth = min(
+                formatted_value_depth + 1, f_string_limits().expr_limit + 1
+            )
+
+        assign_parent = self.assign_parent if parent in assign_transparent else pair
+
+        decorator = self.decorator
+        if sys.version_info < (3, 9):
+            if attr == "decorator_list":
+                decorator = DECORATOR_START
+            elif decorator == DECORATOR_START and pair == ("Call", "func"):
+                decorator = DECORATOR_CALL
+            elif decorator in (DECORATOR_START, DECORATOR_ATTRIBUTE) and pair == (
+                "Attribute",
+                "value",
+            ):
+                decorator = DECORATOR_ATTRIBUTE
+            elif decorator != NO_DECORATOR:
+                decorator = DECORATOR_EXPRESSION
+
+        child = self.children[pair] = self.get(
+            (
+                (self.flags & ~clear_mask) | set_mask,
+                pair,
+                self.last,
+                format_spec_depth,
+                formatted_value_depth,
+                assign_parent,
+                decorator,
+            )
+        )
+        return child
+
+    def __repr__(self):
+        flags = [name for name, bit in flag_bits.items() if self.flags & bit]
+        return f"Context(last={self.last}, prev={self.prev}, flags={flags})"
+
+
+def flag_property(bit: int) -> property:
+    def get(context: Context) -> bool:
+        return bool(context.flags & bit)
+
+    return property(get)
+
+
+for _name, _bit in flag_bits.items():
+    setattr(Context, _name, flag_property(_bit))
+
+
+class Parents:
+    """
+    Persistent list of the `(node type, attribute)` pairs from the root to a node.
+
+    `push()` shares the existing pairs with the new list instead of copying them
+    and computes the Context of the new position.
+    """
+
+    __slots__ = ("tail", "entry", "length", "context")
+
+    tail: Parents | None
+    entry: tuple[str, str] | None
+    length: int
+    context: Context
+
+    def __init__(
+        self, tail: Parents | None, entry: tuple[str, str] | None, context: Context
+    ):
+        self.tail = tail
+        self.entry = entry
+        self.length = 0 if tail is None else tail.length + 1
+        self.context = context
+
+    @classmethod
+    def root(cls) -> Parents:
+        return cls(None, None, Context.root())
+
+    def push(self, parent: str, attr: str) -> Parents:
+        return Parents(self, (parent, attr), self.context.push(parent, attr))
+
+    @property
+    def last(self) -> tuple[str, str] | None:
+        return self.entry
+
+    def __len__(self):
+        return self.length
+
+    def __reversed__(self):
+        node = self
+        while node.entry is not None:
+            yield node.entry
+            node = node.tail  # type: ignore[assignment]
+
+    def __iter__(self):
+        return iter(list(reversed(self))[::-1])
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index < 0:
+            for i, entry in enumerate(reversed(self), start=1):
+                if i == -index:
+                    return entry
+            raise IndexError(index)
+        return list(self)[index]
+
+    def count(self, entry) -> int:
+        return sum(1 for e in reversed(self) if e == entry)
+
+    def __eq__(self, other):
+        if isinstance(other, Parents):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,340 @@
+"""
+coverage of the grammar by generated trees or existing source code.
+
+An edge is a `(parent type, field, child type)` triple, for example `("Try", "body", "Expr")`
+for an `Expr` statement in the body of a `Try`.
+A state is the combination of the scope flags of a `Context` and the type of a node in this context,
+for example an `Await` inside of an async function.
+"""
+
+from __future__ import annotations
+
+import ast
+import itertools
+import json
+import os
+import warnings
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from typing import IO
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from ._context import Context
+from ._context import flag_bits
+from .ast_info import get_info
+from .types import NodeType
+from .types import UnionNodeType
+
+Edge = Tuple[str, str, str]
+# (scope flags of the context, node type)
+State = Tuple[int, str]
+
+
+def node_types(name: str) -> Iterator[str]:
+    """
+    the node types which the grammar allows for a field of type `name`
+    """
+    info = get_info(name)
+    if isinstance(info, UnionNodeType):
+        for option in info.options:
+            yield from node_types(option)
+    elif isinstance(info, NodeType):
+        yield name
+
+
+@lru_cache(maxsize=None)
+def grammar_edges(root: str = "Module") -> frozenset[Edge]:
+    """
+    all edges of the grammar of the running python version which can be reached from `root`
+    """
+    edges = set()
+    seen = {root}
+    todo = [root]
+    while todo:
+        parent = todo.pop()
+        info = get_info(parent)
+        assert isinstance(info, NodeType)
+        for name, (field_type, _) in info.fields.items():
+            for child in node_types(field_type):
+                edges.add((parent, name, child))
+                if child not in seen:
+                    seen.add(child)
+                    todo.append(child)
+    return frozenset(edges)
+
+
+def edge_map(edges: Iterable[Edge]) -> dict[str, list[str]]:
+    result: dict[str, list[str]] = {}
+    for parent, name, child in sorted(edges):
+        result.setdefault(f"{parent}.{name}", []).append(child)
+    return result
+
+
+@dataclass
+class Coverage:
+    """
+    Opt-in edge coverage of the generated trees,
+    which can be passed to `generate()` and friends like `Stats`.
+
+    The coverage only measures the generated trees by default.
+    The generator prefers the options of a union which are part of less covered edges
+    if `adaptive` is True.
+    The code for a seed depends then on all trees which were generated before with the same object.
+    """
+
+    adaptive: bool = False
+    # number of trees
+    trees: int = 0
+    # how often every edge was generated
+    edges: Counter[Edge] = field(default_factory=Counter)
+    # how often every state was generated
+    states: Counter[State] = field(default_factory=Counter)
+    # `(trees, covered grammar edges)` after every `interval` trees
+    interval: int = 1000
+    history: List[Tuple[int, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        # biased cumulative weights per (context, options), valid until the counts change
+        self._cum_weights: dict[tuple, tuple[float, ...]] = {}
+
+    def __getstate__(self):
+        # the cache is not sent to the worker processes
+        state = self.__dict__.copy()
+        state["_cum_weights"] = {}
+        return state
+
+    def add_tree(self, tree: ast.AST):
+        self.count_edges(tree)
+        self.finish_tree()
+
+    def count_edges(self, tree: ast.AST, parent: tuple[str, str] | None = None):
+        """
+        counts the edges and states of `tree`,
+        and the edge from `parent` (type, field) to the tree
+        """
+        edges = self.edges
+        states = self.states
+
+        context = Context.root()
+        if parent is not None:
+            edges[parent + (type(tree).__name__,)] += 1
+            context = context.push(*parent)
+
+        # every node with the context in which the generator would create it
+        todo = [(tree, context)]
+        while todo:
+            node, context = todo.pop()
+            node_type = type(node).__name__
+            states[context.flags, node_type] += 1
+            for name, value in ast.iter_fields(node):
+                if isinstance(value, list):
+                    children = [child for child in value if isinstance(child, ast.AST)]
+                elif isinstance(value, ast.AST):
+                    children = [value]
+                else:
+                    continue
+                if children:
+                    child_context = context.push(node_type, name)
+                    for child in children:
+                        edges[node_type, name, type(child).__name__] += 1
+                        todo.append((child, child_context))
+
+        self._cum_weights.clear()
+
+    def finish_tree(self):
+        self.trees += 1
+        if self.trees % self.interval == 0:
+            self.history.append((self.trees, self.covered()))
+
+    def merge(self, other: Coverage):
+        """
+        adds the trees of `other`, which were generated after the trees of this object.
+
+        The edges of `other` are not known per tree,
+        every interval boundary which is crossed gets a history entry
+        with the edges covered after all trees of `other`.
+        """
+        before = self.trees // self.interval
+        self.trees += other.trees
+        self.edges.update(other.edges)
+        self.states.update(other.states)
+        self._cum_weights.clear()
+        after = self.trees // self.interval
+        if after > before:
+            covered = self.covered()
+            for boundary in range(before + 1, after + 1):
+                self.history.append((boundary * self.interval, covered))
+
+    def since(
+        self, trees: int, edges: Counter[Edge], states: Counter[State]
+    ) -> Coverage:
+        """
+        the coverage of the trees which were added after this object had
+        `trees`, `edges` and `states`
+        """
+        return Coverage(
+            adaptive=self.adaptive,
+            trees=self.trees - trees,
+            edges=self.edges - edges,
+            states=self.states - states,
+            interval=self.interval,
+        )
+
+    def cum_weights(
+        self, context: Context, options: tuple[str, ...], weights: tuple[int, ...]
+    ) -> tuple[float, ...]:
+        """
+        the cumulative weights of the options at the position `context.last`,
+        every weight is divided by the number of times the edge was generated plus one
+        """
+        key = (context, options)
+        try:
+            return self._cum_weights[key]
+        except KeyError:
+            pass
+
+        assert context.last is not None
+        parent, name = context.last
+        edges = self.edges
+        result = self._cum_weights[key] = tuple(
+            itertools.accumulate(
+                weight / (1 + edges[parent, name, option])
+                for option, weight in zip(options, weights)
+            )
+        )
+        return result
+
+    def covered(self) -> int:
+        """
+        the number of covered edges of the grammar
+        """
+        return len(grammar_edges() & self.edges.keys())
+
+    def uncovered(self, reference: Coverage | None = None) -> list[Edge]:
+        """
+        the edges of the grammar which are not covered,
+        only the edges which are covered by `reference` if it is given.
+
+        The grammar contains also edges which python does not allow,
+        for example an `Await` as target of an `AnnAssign`.
+        The coverage of existing code can be used as `reference` to find edges
+        which are possible but not generated.
+        """
+        edges = grammar_edges() if reference is None else reference.edges.keys()
+        return sorted(edges - self.edges.keys())
+
+    def flag_states(self) -> Counter[tuple[str, str]]:
+        """
+        how often every node type was generated inside of the scope of every flag,
+        for example `("in_async_function", "Await")`
+        """
+        result: Counter[tuple[str, str]] = Counter()
+        for (flags, name), count in self.states.items():
+            for flag, bit in flag_bits.items():
+                if flags & bit:
+                    result[flag, name] += count
+        return result
+
+    def report(self) -> str:
+        """
+        the covered grammar edges in total and after every `interval` trees
+        """
+        total = len(grammar_edges())
+        covered = self.covered()
+        lines = [
+            f"{covered} of {total} grammar edges ({covered / total:.1%}) "
+            f"and {len(self.states)} states covered by {self.trees} trees"
+        ]
+        if self.history:
+            lines.append(f"{'trees':>10} {'edges':>8} {'new':>6} {'covered':>8}")
+            covered = 0
+            for trees, edges in self.history:
+                lines.append(
+                    f"{trees:>10} {edges:>8} {edges - covered:>6} {edges / total:>8.1%}"
+                )
+                covered = edges
+        return "\n".join(lines)
+
+    def to_json(self) -> dict[str, Any]:
+        edges: dict[str, dict[str, int]] = {}
+        for (parent, name, child), count in sorted(self.edges.items()):
+            edges.setdefault(f"{parent}.{name}", {})[child] = count
+        states: dict[str, dict[str, int]] = {}
+        for (flag, name), count in sorted(self.flag_states().items()):
+            states.setdefault(flag, {})[name] = count
+        return {
+            "adaptive": self.adaptive,
+            "trees": self.trees,
+            "grammar_edges": len(grammar_edges()),
+            "covered": self.covered(),
+            "history": self.history,
+            "edges": edges,
+            "uncovered": edge_map(self.uncovered()),
+            "states": states,
+        }
+
+    def dump(self, fp: IO[str]):
+        json.dump(self.to_json(), fp, indent=2)
+        fp.write("\n")
+
+
+def _files_coverage(paths: list[str]) -> Coverage:
+    coverage = Coverage(adaptive=False)
+    for path in paths:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                tree = ast.parse(Path(path).read_bytes(), path)
+        except Exception:
+            # syntax errors, null bytes, unreadable files or code which is nested
+            # too deep for the parser
+            continue
+        coverage.add_tree(tree)
+    return coverage
+
+
+def files_coverage(
+    paths: Iterable[Path | str], *, jobs: int | None = None, chunk_size: int = 32
+) -> Coverage:
+    """
+    the coverage of the code in the files, measured with a pool of `jobs` worker processes.
+
+    Files which can not be read or parsed by the running python version
+    (for example code which is nested too deep) are skipped and not counted
+    in `Coverage.trees`.
+    """
+    path_iter = (str(path) for path in paths)
+
+    def chunks():
+        while chunk := list(itertools.islice(path_iter, chunk_size)):
+            yield chunk
+
+    coverage = Coverage(adaptive=False)
+    if jobs == 1:
+        for chunk in chunks():
+            coverage.merge(_files_coverage(chunk))
+        return coverage
+
+    # the process pool is only imported if it is used, `_codegen` imports this module
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context("spawn")) as pool:
+        for chunk_coverage in pool.map(_files_coverage, chunks()):
+            coverage.merge(chunk_coverage)
+    return coverage
+
+
+def directory_coverage(directory: Path | str, *, jobs: int | None = None) -> Coverage:
+    """
+    `files_coverage()` for all `*.py` files in `directory` and its subdirectories
+    """
+    return files_coverage(sorted(Path(directory).rglob("*.py")), jobs=jobs)
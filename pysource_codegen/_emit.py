@@ -0,0 +1,795 @@
+"""
+writes the source of a generated tree without `ast.unparse()`.
+
+The precedence rules are the same as in `ast.unparse()` (python 3.13),
+but the precedence is passed down as argument instead of storing it for every node
+and comments and docstring formatting are skipped.
+The emitted source parses to the same tree as `unparse(tree)`.
+f-strings are still written by `unparse()`.
+"""
+
+from __future__ import annotations
+
+import ast
+import sys
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from ._utils import unparse_expression
+
+NAMED_EXPR = 1
+TUPLE = 2
+YIELD = 3
+TEST = 4
+OR = 5
+AND = 6
+NOT = 7
+CMP = 8
+EXPR = BOR = 9
+BXOR = 10
+BAND = 11
+SHIFT = 12
+ARITH = 13
+TERM = 14
+FACTOR = 15
+POWER = 16
+AWAIT = 17
+ATOM = 18
+
+INFSTR = "1e" + repr(sys.float_info.max_10_exp + 1)
+
+unary_operators = {
+    ast.Invert: ("~", FACTOR),
+    ast.Not: ("not ", NOT),
+    ast.UAdd: ("+", FACTOR),
+    ast.USub: ("-", FACTOR),
+}
+
+binary_operators = {
+    ast.Add: (" + ", ARITH),
+    ast.Sub: (" - ", ARITH),
+    ast.Mult: (" * ", TERM),
+    ast.MatMult: (" @ ", TERM),
+    ast.Div: (" / ", TERM),
+    ast.Mod: (" % ", TERM),
+    ast.LShift: (" << ", SHIFT),
+    ast.RShift: (" >> ", SHIFT),
+    ast.BitOr: (" | ", BOR),
+    ast.BitXor: (" ^ ", BXOR),
+    ast.BitAnd: (" & ", BAND),
+    ast.FloorDiv: (" // ", TERM),
+    ast.Pow: (" ** ", POWER),
+}
+
+compare_operators = {
+    ast.Eq: " == ",
+    ast.NotEq: " != ",
+    ast.Lt: " < ",
+    ast.LtE: " <= ",
+    ast.Gt: " > ",
+    ast.GtE: " >= ",
+    ast.Is: " is ",
+    ast.IsNot: " is not ",
+    ast.In: " in ",
+    ast.NotIn: " not in ",
+}
+
+bool_operators = {ast.And: (" and ", AND), ast.Or: (" or ", OR)}
+
+# parentheses around a tuple with starred elements in a subscript are optional since 3.11
+starred_subscript = sys.version_info >= (3, 11)
+
+
+def constant_repr(value) -> str:
+    if isinstance(value, (float, complex)):
+        return repr(value).replace("inf", INFSTR).replace("nan", f"({INFSTR}-{INFSTR})")
+    return repr(value)
+
+
+class Emitter:
+    def __init__(self):
+        self.parts: List[str] = []
+        self.indent = ""
+        self.try_star = False
+
+    # writing
+
+    def fill(self, text: str):
+        if self.parts:
+            self.parts.append("\n")
+        self.parts.append(self.indent + text)
+
+    def block(self, body: list):
+        self.parts.append(":")
+        indent = self.indent
+        self.indent += "    "
+        for statement in body:
+            self.stmt(statement)
+        self.indent = indent
+
+    def join(self, nodes: list, precedence: int = TEST):
+        write = self.parts.append
+        for i, node in enumerate(nodes):
+            if i:
+                write(", ")
+            self.expr(node, precedence)
+
+    def items(self, nodes: list):
+        self.join(nodes)
+        if len(nodes) == 1:
+            self.parts.append(",")
+
+    # dispatch
+
+    def stmt(self, node: ast.stmt):
+        statement_emitters[type(node)](self, node)
+
+    def expr(self, node: ast.AST, precedence: int = TEST):
+        expression_emitters[type(node)](self, node, precedence)
+
+    # statements
+
+    def stmt_Expr(self, node):
+        self.fill("")
+        self.expr(node.value, YIELD)
+
+    def stmt_Assign(self, node):
+        self.fill("")
+        for target in node.targets:
+            self.expr(target, TUPLE)
+            self.parts.append(" = ")
+        self.expr(node.value)
+
+    def stmt_AugAssign(self, node):
+        self.fill("")
+        self.expr(node.target)
+        self.parts.append(binary_operators[type(node.op)][0][:-1] + "= ")
+        self.expr(node.value)
+
+    def stmt_AnnAssign(self, node):
+        self.fill("")
+        if not node.simple and isinstance(node.target, ast.Name):
+            self.parts.append("(" + node.target.id + ")")
+        else:
+            self.expr(node.target)
+        self.parts.append(": ")
+        self.expr(node.annotation)
+        if node.value:
+            self.parts.append(" = ")
+            self.expr(node.value)
+
+    def stmt_Return(self, node):
+        self.fill("return")
+        if node.value:
+            self.parts.append(" ")
+            self.expr(node.value)
+
+    def stmt_Pass(self, node):
+        self.fill("pass")
+
+    def stmt_Break(self, node):
+        self.fill("break")
+
+    def stmt_Continue(self, node):
+        self.fill("continue")
+
+    def stmt_Delete(self, node):
+        self.fill("del ")
+        self.join(node.targets)
+
+    def stmt_Assert(self, node):
+        self.fill("assert ")
+        self.expr(node.test)
+        if node.msg:
+            self.parts.append(", ")
+            self.expr(node.msg)
+
+    def stmt_Global(self, node):
+        self.fill("global " + ", ".join(node.names))
+
+    def stmt_Nonlocal(self, node):
+        self.fill("nonlocal " + ", ".join(node.names))
+
+    def stmt_Import(self, node):
+        self.fill("import ")
+        self.aliases(node.names)
+
+    def stmt_ImportFrom(self, node):
+        self.fill("from " + "." * (node.level or 0) + (node.module or "") + " import ")
+        self.aliases(node.names)
+
+    def aliases(self, names):
+        self.parts.append(
+            ", ".join(
+                alias.name + " as " + alias.asname if alias.asname else alias.name
+                for alias in names
+            )
+        )
+
+    def stmt_Raise(self, node):
+        self.fill("raise")
+        if node.exc:
+            self.parts.append(" ")
+            self.expr(node.exc)
+            if node.cause:
+                self.parts.append(" from ")
+                self.expr(node.cause)
+
+    def stmt_Try(self, node):
+        try_star = self.try_star
+        self.try_star = isinstance(node, TryStar)
+        self.fill("try")
+        self.block(node.body)
+        for handler in node.handlers:
+            self.fill("except*" if self.try_star else "except")
+            if handler.type:
+                self.parts.append(" ")
+                self.expr(handler.type)
+            if handler.name:
+                self.parts.append(" as " + handler.name)
+            self.block(handler.body)
+        self.orelse(node.orelse)
+        if node.finalbody:
+            self.fill("finally")
+            self.block(node.finalbody)
+        self.try_star = try_star
+
+    stmt_TryStar = stmt_Try
+
+    def orelse(self, orelse):
+        if orelse:
+            self.fill("else")
+            self.block(orelse)
+
+    def decorators(self, node):
+        if self.parts:
+            self.parts.append("\n")
+        for decorator in node.decorator_list:
+            self.fill("@")
+            self.expr(decorator)
+
+    def type_params(self, node):
+        type_params = getattr(node, "type_params", None)
+        if type_params:
+            self.parts.append("[")
+            self.join(type_params)
+            self.parts.append("]")
+
+    def stmt_ClassDef(self, node):
+        self.decorators(node)
+        self.fill("class " + node.name)
+        self.type_params(node)
+        if node.bases or node.keywords:
+            self.parts.append("(")
+            self.join(node.bases + node.keywords)
+            self.parts.append(")")
+        self.block(node.body)
+
+    def stmt_FunctionDef(self, node):
+        self.decorators(node)
+        self.fill(
+            ("async def " if isinstance(node, ast.AsyncFunctionDef) else "def ")
+            + node.name
+        )
+        self.type_params(node)
+        self.parts.append("(")
+        self.arguments(node.args)
+        self.parts.append(")")
+        if node.returns:
+            self.parts.append(" -> ")
+            self.expr(node.returns)
+        self.block(node.body)
+
+    stmt_AsyncFunctionDef = stmt_FunctionDef
+
+    def stmt_TypeAlias(self, node):
+        self.fill("type ")
+        self.expr(node.name)
+        self.type_params(node)
+        self.parts.append(" = ")
+        self.expr(node.value)
+
+    def stmt_For(self, node):
+        self.fill("async for " if isinstance(node, ast.AsyncFor) else "for ")
+        self.expr(node.target, TUPLE)
+        self.parts.append(" in ")
+        self.expr(node.iter)
+        self.block(node.body)
+        self.orelse(node.orelse)
+
+    stmt_AsyncFor = stmt_For
+
+    def stmt_If(self, node):
+        self.fill("if ")
+        self.expr(node.test)
+        self.block(node.body)
+        # nested ifs are written as elif
+        while (
+            node.orelse and len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If)
+        ):
+            node = node.orelse[0]
+            self.fill("elif ")
+            self.expr(node.test)
+            self.block(node.body)
+        self.orelse(node.orelse)
+
+    def stmt_While(self, node):
+        self.fill("while ")
+        self.expr(node.test)
+        self.block(node.body)
+        self.orelse(node.orelse)
+
+    def stmt_With(self, node):
+        self.fill("async with " if isinstance(node, ast.AsyncWith) else "with ")
+        for i, item in enumerate(node.items):
+            if i:
+                self.parts.append(", ")
+            self.expr(item.context_expr)
+            if item.optional_vars:
+                self.parts.append(" as ")
+                self.expr(item.optional_vars)
+        self.block(node.body)
+
+    stmt_AsyncWith = stmt_With
+
+    def stmt_Match(self, node):
+        self.fill("match ")
+        self.expr(node.subject)
+        self.parts.append(":")
+        indent = self.indent
+        self.indent += "    "
+        for case in node.cases:
+            self.fill("case ")
+            self.expr(case.pattern)
+            if case.guard:
+                self.parts.append(" if ")
+                self.expr(case.guard)
+            self.block(case.body)
+        self.indent = indent
+
+    # expressions
+
+    def expr_Name(self, node, precedence):
+        self.parts.append(node.id)
+
+    def expr_Constant(self, node, precedence):
+        value = node.value
+        if isinstance(value, tuple):
+            self.parts.append("(")
+            self.parts.append(", ".join(map(constant_repr, value)))
+            self.parts.append(",)" if len(value) == 1 else ")")
+        elif value is ...:
+            self.parts.append("...")
+        else:
+            if node.kind == "u":
+                self.parts.append("u")
+            self.parts.append(constant_repr(value))
+
+    def expr_JoinedStr(self, node, precedence):
+        self.parts.append(unparse_expression(node))
+
+    expr_TemplateStr = expr_JoinedStr
+
+    def expr_NamedExpr(self, node, precedence):
+        write = self.parts.append
+        if precedence > NAMED_EXPR:
+            write("(")
+        self.expr(node.target, ATOM)
+        write(" := ")
+        self.expr(node.value, ATOM)
+        if precedence > NAMED_EXPR:
+            write(")")
+
+    def expr_Await(self, node, precedence):
+        self.prefix("await ", AWAIT, node.value, precedence)
+
+    def expr_Yield(self, node, precedence):
+        if node.value:
+            self.prefix("yield ", YIELD, node.value, precedence)
+        else:
+            self.parts.append("(yield)" if precedence > YIELD else "yield")
+
+    def expr_YieldFrom(self, node, precedence):
+        self.prefix("yield from ", YIELD, node.value, precedence)
+
+    def prefix(self, text, operator_precedence, value, precedence):
+        # the operand of await and yield is always an atom
+        write = self.parts.append
+        if precedence > operator_precedence:
+            write("(")
+        write(text)
+        self.expr(value, ATOM)
+        if precedence > operator_precedence:
+            write(")")
+
+    def expr_List(self, node, precedence):
+        self.parts.append("[")
+        self.join(node.elts)
+        self.parts.append("]")
+
+    def expr_Set(self, node, precedence):
+        if node.elts:
+            self.parts.append("{")
+            self.join(node.elts)
+            self.parts.append("}")
+        else:
+            # `{}` is a dict
+            self.parts.append("{*()}")
+
+    def expr_Tuple(self, node, precedence):
+        parentheses = not node.elts or precedence > TUPLE
+        if parentheses:
+            self.parts.append("(")
+        self.items(node.elts)
+        if parentheses:
+            self.parts.append(")")
+
+    def expr_Dict(self, node, precedence):
+        write = self.parts.append
+        write("{")
+        for i, (key, value) in enumerate(zip(node.keys, node.values)):
+            if i:
+                write(", ")
+            if key is None:
+                write("**")
+                self.expr(value, EXPR)
+            else:
+                self.expr(key)
+                write(": ")
+                self.expr(value)
+        write("}")
+
+    def comprehension(self, start, node, end):
+        self.parts.append(start)
+        if isinstance(node, ast.DictComp):
+            self.expr(node.key)
+            self.parts.append(": ")
+            self.expr(node.value)
+        else:
+            self.expr(node.elt)
+        for generator in node.generators:
+            self.parts.append(" async for " if generator.is_async else " for ")
+            self.expr(generator.target, TUPLE)
+            self.parts.append(" in ")
+            self.expr(generator.iter, OR)
+            for condition in generator.ifs:
+                self.parts.append(" if ")
+                self.expr(condition, OR)
+        self.parts.append(end)
+
+    def expr_ListComp(self, node, precedence):
+        self.comprehension("[", node, "]")
+
+    def expr_GeneratorExp(self, node, precedence):
+        self.comprehension("(", node, ")")
+
+    def expr_SetComp(self, node, precedence):
+        self.comprehension("{", node, "}")
+
+    expr_DictComp = expr_SetComp
+
+    def expr_IfExp(self, node, precedence):
+        write = self.parts.append
+        if precedence > TEST:
+            write("(")
+        self.expr(node.body, OR)
+        write(" if ")
+        self.expr(node.test, OR)
+        write(" else ")
+        self.expr(node.orelse, TEST)
+        if precedence > TEST:
+            write(")")
+
+    def expr_UnaryOp(self, node, precedence):
+        operator, operator_precedence = unary_operators[type(node.op)]
+        write = self.parts.append
+        if precedence > operator_precedence:
+            write("(")
+        write(operator)
+        self.expr(node.operand, operator_precedence)
+        if precedence > operator_precedence:
+            write(")")
+
+    def expr_BinOp(self, node, precedence):
+        operator, operator_precedence = binary_operators[type(node.op)]
+        write = self.parts.append
+        if precedence > operator_precedence:
+            write("(")
+        # ** is right associative
+        right_associative = operator_precedence == POWER
+        self.expr(node.left, operator_precedence + right_associative)
+        write(operator)
+        self.expr(node.right, operator_precedence + (not right_associative))
+        if precedence > operator_precedence:
+            write(")")
+
+    def expr_Compare(self, node, precedence):
+        write = self.parts.append
+        if precedence > CMP:
+            write("(")
+        self.expr(node.left, CMP + 1)
+        for operator, comparator in zip(node.ops, node.comparators):
+            write(compare_operators[type(operator)])
+            self.expr(comparator, CMP + 1)
+        if precedence > CMP:
+            write(")")
+
+    def expr_BoolOp(self, node, precedence):
+        operator, operator_precedence = bool_operators[type(node.op)]
+        write = self.parts.append
+        if precedence > operator_precedence:
+            write("(")
+        # every operand binds one level stronger than the previous one,
+        # which puts parentheses around nested boolean operations
+        for i, value in enumerate(node.values):
+            if i:
+                write(operator)
+            self.expr(value, min(operator_precedence + 1 + i, ATOM))
+        if precedence > operator_precedence:
+            write(")")
+
+    def expr_Attribute(self, node, precedence):
+        value = node.value
+        self.expr(value, ATOM)
+        # `3.real` is a syntax error
+        if isinstance(value, ast.Constant) and isinstance(value.value, int):
+            self.parts.append(" ")
+        self.parts.append("." + node.attr)
+
+    def expr_Call(self, node, precedence):
+        self.expr(node.func, ATOM)
+        self.parts.append("(")
+        self.join(node.args + node.keywords)
+        self.parts.append(")")
+
+    def expr_keyword(self, node, precedence):
+        self.parts.append("**" if node.arg is None else node.arg + "=")
+        self.expr(node.value)
+
+    def expr_Subscript(self, node, precedence):
+        self.expr(node.value, ATOM)
+        self.parts.append("[")
+        self.slice(node.slice)
+        self.parts.append("]")
+
+    def slice(self, node):
+        # the parentheses of a tuple can be omitted
+        if (
+            isinstance(node, ast.Tuple)
+            and node.elts
+            and (
+                starred_subscript
+                or not any(isinstance(e, ast.Starred) for e in node.elts)
+            )
+        ):
+            self.items(node.elts)
+        else:
+            self.expr(node)
+
+    def expr_Starred(self, node, precedence):
+        self.parts.append("*")
+        self.expr(node.value, EXPR)
+
+    def expr_Slice(self, node, precedence):
+        if node.lower:
+            self.expr(node.lower)
+        self.parts.append(":")
+        if node.upper:
+            self.expr(node.upper)
+        if node.step:
+            self.parts.append(":")
+            self.expr(node.step)
+
+    if sys.version_info < (3, 9):
+
+        def expr_Index(self, node, precedence):
+            self.slice(node.value)
+
+        def expr_ExtSlice(self, node, precedence):
+            # astunparse writes no trailing comma for a single dimension
+            self.join(node.dims)
+
+    def expr_Lambda(self, node, precedence):
+        write = self.parts.append
+        if precedence > TEST:
+            write("(")
+        write("lambda")
+        args = node.args
+        if (
+            args.posonlyargs
+            or args.args
+            or args.vararg
+            or args.kwonlyargs
+            or args.kwarg
+        ):
+            write(" ")
+            self.arguments(args)
+        write(": ")
+        self.expr(node.body, TEST)
+        if precedence > TEST:
+            write(")")
+
+    def arguments(self, node):
+        write = self.parts.append
+        first = True
+
+        positional = node.posonlyargs + node.args
+        defaults = [None] * (len(positional) - len(node.defaults)) + node.defaults
+        for index, (arg, default) in enumerate(zip(positional, defaults), 1):
+            if first:
+                first = False
+            else:
+                write(", ")
+            self.arg(arg)
+            if default:
+                write("=")
+                self.expr(default)
+            if index == len(node.posonlyargs):
+                write(", /")
+
+        if node.vararg or node.kwonlyargs:
+            if first:
+                first = False
+            else:
+                write(", ")
+            write("*")
+            if node.vararg:
+                self.arg(node.vararg)
+
+        for arg, default in zip(node.kwonlyargs, node.kw_defaults):
+            write(", ")
+            self.arg(arg)
+            if default:
+                write("=")
+                self.expr(default)
+
+        if node.kwarg:
+            if not first:
+                write(", ")
+            write("**")
+            self.arg(node.kwarg)
+
+    def arg(self, node):
+        self.parts.append(node.arg)
+        if node.annotation:
+            self.parts.append(": ")
+            self.expr(node.annotation)
+
+    # type parameters
+
+    def expr_TypeVar(self, node, precedence):
+        self.parts.append(node.name)
+        if node.bound:
+            self.parts.append(": ")
+            self.expr(node.bound)
+        self.type_param_default(node)
+
+    def expr_TypeVarTuple(self, node, precedence):
+        self.parts.append("*" + node.name)
+        self.type_param_default(node)
+
+    def expr_ParamSpec(self, node, precedence):
+        self.parts.append("**" + node.name)
+        self.type_param_default(node)
+
+    def type_param_default(self, node):
+        default_value = getattr(node, "default_value", None)
+        if default_value:
+            self.parts.append(" = ")
+            self.expr(default_value)
+
+    # patterns
+
+    def expr_MatchValue(self, node, precedence):
+        self.expr(node.value)
+
+    def expr_MatchSingleton(self, node, precedence):
+        self.parts.append(repr(node.value))
+
+    def expr_MatchSequence(self, node, precedence):
+        self.parts.append("[")
+        self.join(node.patterns)
+        self.parts.append("]")
+
+    def expr_MatchStar(self, node, precedence):
+        self.parts.append("*" + (node.name or "_"))
+
+    def expr_MatchMapping(self, node, precedence):
+        write = self.parts.append
+        write("{")
+        for i, (key, pattern) in enumerate(zip(node.keys, node.patterns)):
+            if i:
+                write(", ")
+            self.expr(key)
+            write(": ")
+            self.expr(pattern)
+        if node.rest is not None:
+            if node.keys:
+                write(", ")
+            write("**" + node.rest)
+        write("}")
+
+    def expr_MatchClass(self, node, precedence):
+        write = self.parts.append
+        self.expr(node.cls, ATOM)
+        write("(")
+        self.join(node.patterns)
+        for i, (attr, pattern) in enumerate(zip(node.kwd_attrs, node.kwd_patterns)):
+            if i or node.patterns:
+                write(", ")
+            write(attr + "=")
+            self.expr(pattern)
+        write(")")
+
+    def expr_MatchAs(self, node, precedence):
+        write = self.parts.append
+        if node.name is None:
+            write("_")
+        elif node.pattern is None:
+            write(node.name)
+        else:
+            if precedence > TEST:
+                write("(")
+            self.expr(node.pattern, BOR)
+            write(" as " + node.name)
+            if precedence > TEST:
+                write(")")
+
+    def expr_MatchOr(self, node, precedence):
+        write = self.parts.append
+        if precedence > BOR:
+            write("(")
+        for i, pattern in enumerate(node.patterns):
+            if i:
+                write(" | ")
+            self.expr(pattern, BOR + 1)
+        if precedence > BOR:
+            write(")")
+
+
+TryStar = getattr(ast, "TryStar", ())
+
+
+def emitters(prefix: str) -> Dict[type, Callable]:
+    return {
+        getattr(ast, name[len(prefix) :]): function
+        for name, function in vars(Emitter).items()
+        if name.startswith(prefix) and hasattr(ast, name[len(prefix) :])
+    }
+
+
+statement_emitters = emitters("stmt_")
+expression_emitters = emitters("expr_")
+
+
+def emit(tree: ast.AST) -> str:
+    """
+    returns source code which parses to the same tree as `unparse(tree)`.
+
+    `tree` can be a Module, Interactive, Expression or a single statement or expression.
+    """
+    emitter = Emitter()
+    if isinstance(tree, (ast.Module, ast.Interactive)):
+        for statement in tree.body:
+            emitter.stmt(statement)
+    elif isinstance(tree, ast.Expression):
+        emitter.expr(tree.body)
+    elif isinstance(tree, ast.stmt):
+        emitter.stmt(tree)
+    else:
+        emitter.expr(tree)
+    return "".join(emitter.parts)
+
+
+def emit_statement(statement: ast.stmt, first: bool) -> str:
+    """
+    returns the source of a top level statement.
+    The sources of all statements of a module together are `emit(module)`.
+    """
+    emitter = Emitter()
+    if not first:
+        # fill() and decorators() start with a newline if something was written before
+        emitter.parts.append("")
+    emitter.stmt(statement)
+    return "".join(emitter.parts)
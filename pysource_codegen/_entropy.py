@@ -0,0 +1,173 @@
+"""
+random sources for the decisions of the generator.
+
+The generated code for an int seed is only stable for the same rng version.
+A bytes seed contains the decisions itself.
+"""
+
+from __future__ import annotations
+
+import abc
+import random
+from functools import partial
+
+# the rng version which is used if no other is requested
+DEFAULT_RNG_VERSION = 2
+
+
+class Entropy(abc.ABC):
+    """
+    The interface between the generator and a random source.
+    Every decision of the generator is one of these calls.
+    A new source is created for every generated tree.
+    """
+
+    # the rng version which uses this source
+    version: int
+
+    @abc.abstractmethod
+    def bit(self) -> int:
+        """
+        returns 0 or 1
+        """
+
+    @abc.abstractmethod
+    def random(self) -> float:
+        """
+        returns a float in [0.0, 1.0)
+        """
+
+    @abc.abstractmethod
+    def below(self, n: int) -> int:
+        """
+        returns an int in range(n)
+        """
+
+
+class RandomEntropy(Entropy):
+    """
+    rng version 1, makes the same kind of calls to `random.Random` as pysource-codegen 0.7
+    """
+
+    version = 1
+
+    def __init__(self, seed: int):
+        self.rand = random.Random(seed)
+        # the bound method of `random.Random` is faster than the method below
+        self.random = self.rand.random  # type: ignore[method-assign]
+
+    def bit(self) -> int:
+        return self.rand.randrange(2)
+
+    def random(self) -> float:
+        return self.rand.random()
+
+    def below(self, n: int) -> int:
+        return self.rand.randrange(n)
+
+
+class BufferedEntropy(Entropy):
+    """
+    rng version 2, takes small integers from a buffer of random bytes,
+    which is refilled with one `getrandbits()` call.
+
+    Single bits and floats are taken directly from `random.Random`,
+    because the C implementations are faster than a buffer written in python.
+    """
+
+    version = 2
+
+    buffer_size = 4096
+
+    def __init__(self, seed: int):
+        self.rand = random.Random(seed)
+        # faster than the methods below
+        self.random = self.rand.random  # type: ignore[method-assign]
+        self.bit = partial(self.rand.getrandbits, 1)  # type: ignore[method-assign]
+        self.buffer: list[int] = []
+
+    def bit(self) -> int:
+        return self.rand.getrandbits(1)
+
+    def random(self) -> float:
+        return self.rand.random()
+
+    def below(self, n: int) -> int:
+        if n > 256:
+            return self.rand.randrange(n)
+
+        # use only as many bits of a byte as needed and retry if the number is too large,
+        # like `random.Random.randrange()`
+        shift = 8 - (n - 1).bit_length()
+        buffer = self.buffer
+        while True:
+            if not buffer:
+                buffer.extend(
+                    self.rand.getrandbits(8 * self.buffer_size).to_bytes(
+                        self.buffer_size, "little"
+                    )
+                )
+            number = buffer.pop() >> shift
+            if number < n:
+                return number
+
+
+class BytesEntropy(Entropy):
+    """
+    reads the decisions from `data`, for example the input of a coverage-guided fuzzer.
+
+    Every decision uses a fixed number of bytes, which depends only on the decision:
+
+    * `bit()` the lowest bit of one byte
+    * `below(n)` no byte for `n == 1`, one byte for `n <= 256`, two for `n <= 65536`, ...
+    * `random()` two bytes
+
+    A changed byte changes the decision which reads it.
+    The following decisions read the same bytes as before only if this decision
+    does not change the shape of the tree, otherwise the number and the kind of
+    the following decisions change and they read other bytes.
+    The data is continued with zero bytes when all bytes are used,
+    `data` and `data + bytes(n)` generate the same code.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    def read(self, size: int) -> int:
+        position = self.position
+        self.position += size
+        return int.from_bytes(self.data[position : position + size], "little")
+
+    def bit(self) -> int:
+        return self.read(1) & 1
+
+    def below(self, n: int) -> int:
+        if n == 1:
+            return 0
+        return self.read(((n - 1).bit_length() + 7) // 8) % n
+
+    def random(self) -> float:
+        return self.read(2) / 0x10000
+
+
+# the sources for int seeds
+entropy_sources: dict[int, type[RandomEntropy | BufferedEntropy]] = {
+    source.version: source for source in (RandomEntropy, BufferedEntropy)
+}
+
+
+def entropy_source(seed: int | bytes, rng_version: int) -> Entropy:
+    """
+    returns the random source of `rng_version` for an int `seed`,
+    or a source which reads the decisions from a bytes `seed`
+    """
+    if isinstance(seed, bytes):
+        return BytesEntropy(seed)
+    try:
+        source = entropy_sources[rng_version]
+    except KeyError:
+        raise ValueError(
+            f"unknown rng version {rng_version}, known are {sorted(entropy_sources)}"
+        ) from None
+    return source(seed)
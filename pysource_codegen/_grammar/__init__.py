@@ -0,0 +1,39 @@
+"""
+Prebuilt grammar of the ast module for every supported python version.
+
+The modules `pyXY.py` are generated with `python -m pysource_codegen._grammar`
+by the python version X.Y from the docstrings of the ast classes.
+Python versions without a module (like 3.14) parse the docstrings at runtime,
+see `ast_info.get_info()`.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from types import MappingProxyType
+from typing import Mapping
+
+from ..types import BuiltinNodeType
+from ..types import NodeType
+from ..types import UnionNodeType
+
+
+def module_name(version) -> str:
+    return f"py{version[0]}{version[1]}"
+
+
+def load_grammar(
+    version=sys.version_info,
+) -> Mapping[str, NodeType | BuiltinNodeType | UnionNodeType] | None:
+    """
+    returns the prebuilt grammar for `version` or None if there is none
+    """
+    name = f"{__name__}.{module_name(version)}"
+    try:
+        module = importlib.import_module(name)
+    except ModuleNotFoundError as e:
+        if e.name != name:
+            raise
+        return None
+    return MappingProxyType(module.type_infos)
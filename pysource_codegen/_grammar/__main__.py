@@ -0,0 +1,68 @@
+"""
+writes the grammar snapshot for the running python version
+
+    python -m pysource_codegen._grammar
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from . import module_name
+from ..ast_info import parse_info
+from ..types import BuiltinNodeType
+from ..types import NodeType
+from ..types import UnionNodeType
+
+
+def format_info(info: NodeType | BuiltinNodeType | UnionNodeType) -> str:
+    if isinstance(info, NodeType):
+        return f"NodeType(fields={dict(info.fields)!r}, ast_type=ast.{info.ast_type.__name__})"
+    if isinstance(info, UnionNodeType):
+        return f"UnionNodeType(options={info.options!r})"
+    return f"BuiltinNodeType(kind={info.kind!r})"
+
+
+def grammar_source() -> str:
+    infos: dict[str, NodeType | BuiltinNodeType | UnionNodeType] = {}
+    parse_info("mod", infos)
+
+    version = ".".join(map(str, sys.version_info[:3]))
+    lines = [
+        f"# generated by `python -m pysource_codegen._grammar` with python {version}",
+        "import ast",
+        "import sys",
+        "",
+        "from ..types import BuiltinNodeType",
+        "from ..types import NodeType",
+        "from ..types import UnionNodeType",
+        "",
+        "# the ast types of newer python versions are unknown to mypy for older versions",
+        f"assert sys.version_info >= {sys.version_info[:2]!r}",
+        "",
+        "type_infos = {",
+        *(f"    {name!r}: {format_info(info)}," for name, info in infos.items()),
+        "}",
+        "",
+    ]
+    source = "\n".join(lines)
+
+    try:
+        import black  # type: ignore
+    except ImportError:
+        return source
+    return black.format_str(source, mode=black.Mode())
+
+
+def main():
+    if sys.version_info < (3, 9):
+        sys.exit("the grammar of python 3.8 is written by hand")
+
+    path = Path(__file__).parent / f"{module_name(sys.version_info)}.py"
+    path.write_text(grammar_source())
+    print(f"written {path}")
+
+
+if __name__ == "__main__":
+    main()
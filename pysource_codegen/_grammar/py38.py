@@ -1,18 +1,16 @@
+# written by hand, the ast docstrings of python 3.8 contain no grammar
 import ast
-import sys
 
-from .types import BuiltinNodeType
-from .types import NodeType
-from .types import UnionNodeType
-
-assert sys.version_info >= (3, 8)
+from ..types import BuiltinNodeType
+from ..types import NodeType
+from ..types import UnionNodeType
 
 type_infos = {
     "Delete": NodeType(
         fields={"targets": ("_deleteTargets", "*")}, ast_type=ast.Delete
     ),
     "expr": UnionNodeType(
-        options=[
+        options=(
             "BoolOp",
             "NamedExpr",
             "BinOp",
@@ -39,12 +37,12 @@ type_infos = {
             "Name",
             "List",
             "Tuple",
-        ]
+        )
     ),
     "BoolOp": NodeType(
         fields={"op": ("boolop", ""), "values": ("expr", "*")}, ast_type=ast.BoolOp
     ),
-    "boolop": UnionNodeType(options=["And", "Or"]),
+    "boolop": UnionNodeType(options=("And", "Or")),
     "And": NodeType(fields={}, ast_type=ast.And),
     "Or": NodeType(fields={}, ast_type=ast.Or),
     "NamedExpr": NodeType(
@@ -55,7 +53,7 @@ type_infos = {
         ast_type=ast.BinOp,
     ),
     "operator": UnionNodeType(
-        options=[
+        options=(
             "Add",
             "Sub",
             "Mult",
@@ -69,7 +67,7 @@ type_infos = {
             "BitXor",
             "BitAnd",
             "FloorDiv",
-        ]
+        )
     ),
     "Add": NodeType(fields={}, ast_type=ast.Add),
     "Sub": NodeType(fields={}, ast_type=ast.Sub),
@@ -87,7 +85,7 @@ type_infos = {
     "UnaryOp": NodeType(
         fields={"op": ("unaryop", ""), "operand": ("expr", "")}, ast_type=ast.UnaryOp
     ),
-    "unaryop": UnionNodeType(options=["Invert", "Not", "UAdd", "USub"]),
+    "unaryop": UnionNodeType(options=("Invert", "Not", "UAdd", "USub")),
     "Invert": NodeType(fields={}, ast_type=ast.Invert),
     "Not": NodeType(fields={}, ast_type=ast.Not),
     "UAdd": NodeType(fields={}, ast_type=ast.UAdd),
@@ -167,7 +165,7 @@ type_infos = {
         ast_type=ast.Compare,
     ),
     "cmpop": UnionNodeType(
-        options=["Eq", "NotEq", "Lt", "LtE", "Gt", "GtE", "Is", "IsNot", "In", "NotIn"]
+        options=("Eq", "NotEq", "Lt", "LtE", "Gt", "GtE", "Is", "IsNot", "In", "NotIn")
     ),
     "Eq": NodeType(fields={}, ast_type=ast.Eq),
     "NotEq": NodeType(fields={}, ast_type=ast.NotEq),
@@ -212,7 +210,7 @@ type_infos = {
         },
         ast_type=ast.Attribute,
     ),
-    "expr_context": UnionNodeType(options=["Load", "Store", "Del"]),
+    "expr_context": UnionNodeType(options=("Load", "Store", "Del")),
     "Load": NodeType(fields={}, ast_type=ast.Load),
     "Store": NodeType(fields={}, ast_type=ast.Store),
     "Del": NodeType(fields={}, ast_type=ast.Del),
@@ -238,7 +236,7 @@ type_infos = {
     "Tuple": NodeType(
         fields={"elts": ("expr", "*"), "ctx": ("expr_context", "")}, ast_type=ast.Tuple
     ),
-    "slice": UnionNodeType(options=["Slice", "ExtSlice", "Index"]),
+    "slice": UnionNodeType(options=("Slice", "ExtSlice", "Index")),
     "Slice": NodeType(
         fields={"lower": ("expr", "?"), "upper": ("expr", "?"), "step": ("expr", "?")},
         ast_type=ast.Slice,
@@ -251,13 +249,13 @@ type_infos = {
         fields={"value": ("expr", "")},
         ast_type=ast.Index,
     ),
-    "_deleteTargets": UnionNodeType(options=["Name", "Attribute", "Subscript"]),
+    "_deleteTargets": UnionNodeType(options=("Name", "Attribute", "Subscript")),
     "Module": NodeType(
         fields={"body": ("stmt", "*"), "type_ignores": ("type_ignore", "*")},
         ast_type=ast.Module,
     ),
     "stmt": UnionNodeType(
-        options=[
+        options=(
             "FunctionDef",
             "AsyncFunctionDef",
             "ClassDef",
@@ -283,7 +281,7 @@ type_infos = {
             "Pass",
             "Break",
             "Continue",
-        ]
+        )
     ),
     "FunctionDef": NodeType(
         fields={
@@ -399,7 +397,7 @@ type_infos = {
         },
         ast_type=ast.Try,
     ),
-    "excepthandler": UnionNodeType(options=["ExceptHandler"]),
+    "excepthandler": UnionNodeType(options=("ExceptHandler",)),
     "ExceptHandler": NodeType(
         fields={
             "type": ("expr", "?"),
@@ -430,7 +428,7 @@ type_infos = {
     "Pass": NodeType(fields={}, ast_type=ast.Pass),
     "Break": NodeType(fields={}, ast_type=ast.Break),
     "Continue": NodeType(fields={}, ast_type=ast.Continue),
-    "type_ignore": UnionNodeType(options=["TypeIgnore"]),
+    "type_ignore": UnionNodeType(options=("TypeIgnore",)),
     "TypeIgnore": NodeType(
         fields={"lineno": ("int", ""), "tag": ("string", "")}, ast_type=ast.TypeIgnore
     ),
@@ -1,3 +1,31 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+
+class FStringLimits(NamedTuple):
+    # maximum nesting of f-strings inside f-string expressions
+    expr_limit: int
+    # maximum nesting of f-strings inside format specs
+    format_limit: int
+
+
+# results of calc_f_string_expr_limit() and calc_f_string_format_limit()
+known_limits = {
+    ("cpython", (3, 8)): FStringLimits(4, 1),
+    ("cpython", (3, 9)): FStringLimits(4, 1),
+    ("cpython", (3, 10)): FStringLimits(4, 1),
+    ("cpython", (3, 11)): FStringLimits(4, 1),
+    ("cpython", (3, 12)): FStringLimits(149, 2),
+    ("cpython", (3, 13)): FStringLimits(149, 2),
+}
+
+
 def calc_f_string_expr_limit():
     n = 0
     s = "1"
@@ -31,5 +59,48 @@ def calc_f_string_format_limit():
     return n
 
 
-f_string_expr_limit = calc_f_string_expr_limit()
-f_string_format_limit = calc_f_string_format_limit()
+def cache_file() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "pysource-codegen" / "limits.json"
+
+
+def cached_limits(path: Path) -> FStringLimits:
+    """
+    returns the limits of the current interpreter from the cache in `path`.
+    The limits are calculated and stored in the cache if they are missing.
+    """
+    key = f"{sys.implementation.name}-{'.'.join(map(str, sys.version_info))}"
+
+    try:
+        cache = json.loads(path.read_text())
+    except (OSError, ValueError):
+        cache = {}
+
+    if key in cache:
+        return FStringLimits(*cache[key])
+
+    limits = FStringLimits(calc_f_string_expr_limit(), calc_f_string_format_limit())
+    cache[key] = limits
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(cache))
+        tmp_path.replace(path)
+    except OSError:
+        pass
+
+    return limits
+
+
+@lru_cache(maxsize=None)
+def f_string_limits() -> FStringLimits:
+    """
+    The limits are looked up in `known_limits` and calculated by `eval()`-ing
+    nested f-strings for other interpreters.
+    The calculated limits are cached on disk for the next process.
+    """
+    known = known_limits.get((sys.implementation.name, sys.version_info[:2]))
+    if known is not None:
+        return known
+    return cached_limits(cache_file())
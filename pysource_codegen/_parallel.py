@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import ast
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from functools import partial
+from multiprocessing import get_context
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from ._codegen import iter_generate_ast
+from ._codegen import tree_source
+from ._coverage import Coverage
+from ._entropy import DEFAULT_RNG_VERSION
+from ._stats import Stats
+
+# (seed, source) of the generated programs or (seed, error) of the skipped seeds
+SeedResults = List[Tuple[Union[int, bytes], str]]
+ChunkResult = Tuple[SeedResults, SeedResults, Optional[Stats], Optional[Coverage]]
+
+
+def _chunk_sources(
+    seeds: list[int | bytes],
+    generate_trees: Callable[..., Iterator[ast.AST]],
+    emit_source: bool,
+    stats: Stats | None,
+    coverage: Coverage | None,
+) -> tuple[SeedResults, SeedResults]:
+    results: SeedResults = []
+    errors: SeedResults = []
+    for seed, tree in zip(seeds, generate_trees(seeds, stats=stats, coverage=coverage)):
+        try:
+            results.append((seed, tree_source(tree, emit_source, stats)))
+        except ValueError as e:
+            # some f-strings can not be unparsed by older python versions
+            errors.append((seed, f"{type(e).__name__}: {e}"))
+    return results, errors
+
+
+def _generate_chunk(
+    seeds: list[int | bytes],
+    generate_trees: Callable[..., Iterator[ast.AST]],
+    emit_source: bool,
+    collect_stats: bool,
+    coverage: Coverage | None,
+) -> ChunkResult:
+    stats = Stats() if collect_stats else None
+    if coverage is None:
+        results, errors = _chunk_sources(
+            seeds, generate_trees, emit_source, stats, None
+        )
+        return results, errors, stats, None
+
+    # only the edges of this chunk are sent back
+    trees, edges, states = coverage.trees, coverage.edges.copy(), coverage.states.copy()
+    results, errors = _chunk_sources(
+        seeds, generate_trees, emit_source, stats, coverage
+    )
+    return results, errors, stats, coverage.since(trees, edges, states)
+
+
+def generate_parallel(
+    seeds: Iterable[int | bytes],
+    *,
+    jobs: int | None = None,
+    ordered: bool = True,
+    chunk_size: int = 16,
+    node_limit: int = 10000000,
+    depth_limit: int = 8,
+    root_node: str = "Module",
+    target_nodes: int | None = None,
+    target_bytes: int | None = None,
+    emit_source: bool = False,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    stats: Stats | None = None,
+    coverage: Coverage | None = None,
+    errors: list[tuple[int | bytes, str]] | None = None,
+) -> Iterator[tuple[int | bytes, str]]:
+    """
+    generates the source for every seed with a pool of `jobs` worker processes
+    and yields `(seed, source)` pairs.
+
+    The seeds are split into consecutive chunks of `chunk_size` seeds.
+    The source for every seed is the same as `generate(seed, ...)` with the same options.
+    Seeds with code which can not be unparsed by the running python version
+    (some f-strings before python 3.12) are skipped,
+    they are appended with the error to `errors` if it is given.
+
+    The results are returned in the order of the seeds if `ordered` is True,
+    or as soon as a chunk is finished otherwise.
+    Only a few chunks per worker are pending at any time,
+    which keeps the memory bounded if the consumer is slower than the workers.
+
+    The statistics of the workers are merged into `stats` when a chunk is finished,
+    and the edges of the generated trees into `coverage`.
+    An adaptive `coverage` is sent with every chunk,
+    the workers prefer the edges which were less covered when the chunk was submitted.
+    """
+    generate_trees = partial(
+        iter_generate_ast,
+        node_limit=node_limit,
+        depth_limit=depth_limit,
+        root_node=root_node,
+        target_nodes=target_nodes,
+        target_bytes=target_bytes,
+        locations=False,
+        rng_version=rng_version,
+    )
+    seed_iter = iter(seeds)
+
+    def chunks():
+        while chunk := list(itertools.islice(seed_iter, chunk_size)):
+            yield chunk
+
+    def chunk_results(result: ChunkResult) -> SeedResults:
+        results, chunk_errors, chunk_stats, chunk_coverage = result
+        if errors is not None:
+            errors.extend(chunk_errors)
+        if stats is not None and chunk_stats is not None:
+            stats.merge(chunk_stats)
+        if coverage is not None and chunk_coverage is not None:
+            coverage.merge(chunk_coverage)
+        return results
+
+    def worker_coverage():
+        if coverage is None or coverage.adaptive:
+            return coverage
+        # the workers need only the edges of their own trees
+        return Coverage(adaptive=False)
+
+    if jobs == 1:
+        for chunk in chunks():
+            results, chunk_errors = _chunk_sources(
+                chunk, generate_trees, emit_source, stats, coverage
+            )
+            if errors is not None:
+                errors.extend(chunk_errors)
+            yield from results
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context("spawn")) as pool:
+        pending: deque[Future[ChunkResult]] = deque()
+
+        def finished_results():
+            if ordered:
+                return chunk_results(pending.popleft().result())
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            pending.remove(future)
+            return chunk_results(future.result())
+
+        for chunk in chunks():
+            pending.append(
+                pool.submit(
+                    _generate_chunk,
+                    chunk,
+                    generate_trees,
+                    emit_source,
+                    stats is not None,
+                    worker_coverage(),
+                )
+            )
+            if len(pending) >= 2 * jobs:
+                yield from finished_results()
+
+        while pending:
+            yield from finished_results()
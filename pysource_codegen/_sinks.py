@@ -0,0 +1,149 @@
+"""
+destinations for the programs which are generated by the CLI.
+
+Every sink writes a program as soon as it gets it, nothing is collected in memory.
+"""
+
+from __future__ import annotations
+
+import abc
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import IO
+from typing import Literal
+
+stream_formats = ("text", "jsonl", "nul")
+
+
+def file_name(seed: int) -> str:
+    return f"{seed}.py"
+
+
+class Sink(abc.ABC):
+    @abc.abstractmethod
+    def write(self, seed: int, source: str):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TextSink(Sink):
+    """
+    the programs separated by `# seed: ...` comments
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, seed: int, source: str):
+        self.stream.write(f"# seed: {seed}\n{source}\n")
+
+
+class JsonlSink(Sink):
+    """
+    one json object `{"seed": ..., "source": ...}` per line
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, seed: int, source: str):
+        self.stream.write(json.dumps({"seed": seed, "source": source}) + "\n")
+
+
+class NulSink(Sink):
+    """
+    the programs terminated by a NUL character (like `find -print0`)
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, seed: int, source: str):
+        self.stream.write(source + "\0")
+
+
+class DirectorySink(Sink):
+    """
+    one file per program
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, seed: int, source: str):
+        (self.path / file_name(seed)).write_text(source + "\n")
+
+
+TarMode = Literal["w", "w:gz", "w:bz2", "w:xz"]
+
+
+class TarSink(Sink):
+    def __init__(self, path: Path, mode: TarMode):
+        self.tar = tarfile.open(path, mode)
+
+    def write(self, seed: int, source: str):
+        data = (source + "\n").encode()
+        info = tarfile.TarInfo(file_name(seed))
+        info.size = len(data)
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.tar.close()
+
+
+class ZipSink(Sink):
+    def __init__(self, path: Path):
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, seed: int, source: str):
+        self.zip.writestr(file_name(seed), source + "\n")
+
+    def close(self):
+        self.zip.close()
+
+
+tar_modes: dict[str, TarMode] = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+
+
+def open_sink(output: str | None, format: str, stream: IO[str]) -> Sink:
+    """
+    returns the sink for the CLI options.
+
+    `output` can be a directory, a tar archive or a zip file, which is chosen by the suffix.
+    The programs are written to `stream` in the `format` if no output is given.
+    """
+    if output is not None and format != "text":
+        raise ValueError(f"the format {format!r} can not be used with an output")
+
+    if output is None:
+        if format == "jsonl":
+            return JsonlSink(stream)
+        if format == "nul":
+            return NulSink(stream)
+        return TextSink(stream)
+
+    path = Path(output)
+    if path.name.endswith(".zip"):
+        return ZipSink(path)
+    for suffix, mode in tar_modes.items():
+        if path.name.endswith(suffix):
+            return TarSink(path, mode)
+    return DirectorySink(path)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import ast
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import IO
+
+phases = (
+    "generate",
+    "probability",
+    "fix",
+    "fix_result",
+    "check",
+    "locations",
+    "unparse",
+)
+
+
+@dataclass
+class Stats:
+    """
+    Opt-in statistics about the generation, which can be passed to `generate()` and friends.
+
+    The same object can be used for many trees, the values are summed up.
+    """
+
+    # number of generated trees
+    trees: int = 0
+    # generated nodes per node type
+    nodes: Counter[str] = field(default_factory=Counter)
+    # number of nodes in the final trees
+    final_nodes: int = 0
+    # generated nodes which are not part of the final trees
+    wasted_nodes: int = 0
+    # options with probability 0 per union type, counted for every decision
+    rejected: Counter[str] = field(default_factory=Counter)
+    # nodes per node type where `fix()` changed an attribute
+    fix_rewritten: Counter[str] = field(default_factory=Counter)
+    # nodes removed by `fix()` per type of the fixed node
+    fix_removed: Counter[str] = field(default_factory=Counter)
+    # time per phase in seconds
+    # `generate` does not include the time spent in `probability` and `fix`
+    times: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(phases, 0.0))
+
+    def record_fix(self, name: str, before: list, node: ast.AST, result: ast.AST):
+        after = field_values(result)
+        if result is node and before == after:
+            return
+
+        self.fix_rewritten[name] += 1
+
+        kept = {id(n) for n in child_nodes(after)}
+        self.fix_removed[name] += sum(
+            sum(1 for _ in ast.walk(child))
+            for child in child_nodes(before)
+            if id(child) not in kept
+        )
+
+    def count_wasted(self, generated: list[ast.AST], tree: ast.AST):
+        kept = {id(node) for node in ast.walk(tree)}
+        self.wasted_nodes += sum(1 for node in generated if id(node) not in kept)
+
+    def count_tree(self, tree: ast.AST):
+        self.final_nodes += sum(1 for _ in ast.walk(tree))
+
+    def merge(self, other: Stats):
+        self.trees += other.trees
+        self.nodes.update(other.nodes)
+        self.final_nodes += other.final_nodes
+        self.wasted_nodes += other.wasted_nodes
+        self.rejected.update(other.rejected)
+        self.fix_rewritten.update(other.fix_rewritten)
+        self.fix_removed.update(other.fix_removed)
+        for phase, duration in other.times.items():
+            self.times[phase] = self.times.get(phase, 0.0) + duration
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "trees": self.trees,
+            "nodes": dict(self.nodes.most_common()),
+            "final_nodes": self.final_nodes,
+            "wasted_nodes": self.wasted_nodes,
+            "rejected": dict(self.rejected.most_common()),
+            "fix_rewritten": dict(self.fix_rewritten.most_common()),
+            "fix_removed": dict(self.fix_removed.most_common()),
+            "times": self.times,
+        }
+
+    def dump(self, fp: IO[str]):
+        json.dump(self.to_json(), fp, indent=2)
+        fp.write("\n")
+
+
+def timed(stats: Stats | None, phase: str, function: Callable, *args):
+    """
+    calls `function(*args)` and adds the time to `phase` if `stats` is not None
+    """
+    if stats is None:
+        return function(*args)
+    start = time.perf_counter()
+    result = function(*args)
+    stats.times[phase] += time.perf_counter() - start
+    return result
+
+
+def field_values(node: ast.AST) -> list:
+    # the ctx is not generated and set by `fix()` for every node, which is no rewrite
+    return [
+        tuple(value) if isinstance(value, list) else value
+        for name, value in ast.iter_fields(node)
+        if name != "ctx"
+    ]
+
+
+def child_nodes(values: list):
+    for value in values:
+        if isinstance(value, ast.AST):
+            yield value
+        elif isinstance(value, tuple):
+            for v in value:
+                if isinstance(v, ast.AST):
+                    yield v
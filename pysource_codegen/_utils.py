@@ -8,6 +8,57 @@ else:
     from astunparse import unparse  # type: ignore
 
 
+if sys.version_info >= (3, 9):
+
+    def unparse_statement(statement: ast.stmt, first: bool) -> str:
+        """
+        returns the source of a top level statement.
+        The sources of all statements of a module together are `unparse(module)`.
+        """
+        if first:
+            # the first statement can be a docstring
+            return unparse(ast.Module(body=[statement], type_ignores=[]))
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return "\n\n" + unparse(statement)
+        return "\n" + unparse(statement)
+
+else:
+
+    def unparse_statement(statement: ast.stmt, first: bool) -> str:
+        # astunparse adds a newline at the end of the source
+        return unparse(statement)[:-1]
+
+
+if sys.version_info >= (3, 9):
+    unparse_expression = unparse
+else:
+
+    def unparse_expression(expression: ast.expr) -> str:
+        return unparse(expression)[:-1]
+
+
+statement_fields = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+def fix_statement_locations(tree: ast.AST) -> ast.AST:
+    """
+    sets the `lineno` of all statements to 1, like `ast.fix_missing_locations()`.
+
+    `unparse()` reads no other locations (only for the type comments),
+    the expressions are not visited.
+    """
+    todo = [tree]
+    while todo:
+        node = todo.pop()
+        if isinstance(node, ast.stmt):
+            node.lineno = 1
+        for name in statement_fields:
+            statements = getattr(node, name, None)
+            if isinstance(statements, list):
+                todo.extend(statements)
+    return tree
+
+
 def only_if(condition: bool, **kwargs) -> Dict:
     return kwargs if condition else {}
 
@@ -0,0 +1,225 @@
+"""
+checks which files of a source corpus contain code that the generator can not produce.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import sys
+import warnings
+from collections import Counter
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from ._codegen import Rejection
+from ._codegen import validate_ast
+
+# (rejection, error) of one source
+Result = Tuple[Optional[Rejection], Optional[str]]
+
+
+@dataclass(frozen=True)
+class FileResult:
+    path: Path
+    # why the code can not be generated, None if it can
+    rejection: Rejection | None
+    # why the file was not checked, for example a syntax error
+    error: str | None = None
+
+
+def validate_source(source: bytes, filename: str = "<unknown>") -> Result:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tree = ast.parse(source, filename)
+            compile(tree, filename, "exec", dont_inherit=True)
+    except Exception as e:
+        # syntax errors, null bytes or code which is nested too deep for the parser
+        return None, f"{type(e).__name__}: {e}"
+
+    try:
+        return validate_ast(tree), None
+    except Exception as e:
+        # nodes which are unknown to the generator,
+        # or a bug of the validation which should not stop the check of the other files
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _validate_sources(sources: list[tuple[str, bytes]]) -> list[Result]:
+    return [validate_source(source, filename) for filename, source in sources]
+
+
+def generator_hash() -> str:
+    """
+    the cached results are only valid for the same generator and python version
+    """
+    h = hashlib.sha256(sys.version.encode())
+    for file in sorted(Path(__file__).parent.rglob("*.py")):
+        h.update(file.read_bytes())
+    return h.hexdigest()
+
+
+class Cache:
+    """
+    results by the sha256 of the file content, stored as json
+    """
+
+    def __init__(self, path: Path | str | None):
+        self.path = None if path is None else Path(path)
+        self.generator = generator_hash()
+        self.results: dict[str, Result] = {}
+
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                if data.get("generator") == self.generator:
+                    self.results = {
+                        digest: (
+                            None if rejection is None else load_rejection(rejection),
+                            error,
+                        )
+                        for digest, (rejection, error) in data["results"].items()
+                    }
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # a damaged cache or a cache of another format is ignored
+                self.results = {}
+
+    def save(self):
+        if self.path is None:
+            return
+        data = {
+            "generator": self.generator,
+            "results": {
+                digest: (None if rejection is None else asdict(rejection), error)
+                for digest, (rejection, error) in self.results.items()
+            },
+        }
+        # a run which is killed while the cache is written leaves the old cache
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+
+def load_rejection(data: dict) -> Rejection:
+    parents = tuple(tuple(parent) for parent in data.pop("parents"))
+    return Rejection(parents=parents, **data)  # type: ignore[arg-type]
+
+
+def validate_files(
+    paths: Iterable[Path],
+    *,
+    jobs: int | None = None,
+    chunk_size: int = 8,
+    cache: Path | str | None = None,
+) -> Iterator[FileResult]:
+    """
+    checks if the generator can produce the code of every file
+    with a pool of `jobs` worker processes.
+
+    The results are yielded in the order of the paths.
+    Files with the same content are only checked once,
+    and not at all if the result is already in the json file `cache`.
+    """
+    results = Cache(cache)
+    path_iter = iter(paths)
+
+    def chunks():
+        while True:
+            chunk = []
+            for path in path_iter:
+                try:
+                    data = path.read_bytes()
+                except OSError as e:
+                    # unreadable files are reported and not checked
+                    chunk.append((path, None, None, f"{type(e).__name__}: {e}"))
+                else:
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunk.append((path, data, digest, None))
+                if len(chunk) == chunk_size:
+                    break
+            if not chunk:
+                return
+            yield chunk
+
+    def unknown(chunk):
+        # files with the same content in one chunk are checked only once
+        todo = {}
+        for path, data, digest, _ in chunk:
+            if data is not None and digest not in results.results:
+                todo.setdefault(digest, (str(path), data))
+        return todo
+
+    def chunk_results(chunk, digests, checked):
+        results.results.update(zip(digests, checked))
+        for path, data, digest, error in chunk:
+            if data is None:
+                yield FileResult(path, None, error)
+            else:
+                yield FileResult(path, *results.results[digest])
+
+    try:
+        if jobs == 1:
+            for chunk in chunks():
+                todo = unknown(chunk)
+                checked = _validate_sources(list(todo.values()))
+                yield from chunk_results(chunk, todo, checked)
+            return
+
+        jobs = jobs or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, mp_context=get_context("spawn")
+        ) as pool:
+            pending: deque[tuple[list, list[str], Future[list[Result]]]] = deque()
+
+            for chunk in chunks():
+                todo = unknown(chunk)
+                if todo:
+                    future = pool.submit(_validate_sources, list(todo.values()))
+                else:
+                    # no worker is started if all results are cached
+                    future = Future()
+                    future.set_result([])
+                pending.append((chunk, list(todo), future))
+                if len(pending) >= 2 * jobs:
+                    chunk, digests, future = pending.popleft()
+                    yield from chunk_results(chunk, digests, future.result())
+
+            while pending:
+                chunk, digests, future = pending.popleft()
+                yield from chunk_results(chunk, digests, future.result())
+    finally:
+        results.save()
+
+
+def validate_directory(
+    directory: Path | str,
+    *,
+    jobs: int | None = None,
+    cache: Path | str | None = None,
+) -> Iterator[FileResult]:
+    """
+    `validate_files()` for all `*.py` files in `directory` and its subdirectories
+    """
+    return validate_files(sorted(Path(directory).rglob("*.py")), jobs=jobs, cache=cache)
+
+
+def top_rules(results: Iterable[FileResult]) -> list[tuple[str, int]]:
+    """
+    the rules which rejected the most files, the most common first
+    """
+    return Counter(
+        result.rejection.rule for result in results if result.rejection is not None
+    ).most_common()
@@ -3,20 +3,43 @@ from __future__ import annotations
 import ast
 import inspect
 import re
-import sys
+from typing import Mapping
 
+from ._grammar import load_grammar
 from .types import BuiltinNodeType
 from .types import NodeType
 from .types import UnionNodeType
 
-type_infos: dict[str, NodeType | BuiltinNodeType | UnionNodeType] = {}
+# the prebuilt grammar of the running python version,
+# empty for versions without a prebuilt grammar (like 3.14) which parse every type
+type_infos: Mapping[str, NodeType | BuiltinNodeType | UnionNodeType] = (
+    load_grammar() or {}
+)
+
+# types which are missing in the prebuilt grammar
+parsed_infos: dict[str, NodeType | BuiltinNodeType | UnionNodeType] = {}
 
 
 def get_info(name):
-    if name in type_infos:
+    try:
         return type_infos[name]
+    except KeyError:
+        pass
+
+    if name not in parsed_infos:
+        parse_info(name, parsed_infos)
+    return parsed_infos[name]
+
+
+def parse_info(name, infos):
+    """
+    parses the grammar of `name` and all types which are used by it
+    from the docstrings of the ast module and stores it in `infos`
+    """
+    if name in infos:
+        return infos[name]
     elif name in ("identifier", "int", "string", "constant"):
-        type_infos[name] = BuiltinNodeType(name)
+        infos[name] = BuiltinNodeType(name)
 
     else:
         doc = inspect.getdoc(getattr(ast, name)) or ""
@@ -27,13 +50,11 @@ def get_info(name):
             if m:
                 nt = NodeType(fields={}, ast_type=getattr(ast, name))
                 name = m.group(1)
-                type_infos[name] = nt
+                infos[name] = nt
             else:
                 m = re.fullmatch(r"(\w*)\((.*)\)", doc)
                 if m:
-                    nt = NodeType(fields={}, ast_type=getattr(ast, name))
-                    name = m.group(1)
-                    type_infos[name] = nt
+                    fields = {}
                     for string_field in m.group(2).split(","):
                         field_type, field_name = string_field.split()
                         quantity = ""
@@ -41,23 +62,25 @@ def get_info(name):
                             quantity = last + quantity
                             field_type = field_type[:-1]
 
-                        nt.fields[field_name] = (field_type, quantity)
-                        get_info(field_type)
+                        fields[field_name] = (field_type, quantity)
+
+                    nt = NodeType(fields=fields, ast_type=getattr(ast, name))
+                    name = m.group(1)
+                    infos[name] = nt
+                    for field_type, _ in fields.values():
+                        parse_info(field_type, infos)
                 elif doc.startswith(f"{name} = "):
                     doc = doc.split(" = ", 1)[1]
-                    nt = UnionNodeType(options=[])
-                    type_infos[name] = nt
-                    nt.options = [d.split("(")[0] for d in doc.split(" | ")]
+                    nt = UnionNodeType(
+                        options=tuple(d.split("(")[0] for d in doc.split(" | "))
+                    )
+                    infos[name] = nt
                     for o in nt.options:
-                        get_info(o)
+                        parse_info(o, infos)
 
                 else:
                     assert False, "can not parse:" + doc
         else:
             assert False, "no doc for " + name
 
-    return type_infos[name]
-
-
-if sys.version_info < (3, 9):
-    from .static_type_info import type_infos  # type: ignore
+    return infos[name]
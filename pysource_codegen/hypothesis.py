@@ -0,0 +1,212 @@
+"""
+hypothesis strategies for generated python code.
+
+    from hypothesis import given
+    from pysource_codegen.hypothesis import modules
+
+    @given(modules())
+    def test_something(code):
+        ...
+
+Every decision of the generator is drawn from hypothesis.
+A failing example is shrunk by hypothesis to smaller code
+and is replayed from the example database without a search.
+"""
+
+from __future__ import annotations
+
+import ast
+import itertools
+import warnings
+from functools import lru_cache
+
+from hypothesis import reject
+from hypothesis import strategies as st
+
+from ._codegen import AstGenerator
+from ._codegen import check
+from ._codegen import final_options
+from ._codegen import fix_result
+from ._codegen import tree_source
+from ._context import Context
+from ._entropy import Entropy
+
+__all__ = (
+    "expressions",
+    "modules",
+    "statements",
+    "trees",
+)
+
+
+class HypothesisEntropy(Entropy):
+    """
+    draws every decision from hypothesis, the draws shrink towards 0
+    """
+
+    def __init__(self, draw):
+        self.draw = draw
+
+    def bit(self) -> int:
+        return self.draw(st.integers(0, 1))
+
+    def below(self, n: int) -> int:
+        if n == 1:
+            return 0
+        return self.draw(st.integers(0, n - 1))
+
+    def random(self) -> float:
+        return self.draw(st.integers(0, 0xFFFF)) / 0x10000
+
+
+@lru_cache(maxsize=None)
+def simplest_first(
+    options: tuple[str, ...], cum_weights: tuple[int, ...]
+) -> tuple[tuple[str, ...], tuple[int, ...]]:
+    """
+    moves the options which end the generation to the front, with the same weights
+    """
+    weights = [b - a for a, b in zip((0,) + cum_weights, cum_weights)]
+    order = sorted(range(len(options)), key=lambda i: options[i] not in final_options)
+    return tuple(options[i] for i in order), tuple(
+        itertools.accumulate(weights[i] for i in order)
+    )
+
+
+class HypothesisGenerator(AstGenerator):
+    """
+    makes the decisions in a way that smaller draws generate smaller code,
+    which is what hypothesis shrinks towards
+    """
+
+    def __init__(self, draw, node_limit: int, depth_limit: int):
+        super().__init__(b"", node_limit=node_limit, depth_limit=depth_limit)
+        self.rand = HypothesisEntropy(draw)
+
+    def cnd(self):
+        # an optional child is only generated for a draw of 1
+        return self.rand.bit() == 1
+
+    def choice(self, options: tuple[str, ...], cum_weights: tuple[int, ...]) -> str:
+        return super().choice(*simplest_first(options, cum_weights))
+
+
+def generate_root(
+    draw,
+    generator: HypothesisGenerator,
+    root_node: str,
+    min_statements: int,
+    max_statements: int,
+):
+    if root_node == "Module":
+        # the number of statements is drawn,
+        # which allows hypothesis to remove the statements which are not needed
+        context = Context.root().push("Module", "body")
+        body: list[ast.stmt] = []
+        while len(body) < min_statements or (
+            len(body) < max_statements and draw(st.booleans())
+        ):
+            generator.nodes = 0
+            body.append(generator.generate_impl("stmt", context, 1))
+        return ast.Module(body=body, type_ignores=[])
+
+    if root_node == "Expression":
+        # the grammar of python 3.8 has no Expression
+        context = Context.root().push("Expression", "body")
+        return ast.Expression(body=generator.generate_impl("expr", context, 1))
+
+    return generator.generate_impl(root_node)
+
+
+@st.composite
+def trees(
+    draw,
+    root_node: str = "Module",
+    *,
+    node_limit: int = 100,
+    depth_limit: int = 5,
+    min_statements: int = 0,
+    max_statements: int = 5,
+) -> ast.AST:
+    """
+    a random tree of type `root_node` with locations.
+
+    A Module has `min_statements` to `max_statements` top level statements
+    and every statement has about `node_limit` nodes.
+    """
+    generator = HypothesisGenerator(draw, node_limit, depth_limit)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", SyntaxWarning)
+        tree = fix_result(
+            generate_root(draw, generator, root_node, min_statements, max_statements)
+        )
+        check(tree)
+
+    return ast.fix_missing_locations(tree)
+
+
+def sources(tree_strategy: st.SearchStrategy[ast.AST], emit_source: bool):
+    def source(tree: ast.AST) -> str:
+        try:
+            return tree_source(tree, emit_source, None)
+        except ValueError:
+            # some f-strings can not be unparsed by older python versions
+            reject()
+
+    return tree_strategy.map(source)
+
+
+def modules(
+    *,
+    node_limit: int = 100,
+    depth_limit: int = 5,
+    min_statements: int = 0,
+    max_statements: int = 5,
+    emit_source: bool = False,
+) -> st.SearchStrategy[str]:
+    """
+    the source of a random module, see `trees()`.
+
+    The source is written by `ast.unparse()`, or by `emit()` if `emit_source` is True.
+    """
+    return sources(
+        trees(
+            "Module",
+            node_limit=node_limit,
+            depth_limit=depth_limit,
+            min_statements=min_statements,
+            max_statements=max_statements,
+        ),
+        emit_source,
+    )
+
+
+def statements(
+    *, node_limit: int = 100, depth_limit: int = 5, emit_source: bool = False
+) -> st.SearchStrategy[str]:
+    """
+    the source of a random top level statement
+    """
+    return sources(
+        trees(
+            "Module",
+            node_limit=node_limit,
+            depth_limit=depth_limit,
+            min_statements=1,
+            max_statements=1,
+        ),
+        emit_source,
+    )
+
+
+def expressions(
+    *, node_limit: int = 100, depth_limit: int = 5, emit_source: bool = False
+) -> st.SearchStrategy[str]:
+    """
+    the source of a random expression, which can be compiled with `mode="eval"`
+    """
+    return sources(
+        trees("Expression", node_limit=node_limit, depth_limit=depth_limit),
+        emit_source,
+    )
@@ -1,29 +1,58 @@
+from __future__ import annotations
+
 import ast
 from dataclasses import dataclass
-from typing import Dict
-from typing import List
+from types import MappingProxyType
 from typing import Literal
+from typing import Mapping
 from typing import Tuple
 from typing import Type
 from typing import Union
 
 
-@dataclass
-class NodeType:
-    fields: Dict[
+class GrammarType:
+    """
+    The grammar types are immutable and have no __dict__.
+    `__slots__` is set by hand because `dataclass(slots=True)` requires python 3.10,
+    and pickle can not restore the slots of a frozen dataclass without `__reduce__()`.
+    """
+
+    __slots__: tuple[str, ...] = ()
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+@dataclass(frozen=True)
+class NodeType(GrammarType):
+    __slots__ = ("fields", "ast_type")
+
+    fields: Mapping[
         str,
         Tuple[str, Literal["?", "*", ""]],
     ]
     ast_type: Type[ast.AST]
 
+    def __post_init__(self):
+        # a read-only copy, the dict which is passed can be changed later
+        object.__setattr__(self, "fields", MappingProxyType(dict(self.fields)))
+
+    def __reduce__(self):
+        # a mappingproxy can not be pickled
+        return type(self), (dict(self.fields), self.ast_type)
+
+
+@dataclass(frozen=True)
+class BuiltinNodeType(GrammarType):
+    __slots__ = ("kind",)
 
-@dataclass
-class BuiltinNodeType:
     kind: Union[
         Literal["identifier"], Literal["int"], Literal["string"], Literal["constant"]
     ]
 
 
-@dataclass
-class UnionNodeType:
-    options: List[str]
+@dataclass(frozen=True)
+class UnionNodeType(GrammarType):
+    __slots__ = ("options",)
+
+    options: Tuple[str, ...]
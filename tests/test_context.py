@@ -0,0 +1,48 @@
+import ast
+
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._context import Context
+from pysource_codegen._context import Parents
+from pysource_codegen._context import scope_flags
+
+
+def inside(parents, types, not_types):
+    for parent, arg in reversed(parents):
+        qual_parent = f"{parent}.{arg}"
+        if any(qual_parent == t if "." in t else parent == t for t in types):
+            return True
+        if any(qual_parent == t if "." in t else parent == t for t in not_types):
+            return False
+    return False
+
+
+def all_parents(node, parents=()):
+    yield list(parents)
+    for field, value in ast.iter_fields(node):
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, ast.AST):
+                yield from all_parents(child, (*parents, (type(node).__name__, field)))
+
+
+def test_scope_flags():
+    for seed in range(5):
+        tree = generate_ast(seed, node_limit=300, depth_limit=6)
+        for parents in all_parents(tree):
+            context = Context.from_parents(parents)
+            for name, (types, not_types) in scope_flags.items():
+                assert getattr(context, name) == inside(parents, types, not_types)
+
+
+def test_parents():
+    root = Parents.root()
+    a = root.push("Module", "body")
+    b = a.push("Expr", "value")
+    c = a.push("Assign", "targets")
+
+    assert not root
+    assert len(b) == 2
+    assert b == [("Module", "body"), ("Expr", "value")]
+    assert c == [("Module", "body"), ("Assign", "targets")]
+    assert b[-1] == ("Expr", "value")
+    assert b[-2:] == [("Module", "body"), ("Expr", "value")]
+    assert b.context is Context.from_parents(list(b))
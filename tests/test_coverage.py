@@ -0,0 +1,210 @@
+import ast
+import io
+import json
+import sys
+
+from pysource_codegen import Coverage
+from pysource_codegen import directory_coverage
+from pysource_codegen import generate
+from pysource_codegen import generate_many
+from pysource_codegen import generate_parallel
+from pysource_codegen import write_module
+from pysource_codegen.__main__ import run
+from pysource_codegen._coverage import grammar_edges
+
+
+def test_edges():
+    coverage = Coverage()
+    coverage.add_tree(ast.parse("try:\n    pass\nexcept E:\n    f(x)"))
+    assert sorted(coverage.edges) == [
+        ("Call", "args", "Name"),
+        ("Call", "func", "Name"),
+        ("ExceptHandler", "body", "Expr"),
+        ("ExceptHandler", "type", "Name"),
+        ("Expr", "value", "Call"),
+        ("Module", "body", "Try"),
+        ("Name", "ctx", "Load"),
+        ("Try", "body", "Pass"),
+        ("Try", "handlers", "ExceptHandler"),
+    ]
+
+
+def test_coverage():
+    seeds = range(20)
+    coverage = Coverage(interval=5)
+
+    # the generated code is not changed if the coverage is not adaptive
+    assert generate_many(
+        seeds, node_limit=100, depth_limit=4, coverage=coverage
+    ) == generate_many(seeds, node_limit=100, depth_limit=4)
+
+    assert coverage.trees == 20
+    assert coverage.edges[("Module", "body", "Expr")] > 0
+    assert [trees for trees, _ in coverage.history] == [5, 10, 15, 20]
+    assert coverage.history[-1][1] == coverage.covered()
+    assert coverage.report().splitlines()[1].split() == [
+        "trees",
+        "edges",
+        "new",
+        "covered",
+    ]
+
+
+def test_adaptive():
+    seeds = range(100)
+    uniform = Coverage()
+    adaptive = Coverage(adaptive=True)
+
+    generate_many(seeds, node_limit=100, depth_limit=4, coverage=uniform)
+    for code in generate_many(
+        seeds, node_limit=100, depth_limit=4, emit_source=True, coverage=adaptive
+    ):
+        compile(code, "<code>", "exec")
+
+    assert len(adaptive.edges) > len(uniform.edges)
+
+
+def test_adaptive_many():
+    # every tree is biased by the trees before it, also in the batches of generate_many()
+    seeds = range(40)
+
+    coverage = Coverage(adaptive=True)
+    many = generate_many(seeds, node_limit=100, depth_limit=4, coverage=coverage)
+
+    coverage = Coverage(adaptive=True)
+    single = [
+        generate(seed, node_limit=100, depth_limit=4, coverage=coverage)
+        for seed in seeds
+    ]
+
+    assert many == single
+
+
+def test_merge_history():
+    coverage = Coverage(interval=10)
+    generate_many(range(5), node_limit=100, depth_limit=4, coverage=coverage)
+
+    other = Coverage(interval=10)
+    generate_many(range(5, 30), node_limit=100, depth_limit=4, coverage=other)
+
+    coverage.merge(other)
+    assert coverage.trees == 30
+    # one entry for every crossed interval boundary
+    assert coverage.history == [(trees, coverage.covered()) for trees in (10, 20, 30)]
+
+
+def test_coverage_parallel():
+    seeds = range(12)
+
+    coverage = Coverage()
+    generate_many(seeds, node_limit=100, depth_limit=4, coverage=coverage)
+
+    parallel_coverage = Coverage()
+    list(
+        generate_parallel(
+            seeds,
+            jobs=2,
+            chunk_size=5,
+            node_limit=100,
+            depth_limit=4,
+            coverage=parallel_coverage,
+        )
+    )
+
+    assert parallel_coverage.trees == coverage.trees
+    assert parallel_coverage.edges == coverage.edges
+
+
+def test_coverage_write_module():
+    coverage = Coverage()
+    write_module(5, io.StringIO(), target_nodes=500, coverage=coverage)
+
+    module_coverage = Coverage()
+    generate(5, target_nodes=500, coverage=module_coverage)
+
+    assert coverage.trees == module_coverage.trees == 1
+    assert coverage.edges == module_coverage.edges
+
+
+def test_cli(monkeypatch, capsys, tmp_path):
+    path = tmp_path / "coverage.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["pysource-codegen", "--seeds", "0:5", "--adaptive", "--coverage", str(path)],
+    )
+    run()
+    capsys.readouterr()
+
+    data = json.loads(path.read_text())
+    assert data["adaptive"]
+    assert data["trees"] == 5
+    assert data["covered"] == sum(len(children) for children in data["edges"].values())
+
+
+def test_grammar_edges():
+    edges = grammar_edges()
+    assert ("Module", "body", "Pass") in edges
+    assert ("Try", "handlers", "ExceptHandler") in edges
+    assert ("BinOp", "op", "Add") in edges
+    # only node types are part of an edge
+    assert not any(parent == "Name" and name == "id" for parent, name, _ in edges)
+
+
+def test_uncovered():
+    coverage = Coverage()
+    generate_many(range(20), node_limit=100, depth_limit=4, coverage=coverage)
+
+    uncovered = coverage.uncovered()
+    assert coverage.covered() + len(uncovered) == len(grammar_edges())
+    assert not set(uncovered) & coverage.edges.keys()
+
+    reference = Coverage()
+    reference.add_tree(
+        ast.parse("async def f():\n    return [await x async for x in y]")
+    )
+    assert set(coverage.uncovered(reference)) <= reference.edges.keys()
+
+
+def test_states():
+    coverage = Coverage()
+    coverage.add_tree(ast.parse("async def f():\n    await x\ndef g():\n    yield"))
+    states = coverage.flag_states()
+    assert states["in_async_function", "Await"] == 1
+    assert states["in_function", "Yield"] == 1
+    assert ("in_async_function", "Yield") not in states
+
+
+def test_directory_coverage(tmp_path):
+    (tmp_path / "a.py").write_text("async def f():\n    await x\n")
+    (tmp_path / "b.py").write_text("try:\n    pass\nexcept E:\n    f(x)\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "c.py").write_text("x = (\n")
+    # too deep for the parser
+    (tmp_path / "sub" / "d.py").write_text("-" * 200000 + "1\n")
+    # can not be read
+    (tmp_path / "e.py").mkdir()
+
+    coverage = directory_coverage(tmp_path, jobs=1)
+    # only a.py and b.py are counted
+    assert coverage.trees == 2
+    assert ("AsyncFunctionDef", "body", "Expr") in coverage.edges
+    assert ("Try", "handlers", "ExceptHandler") in coverage.edges
+
+    parallel_coverage = directory_coverage(tmp_path, jobs=2)
+    assert parallel_coverage.edges == coverage.edges
+    assert parallel_coverage.states == coverage.states
+
+
+def test_edge_coverage_cli(monkeypatch, capsys, tmp_path):
+    (tmp_path / "a.py").write_text("pass\n")
+    monkeypatch.setattr(
+        sys, "argv", ["pysource-codegen", "--edge-coverage", str(tmp_path)]
+    )
+    run()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith(f"1 of {len(grammar_edges())} grammar edges")
+    assert lines[2] == "uncovered grammar edges:"
+    assert "    Module.body: Pass" not in lines
+    assert "    Module.body: Expr" in lines
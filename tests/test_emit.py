@@ -0,0 +1,131 @@
+import ast
+import io
+import sys
+
+import pytest
+
+from pysource_codegen import generate
+from pysource_codegen import write_module
+from pysource_codegen._codegen import equal_ast
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._emit import emit
+from pysource_codegen._utils import unparse
+
+sources = [
+    "x = (yield)",
+    "x = (a := 1)",
+    "(a := 1)",
+    "a, *b = c = d",
+    "x = (*a, b)",
+    "del (a, b), c",
+    "for a, b in (c, d): pass",
+    "(1).real",
+    "(-1).real",
+    "2 ** -1",
+    "(-2) ** 2",
+    "a ** b ** c",
+    "(a ** b) ** c",
+    "a - (b - c)",
+    "not (a and b)",
+    "a or (b or c)",
+    "(a or b) or c",
+    "a < (b < c)",
+    "(lambda: (yield))",
+    "(lambda a, /, b=1, *c, d, e=2, **f: a)",
+    "{**(a or b), 1: 2}",
+    "f(*(a or b), *c, d=1, **e)",
+    "f((a for a in b))",
+    "[a for a in (b, c) if (d if e else f) for g in h]",
+    "{a: b async for a in c}",
+    "{*()}",
+    "a[1:2, b]",
+    "a[(1, 2)]",
+    "a[()]",
+    "a[b:c:d]",
+    "x = 1e309, 1e309j, -1e309",
+    "x = u'a' 'b'",
+    "x: int",
+    "(x): int = 1",
+    "x.y: int",
+    "x += (a, b)",
+    "x = f'{a!r:>{b}}' f'{{c}}'",
+    "from . import a as b, c",
+    "import a.b as c",
+    "global a, b",
+    "assert a, (b, c)",
+    "raise a from b",
+    "if a: pass\nelif b: pass\nelse: pass",
+    "if a: pass\nelse:\n    if b: pass\n    x = 1",
+    "while a: break\nelse: continue",
+    "try: pass\nexcept (a, b) as c: pass\nelse: pass\nfinally: pass",
+    "with a as (b, c), d: pass",
+    "@a.b(c)\nclass A(B, metaclass=C):\n    'doc'\n    def f(self) -> (a, b): return a, b",
+    "async def f():\n    async for a in b: await (c + d)\n    async with a: yield from (b, c)",
+    "def f(a: (yield)=1, *, b: int): pass",
+]
+
+if sys.version_info >= (3, 10):
+    sources += [
+        "match x:\n"
+        "    case [1, *_] | {1: _, **r} as y if z: pass\n"
+        "    case A(1, b=(2 | 3) as c) | -1 | 1 + 2j | None | a.b: pass\n"
+        "    case (1 as a) | [b]: pass"
+    ]
+
+if sys.version_info >= (3, 11):
+    sources += [
+        "a[*b]",
+        "a[1:2, *b]",
+        "try: pass\nexcept* a: pass\nexcept* b as c: pass",
+    ]
+
+if sys.version_info >= (3, 12):
+    sources += [
+        "def f[T: int, *Ts, **P](): pass",
+        "class A[T: (int, str)]: pass",
+        "type X[T] = list[T]",
+    ]
+
+
+@pytest.mark.parametrize("source", sources)
+def test_emit_source(source):
+    tree = ast.parse(source)
+    assert equal_ast(ast.parse(emit(tree)), tree)
+
+
+@pytest.mark.parametrize(
+    "root_node",
+    [
+        "Module",
+        pytest.param(
+            "Expression",
+            marks=pytest.mark.skipif(
+                sys.version_info < (3, 9), reason="no grammar for Expression"
+            ),
+        ),
+    ],
+)
+def test_emit_generated(root_node):
+    mode = {"Module": "exec", "Expression": "eval"}[root_node]
+
+    for seed in range(50):
+        tree = generate_ast(seed, node_limit=500, depth_limit=6, root_node=root_node)
+        try:
+            expected = ast.parse(unparse(tree), mode=mode)
+        except (ValueError, SyntaxError):
+            # some f-strings can not be unparsed by older python versions
+            continue
+
+        assert equal_ast(ast.parse(emit(tree), mode=mode), expected), seed
+
+
+def test_write_module_emit_source():
+    for seed in range(10):
+        try:
+            expected = generate(seed, target_nodes=300, emit_source=True)
+        except ValueError:
+            continue
+
+        out = io.StringIO()
+        write_module(seed, out, target_nodes=300, emit_source=True)
+        assert out.getvalue().rstrip("\n") == expected
@@ -0,0 +1,113 @@
+import ast
+import random
+
+import pytest
+
+from pysource_codegen import generate
+from pysource_codegen import generate_parallel
+from pysource_codegen._codegen import generate_ast
+from pysource_codegen._codegen import iter_generate_ast
+from pysource_codegen._entropy import BufferedEntropy
+from pysource_codegen._entropy import Entropy
+from pysource_codegen._entropy import entropy_source
+from pysource_codegen._entropy import entropy_sources
+from pysource_codegen._entropy import RandomEntropy
+
+
+def test_random_entropy_is_random():
+    source = RandomEntropy(5)
+    rand = random.Random(5)
+
+    for n in (1, 2, 6, 21, 1000):
+        assert source.below(n) == rand.randint(0, n - 1)
+        assert source.bit() == rand.choice([0, 1])
+        assert source.random() == rand.random()
+
+
+@pytest.mark.parametrize("version", sorted(entropy_sources))
+def test_entropy_range(version):
+    source = entropy_source(0, version)
+
+    for n in (1, 2, 6, 21, 256, 257, 1000):
+        numbers = {source.below(n) for _ in range(10 * n)}
+        assert numbers <= set(range(n))
+        assert len(numbers) > n // 2
+
+    assert {source.bit() for _ in range(100)} == {0, 1}
+    assert all(0.0 <= source.random() < 1.0 for _ in range(100))
+
+
+@pytest.mark.parametrize("version", sorted(entropy_sources))
+def test_entropy_seed(version):
+    def decisions(source):
+        return [(source.below(6), source.bit(), source.random()) for _ in range(10000)]
+
+    # the buffer is refilled in between
+    assert decisions(entropy_source(1, version)) == decisions(
+        entropy_source(1, version)
+    )
+
+
+def test_buffered_entropy_refill():
+    source = BufferedEntropy(0)
+    numbers = [source.below(256) for _ in range(3 * source.buffer_size)]
+    assert len(set(numbers)) == 256
+
+
+def test_rng_version():
+    def dump(tree):
+        return ast.dump(tree, include_attributes=True)
+
+    assert dump(generate_ast(3, rng_version=1)) != dump(generate_ast(3, rng_version=2))
+
+    for version in sorted(entropy_sources):
+        trees = iter_generate_ast(range(5), node_limit=300, rng_version=version)
+        assert [dump(tree) for tree in trees] == [
+            dump(generate_ast(seed, node_limit=300, rng_version=version))
+            for seed in range(5)
+        ]
+
+
+def test_unknown_rng_version():
+    with pytest.raises(ValueError, match="unknown rng version 0"):
+        generate(0, rng_version=0)
+
+
+def test_bytes_entropy():
+    source = entropy_source(bytes([3, 7, 200, 1, 0, 128, 5]), 1)
+
+    assert source.bit() == 1
+    assert source.below(1) == 0
+    assert source.below(6) == 7 % 6
+    assert source.below(300) == (200 + 256) % 300
+    assert source.random() == 0x8000 / 0x10000
+    # the data is continued with zeros
+    assert source.below(6) == 5
+    assert [source.bit(), source.below(1000), source.random()] == [0, 0, 0.0]
+
+
+def test_bytes_seed():
+    options = dict(node_limit=500, emit_source=True)
+    data = bytes(range(10, 250, 3)) * 5
+
+    code = generate(data, **options)
+    assert code == generate(data + bytes(10), **options)
+    assert code != generate(data[:-10], **options)
+    compile(generate(b"", **options), "<bytes>", "exec")
+
+    assert list(generate_parallel([b"", data], jobs=1, **options)) == [
+        (b"", generate(b"", **options)),
+        (data, code),
+    ]
+
+
+def test_incomplete_entropy():
+    class NoBelow(Entropy):
+        def bit(self):
+            return 0
+
+        def random(self):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        NoBelow()
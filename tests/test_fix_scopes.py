@@ -0,0 +1,118 @@
+import ast
+import sys
+
+import pytest
+
+from pysource_codegen._codegen import ScopeFixer
+
+
+def check_code(src, expected):
+    tree = ScopeFixer().visit(ast.parse(src))
+
+    assert ast.dump(tree) == ast.dump(ast.parse(expected))
+    compile(ast.fix_missing_locations(tree), "<string>", "exec")
+
+
+def test_async_generator_return():
+    check_code(
+        """
+async def f():
+    yield 1
+    return 2
+    def g():
+        return 3
+    x = lambda: (yield)
+""",
+        """
+async def f():
+    yield 1
+    return
+    def g():
+        return 3
+    x = lambda: (yield)
+""",
+    )
+
+
+def test_async_function_return():
+    check_code(
+        """
+async def f():
+    def g(a=(yield)):
+        pass
+    return 1
+""",
+        """
+async def f():
+    def g(a=(yield)):
+        pass
+    return
+""",
+    )
+
+    check_code(
+        """
+async def f():
+    x = lambda: (yield)
+    return 1
+""",
+        """
+async def f():
+    x = lambda: (yield)
+    return 1
+""",
+    )
+
+
+def test_comprehension_walrus():
+    check_code(
+        "[x for x in y if (x := 1)]",
+        "[x for x in y if 1]",
+    )
+
+    check_code(
+        "[[(b := 1) for b in c] for a in d if (a := 2) if (b := 3)]",
+        "[[1 for b in c] for a in d if 2 if (b := 3)]",
+    )
+
+
+def test_comprehension_walrus_removed_in_inner_comprehension():
+    # `a` is no name of the outer generator after the inner comprehension is fixed
+    check_code(
+        "[(a := 1) for q in [e for x in (a := z)]]",
+        "[(a := 1) for q in [e for x in z]]",
+    )
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="type parameters")
+def test_type_alias_in_generic_class():
+    check_code(
+        """
+class C[T]:
+    async def f():
+        type X = (yield)
+        return 1
+""",
+        """
+class C[T]:
+    async def f():
+        type X = None
+        return
+""",
+    )
+
+    # the alias is fixed before the function
+    check_code(
+        """
+async def f():
+    class C[T]:
+        type X = (yield)
+    return 1
+""",
+        """
+async def f():
+    class C[T]:
+        type X = None
+    return 1
+""",
+    )
@@ -0,0 +1,128 @@
+import ast
+import io
+
+import pytest
+
+from pysource_codegen import _parallel
+from pysource_codegen import generate
+from pysource_codegen import generate_many
+from pysource_codegen import generate_parallel
+from pysource_codegen import iter_generate
+from pysource_codegen import write_module
+from pysource_codegen._codegen import generate_ast
+
+
+def test_generate_many():
+    seeds = range(10)
+    expected = [generate(seed, node_limit=100, depth_limit=4) for seed in seeds]
+
+    assert generate_many(seeds, node_limit=100, depth_limit=4) == expected
+    assert (
+        list(iter_generate(iter(seeds), node_limit=100, depth_limit=4, batch_size=3))
+        == expected
+    )
+
+
+def test_generate_parallel():
+    seeds = range(20)
+    expected = [(seed, generate(seed, node_limit=100, depth_limit=4)) for seed in seeds]
+
+    assert (
+        list(
+            generate_parallel(
+                seeds, jobs=2, chunk_size=3, node_limit=100, depth_limit=4
+            )
+        )
+        == expected
+    )
+    assert (
+        sorted(
+            generate_parallel(
+                seeds,
+                jobs=2,
+                chunk_size=3,
+                ordered=False,
+                node_limit=100,
+                depth_limit=4,
+            )
+        )
+        == expected
+    )
+
+
+def test_generate_parallel_errors(monkeypatch):
+    seeds = range(6)
+    expected = [(seed, generate(seed, node_limit=100, depth_limit=4)) for seed in seeds]
+
+    def tree_source(tree, emit_source, stats):
+        # unparse() raises a ValueError for some f-strings before python 3.12
+        if source(tree, emit_source, stats) == expected[2][1]:
+            raise ValueError("Unable to avoid backslash in f-string expression part")
+        return source(tree, emit_source, stats)
+
+    source = _parallel.tree_source
+    monkeypatch.setattr(_parallel, "tree_source", tree_source)
+
+    errors: list = []
+    assert list(
+        generate_parallel(
+            seeds, jobs=1, chunk_size=4, node_limit=100, depth_limit=4, errors=errors
+        )
+    ) == [result for result in expected if result[0] != 2]
+    assert errors == [
+        (2, "ValueError: Unable to avoid backslash in f-string expression part")
+    ]
+
+
+def test_target_nodes():
+    for seed in range(5):
+        tree = generate_ast(seed, target_nodes=500)
+        # fix_result() can remove a few nodes
+        assert 450 < sum(1 for _ in ast.walk(tree)) < 600
+
+    with pytest.raises(ValueError):
+        generate_ast(0, root_node="Expression", target_nodes=500)
+
+
+def test_target_bytes():
+    sizes = []
+    for seed in range(10):
+        try:
+            sizes.append(len(generate(seed, target_bytes=2000)))
+        except ValueError:
+            # some f-strings can not be unparsed by older python versions
+            pass
+
+    assert sizes
+    # the last statement can be larger than the remaining bytes
+    assert all(1800 < size < 3000 for size in sizes), sizes
+
+
+def test_write_module():
+    for seed in range(10):
+        for targets in ({"target_nodes": 300}, {"target_bytes": 2000}):
+            try:
+                expected = generate(seed, **targets)
+            except ValueError:
+                # some f-strings can not be unparsed by older python versions
+                continue
+
+            out = io.StringIO()
+            write_module(seed, out, **targets)
+            assert out.getvalue().rstrip("\n") == expected.rstrip("\n")
+
+    with pytest.raises(ValueError):
+        write_module(0, io.StringIO())
+
+
+def test_locations():
+    for seed in range(10):
+        tree = generate_ast(seed, node_limit=200, depth_limit=5, locations=False)
+        assert not any(hasattr(node, "col_offset") for node in ast.walk(tree))
+
+        tree = generate_ast(seed, node_limit=200, depth_limit=5)
+        assert all(
+            hasattr(node, "col_offset")
+            for node in ast.walk(tree)
+            if "col_offset" in node._attributes
+        )
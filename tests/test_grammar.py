@@ -0,0 +1,59 @@
+import ast
+import pickle
+import sys
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from pysource_codegen import ast_info
+from pysource_codegen._grammar import load_grammar
+from pysource_codegen.ast_info import get_info
+from pysource_codegen.ast_info import parse_info
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 9), reason="the grammar of 3.8 is written by hand"
+)
+def test_grammar_is_up_to_date():
+    grammar = load_grammar()
+    if grammar is None:
+        pytest.skip(f"no prebuilt grammar for {sys.version_info[:2]}")
+
+    infos = {}
+    parse_info("mod", infos)
+
+    assert dict(grammar) == infos, "run `python -m pysource_codegen._grammar`"
+
+
+def test_unknown_version():
+    assert load_grammar((2, 7)) is None
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 9), reason="the grammar of 3.8 is written by hand"
+)
+def test_grammar_without_snapshot(monkeypatch):
+    # python versions without a prebuilt grammar (like 3.14) parse the ast docstrings
+    grammar = load_grammar()
+    monkeypatch.setattr(ast_info, "type_infos", {})
+    monkeypatch.setattr(ast_info, "parsed_infos", {})
+
+    assert ast_info.get_info("Module").ast_type is ast.Module
+    ast_info.get_info("mod")
+    if grammar is not None:
+        assert ast_info.parsed_infos == dict(grammar)
+
+
+@pytest.mark.parametrize("name", ["Module", "expr", "identifier"])
+def test_grammar_types_are_immutable(name):
+    info = get_info(name)
+
+    with pytest.raises(FrozenInstanceError):
+        info.kind = None
+    if name == "Module":
+        with pytest.raises(TypeError):
+            info.fields["body"] = ("expr", "*")
+        with pytest.raises(AttributeError):
+            info.fields.clear()
+    assert not hasattr(info, "__dict__")
+    assert pickle.loads(pickle.dumps(info)) == info
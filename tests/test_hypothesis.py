@@ -0,0 +1,78 @@
+import ast
+
+import pytest
+
+pytest.importorskip("hypothesis")
+
+from hypothesis import find
+from hypothesis import given
+from hypothesis import Phase
+from hypothesis import settings
+from hypothesis.database import InMemoryExampleDatabase
+
+from pysource_codegen.hypothesis import expressions
+from pysource_codegen.hypothesis import modules
+from pysource_codegen.hypothesis import statements
+from pysource_codegen.hypothesis import trees
+
+
+@settings(max_examples=50, deadline=None)
+@given(modules(emit_source=True))
+def test_modules(code):
+    compile(code, "<code>", "exec")
+
+
+@settings(max_examples=50, deadline=None)
+@given(statements(emit_source=True))
+def test_statements(code):
+    assert len(ast.parse(code).body) == 1
+    compile(code, "<code>", "exec")
+
+
+@settings(max_examples=50, deadline=None)
+@given(expressions(emit_source=True))
+def test_expressions(code):
+    compile(code, "<code>", "eval")
+
+
+@settings(max_examples=20, deadline=None)
+@given(trees("arguments"))
+def test_root_node(tree):
+    assert isinstance(tree, ast.arguments)
+
+
+def test_shrink():
+    settings_ = settings(max_examples=1000, database=None, derandomize=True)
+
+    code = find(statements(), lambda code: "async" in code, settings=settings_)
+    # async def name_0():
+    #     pass
+    assert len(list(ast.walk(ast.parse(code)))) <= 5
+
+    code = find(expressions(), lambda code: " if " in code, settings=settings_)
+    # name_0 if name_0 else name_0
+    assert len(list(ast.walk(ast.parse(code, mode="eval")))) <= 8
+
+
+def test_replay():
+    database = InMemoryExampleDatabase()
+    found = []
+
+    def fails_for_async(code):
+        found.append(code)
+        assert "async" not in code
+
+    def run(*phases):
+        test = given(statements(emit_source=True))(fails_for_async)
+        with pytest.raises(AssertionError):
+            settings(database=database, deadline=None, phases=phases)(test)()
+
+    run(Phase.generate, Phase.shrink)
+    failing = found[-1]
+
+    found.clear()
+    run(Phase.reuse)
+    # the shrunk example is read from the database,
+    # how often it is replayed depends on the hypothesis version
+    assert found
+    assert all(code == failing for code in found)
@@ -71,11 +71,14 @@ def gen_test(name, file):
             if sys.version_info < (3, 8) and isinstance(node, ast.Constant):
                 return  # pytest.skip(f"ast.Constant can not be unparsed on python3.7")
 
+        dump = ast.dump(tree)
         self.assertEqual(
             is_valid_ast(tree),
             self.does_compile(tree),
             msg=self.message(),
         )
+        # is_valid_ast() fixes the tree in place and restores it
+        self.assertEqual(ast.dump(tree), dump)
 
     setattr(TestInvalidAst, "test_" + name, test_invalid_ast)
 
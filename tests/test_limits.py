@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+
+from pysource_codegen._limits import cached_limits
+from pysource_codegen._limits import calc_f_string_expr_limit
+from pysource_codegen._limits import calc_f_string_format_limit
+from pysource_codegen._limits import f_string_limits
+from pysource_codegen._limits import FStringLimits
+
+
+def test_known_limits():
+    assert f_string_limits() == (
+        calc_f_string_expr_limit(),
+        calc_f_string_format_limit(),
+    )
+
+
+def test_cached_limits(tmp_path):
+    cache = tmp_path / "cache" / "limits.json"
+
+    limits = cached_limits(cache)
+    assert limits == f_string_limits()
+    assert cache.exists()
+
+    (key,) = json.loads(cache.read_text())
+    cache.write_text(json.dumps({key: [1, 2]}))
+    assert cached_limits(cache) == FStringLimits(1, 2)
+
+
+def test_broken_cache(tmp_path):
+    cache = tmp_path / "limits.json"
+    cache.write_text("{broken")
+
+    assert cached_limits(cache) == f_string_limits()
+
+
+def test_lazy_import():
+    # the import of the package does not probe the limits or start a process pool
+    code = (
+        "import sys, pysource_codegen\n"
+        "from pysource_codegen import _limits\n"
+        "assert _limits.f_string_limits.cache_info().currsize == 0\n"
+        "assert 'concurrent.futures' not in sys.modules\n"
+        "assert 'multiprocessing' not in sys.modules\n"
+        "pysource_codegen.generate_parallel\n"
+        "assert 'concurrent.futures' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
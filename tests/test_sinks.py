@@ -0,0 +1,120 @@
+import io
+import json
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from pysource_codegen import _parallel
+from pysource_codegen import generate
+from pysource_codegen.__main__ import run
+from pysource_codegen._sinks import open_sink
+
+programs = {3: "a = 1", 4: "b = 2"}
+
+
+def write_programs(output, format="text", stream=None):
+    with open_sink(output, format, stream) as sink:
+        for seed, source in programs.items():
+            sink.write(seed, source)
+
+
+def test_streams():
+    out = io.StringIO()
+    write_programs(None, "text", out)
+    assert out.getvalue() == "# seed: 3\na = 1\n# seed: 4\nb = 2\n"
+
+    out = io.StringIO()
+    write_programs(None, "jsonl", out)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {"seed": 3, "source": "a = 1"},
+        {"seed": 4, "source": "b = 2"},
+    ]
+
+    out = io.StringIO()
+    write_programs(None, "nul", out)
+    assert out.getvalue() == "a = 1\0b = 2\0"
+
+
+def test_directory(tmp_path):
+    write_programs(str(tmp_path / "programs"))
+    assert (tmp_path / "programs" / "3.py").read_text() == "a = 1\n"
+    assert (tmp_path / "programs" / "4.py").read_text() == "b = 2\n"
+
+
+@pytest.mark.parametrize("name", ["programs.tar", "programs.tar.gz", "programs.tgz"])
+def test_tar(tmp_path, name):
+    write_programs(str(tmp_path / name))
+    with tarfile.open(tmp_path / name) as tar:
+        assert tar.getnames() == ["3.py", "4.py"]
+        assert tar.extractfile("4.py").read() == b"b = 2\n"
+
+
+def test_zip(tmp_path):
+    write_programs(str(tmp_path / "programs.zip"))
+    with zipfile.ZipFile(tmp_path / "programs.zip") as zip:
+        assert zip.namelist() == ["3.py", "4.py"]
+        assert zip.read("3.py") == b"a = 1\n"
+
+
+def test_cli(monkeypatch, capsys, tmp_path):
+    options = ["--node-limit", "100", "--depth-limit", "4"]
+    expected = [generate(seed, node_limit=100, depth_limit=4) for seed in range(5, 8)]
+
+    monkeypatch.setattr(
+        sys, "argv", ["pysource-codegen", "--seeds", "5:8", "--format", "nul", *options]
+    )
+    run()
+    assert capsys.readouterr().out.split("\0") == [*expected, ""]
+
+    output = tmp_path / "programs.zip"
+    monkeypatch.setattr(
+        sys, "argv", ["pysource-codegen", "--seeds", "5:8", "-o", str(output), *options]
+    )
+    run()
+    with zipfile.ZipFile(output) as zip:
+        assert [zip.read(f"{seed}.py").decode() for seed in range(5, 8)] == [
+            source + "\n" for source in expected
+        ]
+
+
+def test_output_format(monkeypatch, capsys, tmp_path):
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / "programs"), "jsonl", None)
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["pysource-codegen", "--seeds", "5:8", "-o", str(tmp_path), "--format", "nul"],
+    )
+    with pytest.raises(SystemExit):
+        run()
+    assert "--format can not be used with --output" in capsys.readouterr().err
+
+
+def test_cli_skipped_seeds(monkeypatch, capsys, tmp_path):
+    sources = []
+
+    def tree_source(tree, emit_source, stats):
+        # unparse() raises a ValueError for some f-strings before python 3.12
+        sources.append(tree)
+        if len(sources) == 2:
+            raise ValueError("Unable to avoid backslash in f-string expression part")
+        return source(tree, emit_source, stats)
+
+    source = _parallel.tree_source
+    monkeypatch.setattr(_parallel, "tree_source", tree_source)
+
+    output = tmp_path / "programs.tar"
+    monkeypatch.setattr(
+        sys, "argv", ["pysource-codegen", "--seeds", "5:8", "-o", str(output)]
+    )
+    run()
+
+    # the other seeds are written
+    with tarfile.open(output) as tar:
+        assert tar.getnames() == ["5.py", "7.py"]
+    assert capsys.readouterr().err == (
+        "seed 6 skipped: ValueError: Unable to avoid backslash in f-string expression part\n"
+    )
@@ -0,0 +1,103 @@
+import io
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from pysource_codegen import generate
+from pysource_codegen import generate_many
+from pysource_codegen import generate_parallel
+from pysource_codegen import Stats
+from pysource_codegen._codegen import generate_ast
+
+
+def test_stats():
+    stats = Stats()
+    seeds = range(10)
+
+    assert generate_many(seeds, node_limit=200, depth_limit=5, stats=stats) == [
+        generate(seed, node_limit=200, depth_limit=5) for seed in seeds
+    ]
+
+    assert stats.trees == 10
+    assert stats.nodes["Module"] == 10
+    assert stats.final_nodes > 0
+    assert 0 < stats.wasted_nodes < sum(stats.nodes.values())
+    assert stats.rejected["stmt"] > 0
+    assert all(duration >= 0 for duration in stats.times.values())
+    assert stats.times["generate"] > 0
+    assert stats.times["unparse"] > 0
+
+    out = io.StringIO()
+    stats.dump(out)
+    data = json.loads(out.getvalue())
+    assert data["trees"] == 10
+    assert data["nodes"]["Module"] == 10
+
+
+def test_stats_fix():
+    stats = Stats()
+    for seed in range(20):
+        generate_ast(seed, node_limit=200, depth_limit=5, stats=stats)
+
+    assert sum(stats.fix_rewritten.values()) > 0
+    # the ctx which is set by fix() is not counted
+    assert stats.nodes["Name"] > 0
+    assert stats.fix_rewritten["Name"] == 0
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="match requires python 3.10")
+def test_stats_generation_rules():
+    def removed_cases(use):
+        stats = Stats()
+        with patch("pysource_codegen._codegen.use", use):
+            for seed in range(100):
+                generate_ast(seed, node_limit=200, depth_limit=5, stats=stats)
+        return stats.fix_removed["Match"]
+
+    # the generator stops the cases after a wildcard, fix() has nothing to remove
+    assert removed_cases(lambda: True) == 0
+
+    def use():
+        # only the decisions which are made while the lists are generated are switched off
+        return sys._getframe(1).f_code.co_name not in ("generate_list", "child_node")
+
+    assert removed_cases(use) > 0
+
+
+def test_stats_parallel():
+    seeds = range(12)
+
+    stats = Stats()
+    list(generate_many(seeds, node_limit=100, depth_limit=4, stats=stats))
+
+    parallel_stats = Stats()
+    list(
+        generate_parallel(
+            seeds,
+            jobs=2,
+            chunk_size=5,
+            node_limit=100,
+            depth_limit=4,
+            stats=parallel_stats,
+        )
+    )
+
+    assert parallel_stats.trees == stats.trees
+    assert parallel_stats.nodes == stats.nodes
+    assert parallel_stats.final_nodes == stats.final_nodes
+    assert parallel_stats.wasted_nodes == stats.wasted_nodes
+    assert parallel_stats.fix_rewritten == stats.fix_rewritten
+
+
+def test_wasted_nodes():
+    stats = Stats()
+    for seed in range(50):
+        generate_ast(seed, node_limit=400, depth_limit=6, stats=stats)
+
+    assert stats.wasted_nodes < sum(stats.nodes.values()) / 10
+
+    # these decisions are made during the generation
+    for name in ("Lambda", "List", "Tuple", "Match", "MatchMapping", "MatchClass"):
+        assert stats.fix_removed[name] == 0, name
@@ -0,0 +1,179 @@
+import ast
+import inspect
+import json
+import sys
+import textwrap
+
+import pytest
+
+from pysource_codegen import _validate
+from pysource_codegen import validate_directory
+from pysource_codegen.__main__ import run
+from pysource_codegen._codegen import probability_try
+from pysource_codegen._codegen import Rejection
+from pysource_codegen._codegen import validate_ast
+from pysource_codegen._validate import generator_hash
+from pysource_codegen._validate import top_rules
+from pysource_codegen._validate import validate_files
+
+files = {
+    "valid.py": "x = 1\n",
+    "copy.py": "x = 1\n",
+    "rejected.py": "try:\n    pass\nfinally:\n    pass\n",
+    "syntax_error.py": "x = (\n",
+    "sub/valid.py": "def f(a, /, b):\n    return a + b\n",
+}
+
+
+def create_files(tmp_path):
+    for name, code in files.items():
+        path = tmp_path / "src" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+    return tmp_path / "src"
+
+
+def summary(results, root):
+    return {
+        result.path.relative_to(root).as_posix(): (
+            str(result.rejection) if result.rejection else None,
+            result.error.split(":")[0] if result.error else None,
+        )
+        for result in results
+    }
+
+
+def test_validate_directory(tmp_path):
+    root = create_files(tmp_path)
+
+    assert summary(validate_directory(root, jobs=1), root) == {
+        "copy.py": (None, None),
+        "rejected.py": ("handlers-length: Try at root.body[0], line 1", None),
+        "sub/valid.py": (None, None),
+        "syntax_error.py": (None, "SyntaxError"),
+        "valid.py": (None, None),
+    }
+
+
+def test_validate_parallel(tmp_path):
+    root = create_files(tmp_path)
+    paths = sorted(root.rglob("*.py"))
+
+    assert list(validate_files(paths, jobs=2, chunk_size=2)) == list(
+        validate_files(paths, jobs=1)
+    )
+
+
+def test_validate_cache(tmp_path, monkeypatch):
+    root = create_files(tmp_path)
+    cache = tmp_path / "cache.json"
+
+    first = list(validate_directory(root, jobs=1, cache=cache))
+    assert cache.exists()
+
+    def validate_source(source, filename):
+        assert False, f"{filename} is not cached"
+
+    monkeypatch.setattr(_validate, "validate_source", validate_source)
+
+    assert list(validate_directory(root, jobs=1, cache=cache)) == first
+
+
+def test_validate_errors(tmp_path, monkeypatch):
+    root = create_files(tmp_path)
+    # a directory which can not be read as a file
+    (root / "directory.py").mkdir()
+
+    expected = {
+        "copy.py": (None, None),
+        "directory.py": (None, "IsADirectoryError"),
+        "rejected.py": ("handlers-length: Try at root.body[0], line 1", None),
+        "sub/valid.py": (None, None),
+        "syntax_error.py": (None, "SyntaxError"),
+        "valid.py": (None, None),
+    }
+    assert summary(validate_directory(root, jobs=1), root) == expected
+    assert summary(validate_directory(root, jobs=2), root) == expected
+
+    def validate_ast(tree):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(_validate, "validate_ast", validate_ast)
+
+    # an unexpected exception is reported for the file and does not stop the other files
+    cache = tmp_path / "cache.json"
+    results = summary(validate_directory(root, jobs=1, cache=cache), root)
+    assert results["valid.py"] == (None, "TypeError")
+    assert results["syntax_error.py"] == (None, "SyntaxError")
+    assert len(results) == len(expected)
+    assert cache.exists()
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"generator": "',
+        "[]",
+        "{}",
+        '{"generator": GENERATOR}',
+        '{"generator": GENERATOR, "results": []}',
+        '{"generator": GENERATOR, "results": {"digest": 1}}',
+        '{"generator": GENERATOR, "results": {"digest": [{"rule": "x"}, null]}}',
+    ],
+)
+def test_damaged_cache(tmp_path, content):
+    root = create_files(tmp_path)
+    cache = tmp_path / "cache.json"
+    cache.write_text(content.replace("GENERATOR", json.dumps(generator_hash())))
+
+    assert list(validate_directory(root, jobs=1, cache=cache)) == list(
+        validate_directory(root, jobs=1)
+    )
+    # the cache is replaced
+    assert json.loads(cache.read_text())["results"]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_rule_ids():
+    source = textwrap.dedent(inspect.getsource(probability_try))
+    rules = [
+        node.exc.args[0].value
+        for node in ast.walk(ast.parse(source))
+        if isinstance(node, ast.Raise)
+        and isinstance(node.exc, ast.Call)
+        and node.exc.func.id == "Invalid"
+    ]
+    assert len(rules) == len(set(rules))
+
+
+def test_rejected_by_rule():
+    tree = ast.parse("x = [a, b]\n")
+    tree.body[0].value.elts[1] = ast.Slice(lower=None, upper=None, step=None)
+
+    assert validate_ast(tree) == Rejection(
+        "slice-outside-subscript",
+        "Slice",
+        (("Module", "body"), ("Assign", "value"), ("List", "elts")),
+        path="root.body[0].value.elts[1]",
+    )
+
+
+def test_top_rules(tmp_path):
+    root = create_files(tmp_path)
+    (root / "rejected2.py").write_text("for a in b:\n    pass\n" + files["rejected.py"])
+
+    assert top_rules(validate_directory(root, jobs=1)) == [("handlers-length", 2)]
+
+
+def test_cli(monkeypatch, capsys, tmp_path):
+    root = create_files(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["pysource-codegen", "--validate", str(root)])
+    run()
+
+    out = capsys.readouterr().out
+    assert out.splitlines() == [
+        f"{root / 'rejected.py'}: handlers-length: Try at root.body[0], line 1",
+        "",
+        "rejected files per rule:",
+        "       1 handlers-length",
+    ]